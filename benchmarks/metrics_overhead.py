@@ -0,0 +1,71 @@
+"""Micro-benchmark: per-request cost of GenerateCodeUseCase instrumentation.
+
+Run with ``python -m benchmarks.metrics_overhead [--requests 20000]``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from src.application.use_cases.generate_code import GenerateCodeUseCase
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.metrics import GenerationMetrics, NullMetrics
+from src.domain.services.safety import SafetyGate, SafetyOrchestrator
+from src.domain.services.token_policy import TokenPolicy
+from src.infrastructure.metrics.prometheus import PrometheusMetrics
+from src.infrastructure.plugins.trim_plugin import TrimWhitespacePlugin
+
+
+class InstantProvider:
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        return CodeGenerationResult.new(
+            request=request, code="print('hi')", model="bench", token_usage=5
+        )
+
+
+class NullRepository:
+    async def save(self, result: CodeGenerationResult) -> None:
+        return None
+
+
+async def measure(metrics: GenerationMetrics, requests: int) -> float:
+    use_case = GenerateCodeUseCase(
+        provider=InstantProvider(),
+        repository=NullRepository(),
+        safety=SafetyOrchestrator([SafetyGate("RB-SECRET"), SafetyGate("RB-DRIFT")]),
+        token_policy=TokenPolicy(1024),
+        post_processors=(TrimWhitespacePlugin(),),
+        metrics=metrics,
+    )
+    request = CodeGenerationRequest(
+        prompt="write hello", language=ProgrammingLanguage.PYTHON, max_tokens=64, user_id="u1"
+    )
+    for _ in range(1000):
+        await use_case.execute(request)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await use_case.execute(request)
+    return (time.perf_counter() - started) / requests
+
+
+async def run(requests: int, rounds: int) -> None:
+    baseline = min([await measure(NullMetrics(), requests) for _ in range(rounds)])
+    instrumented = min([await measure(PrometheusMetrics(), requests) for _ in range(rounds)])
+    print(f"requests={requests} rounds={rounds}")
+    print(f"no-op metrics    : {baseline * 1e6:8.2f} us/request")
+    print(f"prometheus       : {instrumented * 1e6:8.2f} us/request")
+    print(f"overhead         : {(instrumented - baseline) * 1e6:8.2f} us/request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Micro-benchmark: compiled SafetyEngine vs the previous per-gate string scans.
+
+Run with ``python -m benchmarks.safety_engine [--rules 300] [--prompt-chars 4096]``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import timeit
+from dataclasses import dataclass
+
+from src.domain.services.safety import SafetyGate, SafetyOrchestrator, SafetyRule
+
+
+@dataclass(slots=True)
+class LegacyGate:
+    """Shape of the original gate: lowercase the prompt, one substring scan per rule."""
+
+    name: str
+    needles: tuple[str, ...]
+
+    def check(self, text: str) -> None:
+        lowered = text.lower()
+        for needle in self.needles:
+            if needle in lowered:
+                raise ValueError(self.name)
+
+
+def build_rules(count: int, gates: int, seed: int) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits + "-_"
+    rules: dict[str, list[str]] = {f"RB-{index}": [] for index in range(gates)}
+    for index in range(count):
+        needle = "".join(rng.choice(alphabet) for _ in range(rng.randint(6, 16)))
+        rules[f"RB-{index % gates}"].append(needle)
+    return rules
+
+
+def build_prompt(chars: int, seed: int) -> str:
+    rng = random.Random(seed + 1)
+    words = ["def", "class", "return", "async", "await", "import", "data", "value", "items"]
+    out: list[str] = []
+    size = 0
+    while size < chars:
+        word = rng.choice(words)
+        out.append(word)
+        size += len(word) + 1
+    return " ".join(out)[:chars]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=300)
+    parser.add_argument("--gates", type=int, default=10)
+    parser.add_argument("--prompt-chars", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rules = build_rules(args.rules, args.gates, args.seed)
+    prompt = build_prompt(args.prompt_chars, args.seed)
+
+    legacy = [LegacyGate(name, tuple(needles)) for name, needles in rules.items()]
+    compiled = SafetyOrchestrator(
+        [
+            SafetyGate(
+                name,
+                tuple(SafetyRule(name, f"{name}-{i}", needle) for i, needle in enumerate(needles)),
+            )
+            for name, needles in rules.items()
+        ]
+    )
+
+    def run_legacy() -> None:
+        for gate in legacy:
+            gate.check(prompt)
+
+    def run_compiled() -> None:
+        compiled.validate(prompt)
+
+    build_time = timeit.timeit(
+        lambda: SafetyOrchestrator([SafetyGate(name) for name in ("RB-SECRET", "RB-DRIFT")]),
+        number=1,
+    )
+    legacy_time = min(timeit.repeat(run_legacy, number=args.repeat, repeat=5)) / args.repeat
+    compiled_time = min(timeit.repeat(run_compiled, number=args.repeat, repeat=5)) / args.repeat
+
+    print(f"rules={args.rules} gates={args.gates} prompt_chars={len(prompt)}")
+    print(f"legacy per-gate scan : {legacy_time * 1e6:9.1f} us/prompt")
+    print(f"compiled engine      : {compiled_time * 1e6:9.1f} us/prompt")
+    print(f"speedup              : {legacy_time / compiled_time:9.2f}x")
+    print(f"default engine build : {build_time * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Startup benchmark: import time and time-to-first-request of the real app.
+
+Run with ``python -m benchmarks.startup [--runs 5]``.
+
+Import time is measured in fresh interpreters (``import src.main``), together with whether
+the openai SDK got pulled in. Time-to-first-request starts ``uvicorn src.main:app`` in a
+subprocess and measures until the first ``GET /health`` succeeds and then the latency of the
+first ``POST /generate`` against the local Responses API stub, sent ``--settle-ms`` after
+readiness (0 by default, i.e. while the openai SDK may still be preloading). ``cold`` runs
+start from an empty SQLite file, so the schema is created; ``warm`` runs reuse it and only
+check the schema version. Results are written as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.load_test import BackgroundServer, git_revision
+from benchmarks.stub_openai import StubProfile, create_stub_app
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import src.main\n"
+    "print(time.perf_counter() - started, 'openai' in sys.modules)\n"
+)
+
+
+@dataclass(slots=True)
+class StartupResult:
+    phase: str
+    runs: int
+    min_ms: float
+    median_ms: float
+    max_ms: float
+
+
+def measure_import(env: dict[str, str]) -> tuple[float, bool]:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), output[1] == "True"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(
+    env: dict[str, str], timeout: float, settle: float
+) -> tuple[float, float]:
+    """Seconds from spawning the server to the first /health 200, and the first /generate."""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError("server exited during startup")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("server did not answer in time")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            ready = time.perf_counter() - started
+            time.sleep(settle)
+            generate_started = time.perf_counter()
+            resp = client.post(
+                "/generate",
+                json={"prompt": "write hello world", "language": "python", "max_tokens": 64},
+            )
+            resp.raise_for_status()
+            return ready, time.perf_counter() - generate_started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(phase: str, seconds: list[float]) -> StartupResult:
+    millis = [value * 1000 for value in seconds]
+    return StartupResult(
+        phase=phase,
+        runs=len(millis),
+        min_ms=round(min(millis), 2),
+        median_ms=round(statistics.median(millis), 2),
+        max_ms=round(max(millis), 2),
+    )
+
+
+def format_row(result: StartupResult) -> str:
+    return (
+        f"{result.phase:<22} n={result.runs:<3} min={result.min_ms:>8.1f}  "
+        f"median={result.median_ms:>8.1f}  max={result.max_ms:>8.1f} ms"
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for /health")
+    parser.add_argument("--settle-ms", type=float, default=0.0, help="pause before /generate")
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/startup.json"))
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    results: list[StartupResult] = []
+    with BackgroundServer(create_stub_app(StubProfile(latency_ms=0, seed=7))) as stub:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "OPENAI_API_KEY": "stub",
+                "CODEGEN_OPENAI_BASE_URL": f"{stub.url}/v1",
+                "CODEGEN_OPENAI_HTTP2": "false",
+                "CODEGEN_CACHE_ENABLED": "false",
+                "CODEGEN_RATE_LIMIT_ENABLED": "false",
+            }
+            imports = [measure_import(env) for _ in range(args.runs)]
+            results.append(summarize("import src.main", [seconds for seconds, _ in imports]))
+            print(format_row(results[-1]), flush=True)
+            if any(loaded for _, loaded in imports):
+                print("warning: importing src.main imported the openai SDK")
+
+            timings: dict[str, list[tuple[float, float]]] = {"cold": [], "warm": []}
+            for run in range(args.runs):
+                database = Path(tmp) / f"startup-{run}.db"
+                env["CODEGEN_DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+                for phase in ("cold", "warm"):
+                    timings[phase].append(
+                        measure_first_request(env, args.timeout, args.settle_ms / 1000)
+                    )
+            for phase, samples in timings.items():
+                results.append(summarize(f"{phase} first /health", [s[0] for s in samples]))
+                print(format_row(results[-1]), flush=True)
+                results.append(summarize(f"{phase} first /generate", [s[1] for s in samples]))
+                print(format_row(results[-1]), flush=True)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "openai_imported_by_app": any(loaded for _, loaded in imports),
+        },
+        "results": [asdict(result) for result in results],
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
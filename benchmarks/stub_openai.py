@@ -0,0 +1,163 @@
+"""Local stand-in for the OpenAI Responses API used by the load-test harness.
+
+Only ``POST /v1/responses`` is implemented, in both JSON and ``stream=True`` (SSE) form,
+with enough of the response shape for the SDK and ``OpenAICodeGenerationProvider``.
+Latency is log-normal around ``latency_ms``; output size is uniform in ``tokens``;
+``error_rate`` of the calls fail with ``error_status``.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass(slots=True)
+class StubProfile:
+    latency_ms: float = 200.0
+    latency_sigma: float = 0.5
+    tokens: tuple[int, int] = (50, 400)
+    error_rate: float = 0.0
+    error_status: int = 500
+    stream_chunks: int = 16
+    seed: int | None = None
+    rng: random.Random = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+
+    def latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.rng.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def output_tokens(self) -> int:
+        return self.rng.randint(*self.tokens)
+
+    def fails(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+
+@dataclass(slots=True)
+class StubStats:
+    requests: int = 0
+    streams: int = 0
+    errors: int = 0
+
+
+def create_stub_app(profile: StubProfile | None = None) -> FastAPI:
+    profile = profile or StubProfile()
+    stats = StubStats()
+    ids = itertools.count(1)
+    app = FastAPI(title="Stub Responses API")
+    app.state.profile = profile
+    app.state.stats = stats
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        body = await request.json()
+        stats.requests += 1
+        if profile.fails():
+            stats.errors += 1
+            await asyncio.sleep(profile.latency() / 10)
+            return JSONResponse(
+                {"error": {"message": "injected failure", "type": "server_error", "code": None}},
+                status_code=profile.error_status,
+            )
+        response_id = f"resp_{next(ids)}"
+        model = body.get("model", "stub-model")
+        prompt_tokens = max(1, len(str(body.get("input", ""))) // 4)
+        output_tokens = min(profile.output_tokens(), int(body.get("max_output_tokens") or 10**9))
+        text = _code(output_tokens)
+        latency = profile.latency()
+        if body.get("stream"):
+            stats.streams += 1
+            events = _stream_events(
+                profile, response_id, model, text, prompt_tokens, output_tokens, latency
+            )
+            return StreamingResponse(events, media_type="text/event-stream")
+        await asyncio.sleep(latency)
+        return _response(response_id, model, text, prompt_tokens, output_tokens)
+
+    @app.get("/stats")
+    async def stub_stats() -> dict[str, int]:
+        return {"requests": stats.requests, "streams": stats.streams, "errors": stats.errors}
+
+    return app
+
+
+def _code(tokens: int) -> str:
+    # Roughly four characters per token, shaped like code so post-processing has work to do.
+    lines = [f"    value_{index} = compute({index})" for index in range(max(1, tokens // 8))]
+    return "def generated():\n" + "\n".join(lines) + "\n    return value_0\n"
+
+
+def _response(
+    response_id: str, model: str, text: str, prompt_tokens: int, output_tokens: int
+) -> dict[str, object]:
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [
+            {
+                "id": f"msg_{response_id}",
+                "type": "message",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "usage": {
+            "input_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+    }
+
+
+async def _stream_events(
+    profile: StubProfile,
+    response_id: str,
+    model: str,
+    text: str,
+    prompt_tokens: int,
+    output_tokens: int,
+    latency: float,
+) -> AsyncIterator[str]:
+    chunks = max(1, profile.stream_chunks)
+    size = math.ceil(len(text) / chunks)
+    # A fifth of the latency goes to the first token, the rest is spread over the chunks.
+    await asyncio.sleep(latency * 0.2)
+    for sequence, start in enumerate(range(0, len(text), size)):
+        event = {
+            "type": "response.output_text.delta",
+            "item_id": f"msg_{response_id}",
+            "output_index": 0,
+            "content_index": 0,
+            "delta": text[start : start + size],
+            "sequence_number": sequence,
+        }
+        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        await asyncio.sleep(latency * 0.8 / chunks)
+    completed = {
+        "type": "response.completed",
+        "response": _response(response_id, model, text, prompt_tokens, output_tokens),
+        "sequence_number": chunks + 1,
+    }
+    yield f"event: {completed['type']}\ndata: {json.dumps(completed)}\n\n"
@@ -13,6 +13,13 @@ class GenerateCodePayload(BaseModel):
     language: ProgrammingLanguage = Field(default=ProgrammingLanguage.PYTHON)
     max_tokens: int = Field(default=512, gt=0, le=4096)
     user_id: Optional[str] = Field(default=None, max_length=128)
+    timeout_ms: Optional[int] = Field(default=None, gt=0, le=600_000)
+
+
+class PluginTiming(BaseModel):
+    name: str
+    status: str
+    duration_ms: float
 
 
 class GeneratedCode(BaseModel):
@@ -21,6 +28,21 @@ class GeneratedCode(BaseModel):
     model: str
     token_usage: int
     created_at: datetime
+    plugins: list[PluginTiming] = Field(default_factory=list)
+
+
+class BatchGeneratePayload(BaseModel):
+    items: list[GenerateCodePayload] = Field(..., min_length=1)
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[GeneratedCode] = None
+    error: Optional[str] = None
+
+
+class BatchGenerateResponse(BaseModel):
+    items: list[BatchItemResult]
 
 
 class HistoryItem(BaseModel):
@@ -34,3 +56,55 @@ class HistoryItem(BaseModel):
 
 class HistoryResponse(BaseModel):
     items: list[HistoryItem]
+    next_cursor: Optional[str] = None
+
+
+class SearchHitItem(BaseModel):
+    id: int
+    user_id: Optional[str]
+    language: ProgrammingLanguage
+    model: str
+    token_usage: int
+    created_at: datetime
+    prompt: str
+    code: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    items: list[SearchHitItem]
+    next_cursor: Optional[str] = None
+
+
+class UsageItem(BaseModel):
+    bucket_start: datetime
+    requests: int
+    token_usage: int
+    prompt_tokens: int
+    user_id: Optional[str] = None
+    language: Optional[ProgrammingLanguage] = None
+    model: Optional[str] = None
+
+
+class UsageResponse(BaseModel):
+    granularity: str
+    items: list[UsageItem]
+
+
+class JobResult(BaseModel):
+    record_id: Optional[int] = None
+    code: str
+    model: str
+    token_usage: int
+
+
+class GenerationJobResponse(BaseModel):
+    id: str
+    status: str
+    request: GenerateCodePayload
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[JobResult] = None
+    error: Optional[str] = None
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import zlib
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from ...domain.models.code_generation import CodeGenerationResult
+from ...domain.models.history import HistoryCursor, HistoryQuery
+from ...domain.services.ports import GenerationRepository
+
+CHUNK_BYTES = 64 * 1024
+
+
+@dataclass(slots=True)
+class ExportHistoryUseCase:
+    """Streams generation history as NDJSON, one full record per line.
+
+    Every line carries the keyset ``cursor`` of its record, so an interrupted export
+    resumes by passing the last line's cursor back with the same filters.
+    """
+
+    repository: GenerationRepository
+    batch_size: int = 500
+
+    async def execute(self, query: HistoryQuery, compress: bool = False) -> AsyncIterator[bytes]:
+        lines = self._lines(query)
+        chunks = _gzip(lines) if compress else _buffered(lines)
+        async for chunk in chunks:
+            yield chunk
+
+    async def _lines(self, query: HistoryQuery) -> AsyncIterator[bytes]:
+        async for result in self.repository.iter_history(query, batch_size=self.batch_size):
+            yield export_line(result)
+
+
+def export_line(result: CodeGenerationResult) -> bytes:
+    record = {
+        "id": result.record_id,
+        "user_id": result.request.user_id,
+        "language": result.request.language.value,
+        "model": result.model,
+        "prompt": result.request.prompt,
+        "code": result.code,
+        "token_usage": result.token_usage,
+        "prompt_tokens": result.prompt_tokens,
+        "prompt_tokens_estimate": result.prompt_tokens_estimate,
+        "created_at": result.created_at.isoformat(),
+        "cursor": HistoryCursor(result.created_at, result.record_id).encode(),
+    }
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+async def _buffered(lines: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+    async for line in lines:
+        buffer += line
+        if len(buffer) >= CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _gzip(lines: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for chunk in _buffered(lines):
+        packed = compressor.compress(chunk)
+        if packed:
+            yield packed
+    yield compressor.flush()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Sequence
+
+from ...domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from ...domain.models.deadline import DeadlineExceeded
+from ...domain.services.admission import RateLimitExceeded
+from ...domain.services.safety import SafetyViolation
+from ...domain.services.token_policy import TokenLimitExceeded
+from .generate_code import GenerateCodeUseCase
+
+
+class BatchLimitExceeded(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class BatchItemOutcome:
+    index: int
+    result: CodeGenerationResult | None = None
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class GenerateBatchUseCase:
+    generate_code: GenerateCodeUseCase
+    concurrency: int
+    max_items: int | None = None
+
+    async def execute(self, requests: Sequence[CodeGenerationRequest]) -> list[BatchItemOutcome]:
+        if self.max_items is not None and len(requests) > self.max_items:
+            raise BatchLimitExceeded(
+                f"Batch of {len(requests)} items exceeds limit {self.max_items}"
+            )
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(index: int, request: CodeGenerationRequest) -> BatchItemOutcome:
+            async with semaphore:
+                try:
+                    result = await self.generate_code.generate(request)
+                except (
+                    SafetyViolation,
+                    TokenLimitExceeded,
+                    RateLimitExceeded,
+                    DeadlineExceeded,
+                    ValueError,
+                ) as exc:
+                    return BatchItemOutcome(index=index, error=str(exc))
+                except Exception as exc:
+                    # One item failing upstream must not fail the batch or drop the
+                    # results that were already generated (and paid for).
+                    return BatchItemOutcome(
+                        index=index, error=f"Generation failed: {type(exc).__name__}"
+                    )
+            return BatchItemOutcome(index=index, result=result)
+
+        outcomes = await asyncio.gather(
+            *(run(index, request) for index, request in enumerate(requests))
+        )
+        results = [outcome.result for outcome in outcomes if outcome.result is not None]
+        await self.generate_code.repository.save_many(results)
+        await self.generate_code.audit_saved(results)
+        return list(outcomes)
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
+from functools import partial
 from typing import Sequence
 
 from ...domain.models.code_generation import (
     CodeGenerationRequest,
     CodeGenerationResult,
+    IncompleteGeneration,
 )
-from ...domain.services.postprocessing import PostProcessor
-from ...domain.services.safety import SafetyOrchestrator
-from ...domain.services.token_policy import TokenPolicy
+from ...domain.models.deadline import Deadline, DeadlineExceeded
+from ...domain.services.admission import RateLimiter
+from ...domain.services.audit import AuditEvent, AuditSink, NullAuditSink
+from ...domain.services.coalescing import RequestCoalescer
+from ...domain.services.metrics import GenerationMetrics, NullMetrics, StageTimer
+from ...domain.services.plugin_pipeline import PluginPipeline
+from ...domain.services.postprocessing import DeltaProcessor, PostProcessor
+from ...domain.services.safety import SafetyOrchestrator, SafetyViolation
+from ...domain.services.token_policy import TokenLimitExceeded, TokenPolicy
 from ...domain.services.ports import CodeGenerationProvider, GenerationRepository
 
 
@@ -20,15 +31,192 @@ class GenerateCodeUseCase:
     safety: SafetyOrchestrator
     token_policy: TokenPolicy
     post_processors: Sequence[PostProcessor] = field(default_factory=tuple)
+    coalescer: RequestCoalescer | None = None
+    rate_limiter: RateLimiter | None = None
+    metrics: GenerationMetrics = field(default_factory=NullMetrics)
+    pipeline: PluginPipeline | None = None
+    audit: AuditSink = field(default_factory=NullAuditSink)
+
+    def __post_init__(self) -> None:
+        if self.pipeline is None:
+            self.pipeline = PluginPipeline(self.post_processors)
 
     async def execute(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        result = await self.generate(request)
+        with StageTimer(self.metrics, "save"):
+            await self.repository.save(result)
+        await self.audit_saved([result])
+        return result
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        """Run validation, the provider and post-processing without persisting.
+
+        With ``request.deadline`` set, the upstream stage is cancelled once the deadline
+        passes and DeadlineExceeded is raised.
+        """
+        estimate = await self._validate(request)
+        await self._admit(request)
+
+        result: CodeGenerationResult | None = None
+        upstream = partial(self._upstream, estimate=estimate)
+        try:
+            with StageTimer(self.metrics, "provider"):
+                async with _within(request.deadline, "generation"):
+                    if self.coalescer is not None:
+                        result = await self.coalescer.run(request, upstream)
+                    else:
+                        result = await upstream(request)
+        finally:
+            await self._settle(request, result)
+        result.prompt_tokens_estimate = estimate
+        return await self._post_process(result)
+
+    async def stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        """Validate eagerly, then return an iterator of code deltas ending with the result.
+
+        Deltas pass through plugins that implement ``open_stream``; the final result
+        always goes through the full ``run`` chain and is persisted before it is yielded.
+        """
+        estimate = await self._validate(request)
+        events = self._stream(request, estimate)
+        # Admission runs inside the generator so the reservation is settled by its
+        # ``finally`` even if the caller drops it unread; priming it here still raises
+        # RateLimitExceeded before a response is started.
+        await anext(events)
+        return events
+
+    async def audit_saved(self, results: Sequence[CodeGenerationResult]) -> None:
+        """Record a generation event for each result just handed to the repository."""
+        if getattr(self.repository, "audits_saves", False):
+            # It records them itself once the rows, and so the record ids, exist.
+            return
+        for result in results:
+            await self.audit.record(AuditEvent.generation(result))
+
+    async def validate(self, request: CodeGenerationRequest) -> None:
+        """Run the safety and token checks alone, e.g. before queueing a job."""
+        await self._validate(request)
+
+    async def _validate(self, request: CodeGenerationRequest) -> int | None:
         request.ensure_safe()
-        self.token_policy.ensure_within_limit(request.max_tokens)
-        self.safety.validate(request.prompt)
+        if request.deadline is not None:
+            request.deadline.check("validation")
+        try:
+            with StageTimer(self.metrics, "token_policy"):
+                estimate = self.token_policy.admit(request)
+            with StageTimer(self.metrics, "safety"):
+                self.safety.validate(request.prompt)
+        except TokenLimitExceeded as exc:
+            await self.audit.record(AuditEvent.rejection("token_limit_rejected", request, exc))
+            raise
+        except SafetyViolation as exc:
+            await self.audit.record(AuditEvent.rejection("safety_rejected", request, exc))
+            raise
+        return estimate
 
-        result = await self.provider.generate(request)
-        for plugin in self.post_processors:
-            result = await plugin.run(result)
+    async def _admit(self, request: CodeGenerationRequest) -> None:
+        if self.rate_limiter is not None:
+            with StageTimer(self.metrics, "admission"):
+                await self.rate_limiter.admit(request)
 
-        await self.repository.save(result)
+    async def _upstream(
+        self, request: CodeGenerationRequest, estimate: int | None
+    ) -> CodeGenerationResult:
+        """One provider call. Its tokens are recorded here, so a result shared by
+        coalesced callers is counted once, under the request that made the call."""
+        result = await self.provider.generate(request)
+        if not result.cached:
+            result.prompt_tokens_estimate = estimate
+            self.metrics.record_tokens(result)
         return result
+
+    async def _settle(
+        self, request: CodeGenerationRequest, result: CodeGenerationResult | None
+    ) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.settle(request, result)
+
+    async def _post_process(self, result: CodeGenerationResult) -> CodeGenerationResult:
+        return await self.pipeline.run(result, self.metrics)  # type: ignore[union-attr]
+
+    async def _stream(
+        self, request: CodeGenerationRequest, estimate: int | None
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        await self._admit(request)
+        processors: list[DeltaProcessor] = [
+            plugin.open_stream()  # type: ignore[attr-defined]
+            for plugin in self.post_processors
+            if hasattr(plugin, "open_stream")
+        ]
+        result: CodeGenerationResult | None = None
+        try:
+            yield ""  # consumed by stream() when it primes the generator
+            # Includes time spent waiting on the client, so it is kept apart from "provider".
+            with StageTimer(self.metrics, "stream"):
+                async for event in self._provider_stream(request):
+                    if request.deadline is not None:
+                        request.deadline.check("the stream completed")
+                    if isinstance(event, CodeGenerationResult):
+                        result = event
+                        break
+                    text = _feed(processors, event)
+                    if text:
+                        yield text
+        finally:
+            await self._settle(request, result)
+
+        tail = "".join(
+            _feed(processors[index + 1 :], processor.finish())
+            for index, processor in enumerate(processors)
+        )
+        if tail:
+            yield tail
+        if result is None:
+            raise IncompleteGeneration("Provider stream ended without a result")
+
+        result.prompt_tokens_estimate = estimate
+        if not result.cached:
+            self.metrics.record_tokens(result)
+        result = await self._post_process(result)
+        with StageTimer(self.metrics, "save"):
+            await self.repository.save(result)
+        await self.audit_saved([result])
+        yield result
+
+    async def _provider_stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        stream = getattr(self.provider, "stream", None)
+        if stream is not None:
+            async for event in stream(request):
+                yield event
+            return
+        result = await self.provider.generate(request)
+        yield result.code
+        yield result
+
+
+def _feed(processors: Sequence[DeltaProcessor], text: str) -> str:
+    for processor in processors:
+        if not text:
+            break
+        text = processor.feed(text)
+    return text
+
+
+@asynccontextmanager
+async def _within(deadline: Deadline | None, stage: str) -> AsyncIterator[None]:
+    if deadline is None:
+        yield
+        return
+    deadline.check(stage)
+    scope = asyncio.timeout(deadline.remaining())
+    try:
+        async with scope:
+            yield
+    except TimeoutError as exc:
+        if not scope.expired():
+            raise
+        raise DeadlineExceeded(f"Request deadline exceeded during {stage}") from exc
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from ...domain.models.code_generation import CodeGenerationRequest
+from ...domain.models.deadline import DeadlineExceeded
+from ...domain.models.job import GenerationJob, JobNotFound, JobQueueFull
+from ...domain.services.admission import RateLimitExceeded
+from ...domain.services.ports import JobRepository
+from ...domain.services.safety import SafetyViolation
+from ...domain.services.token_policy import TokenLimitExceeded
+from .generate_code import GenerateCodeUseCase
+
+
+@dataclass(slots=True)
+class JobStats:
+    submitted: int = 0
+    resumed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    released: int = 0
+
+
+class GenerationJobRunner:
+    """In-process worker pool behind ``POST /jobs``.
+
+    Submitting validates the request, persists the job as queued and hands its id to
+    ``workers`` tasks, which claim it and run ``GenerateCodeUseCase.execute``. Stopping
+    puts in-flight jobs back in the queue; starting picks up every queued job, plus
+    running ones older than ``stale_after`` seconds whose worker died without that.
+    """
+
+    def __init__(
+        self,
+        use_case: GenerateCodeUseCase,
+        repository: JobRepository,
+        workers: int = 4,
+        max_pending: int = 1000,
+        stale_after: float = 900.0,
+        rate_limit_retries: int = 5,
+        max_wait: float = 30.0,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self._use_case = use_case
+        self._repository = repository
+        self._workers = workers
+        self._max_pending = max_pending
+        self._stale_after = stale_after
+        self._rate_limit_retries = rate_limit_retries
+        self._max_wait = max_wait
+        self._poll_interval = poll_interval
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._done: dict[str, asyncio.Event] = {}
+        self._watchers: Counter[str] = Counter()
+        self.stats = JobStats()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._resume()))
+        self._tasks.extend(asyncio.create_task(self._work()) for _ in range(self._workers))
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they were running are released back to the queue."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def submit(
+        self, request: CodeGenerationRequest, timeout_ms: int | None = None
+    ) -> GenerationJob:
+        """Queue a generation; safety and token-limit rejections are raised right away."""
+        if self._queue.qsize() >= self._max_pending:
+            raise JobQueueFull(f"{self._max_pending} jobs are already waiting")
+        await self._use_case.validate(request)
+        job = GenerationJob.new(request, timeout_ms)
+        await self._repository.add(job)
+        self._queue.put_nowait(job.job_id)
+        self.stats.submitted += 1
+        return job
+
+    async def get(self, job_id: str) -> GenerationJob:
+        job = await self._repository.get(job_id)
+        if job is None:
+            raise JobNotFound(f"Job {job_id} not found")
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> GenerationJob:
+        """Long-poll: return once the job has finished or ``timeout`` seconds (at most
+        ``max_wait``) have passed.
+
+        Jobs run by this process wake the caller immediately; otherwise the job is
+        re-read every ``poll_interval`` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(timeout, self._max_wait)
+        done = self._done.setdefault(job_id, asyncio.Event())
+        self._watchers[job_id] += 1
+        try:
+            while True:
+                job = await self.get(job_id)
+                remaining = deadline - loop.time()
+                if job.finished or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(done.wait(), min(remaining, self._poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._watchers[job_id] -= 1
+            if self._watchers[job_id] <= 0:
+                del self._watchers[job_id]
+                self._done.pop(job_id, None)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "pending": self._queue.qsize(),
+            "submitted": self.stats.submitted,
+            "resumed": self.stats.resumed,
+            "succeeded": self.stats.succeeded,
+            "failed": self.stats.failed,
+            "released": self.stats.released,
+        }
+
+    async def _resume(self) -> None:
+        started_before = datetime.now(timezone.utc) - timedelta(seconds=self._stale_after)
+        for job_id in await self._repository.resumable(started_before):
+            self._queue.put_nowait(job_id)
+            self.stats.resumed += 1
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # A store error leaves the job queued or running in the table; it is
+                # picked up again on the next start instead of killing this worker.
+                continue
+
+    async def _process(self, job_id: str) -> None:
+        job = await self._repository.claim(job_id)
+        if job is None:
+            return  # finished, or claimed by another worker or process
+        try:
+            await self._run(job)
+        except asyncio.CancelledError:
+            await self._repository.release(job.job_id)
+            self.stats.released += 1
+            raise
+        await self._repository.finish(job)
+        if job.status == "succeeded":
+            self.stats.succeeded += 1
+        else:
+            self.stats.failed += 1
+        done = self._done.get(job.job_id)
+        if done is not None:
+            done.set()
+
+    async def _run(self, job: GenerationJob) -> None:
+        request = job.to_request()
+        retries = self._rate_limit_retries
+        while True:
+            try:
+                result = await self._use_case.execute(request)
+            except RateLimitExceeded as exc:
+                if retries <= 0:
+                    job.fail(str(exc))
+                    return
+                retries -= 1
+                await asyncio.sleep(exc.retry_after)
+                continue
+            except (SafetyViolation, TokenLimitExceeded, DeadlineExceeded, ValueError) as exc:
+                job.fail(str(exc))
+                return
+            except Exception as exc:
+                job.fail(f"Generation failed: {type(exc).__name__}")
+                return
+            job.succeed(result)
+            return
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
+from ...domain.models.history import HistoryPage, HistoryQuery
 from ...domain.services.ports import GenerationRepository
 
 
 @dataclass(slots=True)
 class GetHistoryUseCase:
     repository: GenerationRepository
+    default_limit: int = 20
+    max_limit: int = 200
 
-    async def execute(self, limit: int = 20):
-        return await self.repository.list_recent(limit=limit)
+    async def execute(self, query: HistoryQuery | None = None) -> HistoryPage:
+        query = query or HistoryQuery()
+        limit = min(query.limit or self.default_limit, self.max_limit)
+        return await self.repository.list_history(replace(query, limit=limit))
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+
+from ...domain.models.usage import BUCKET_WIDTHS, UsageBucket, UsageQuery, bucket_start
+from ...domain.services.ports import UsageRepository
+
+
+class UsageRangeTooLarge(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class GetUsageUseCase:
+    """Bounds a usage query to ``max_buckets`` buckets, ending now unless told otherwise."""
+
+    repository: UsageRepository
+    max_buckets: int = 744
+
+    async def execute(self, query: UsageQuery) -> list[UsageBucket]:
+        width = BUCKET_WIDTHS[query.granularity]
+        until = _utc(query.until) or (
+            bucket_start(datetime.now(timezone.utc), query.granularity) + width
+        )
+        since = _utc(query.since) or until - width * self.max_buckets
+        if (until - bucket_start(since, query.granularity)) / width > self.max_buckets:
+            raise UsageRangeTooLarge(
+                f"Range spans more than {self.max_buckets} {query.granularity} buckets"
+            )
+        return await self.repository.usage(replace(query, since=since, until=until))
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+from ...domain.models.search import SearchPage, SearchQuery
+from ...domain.services.ports import GenerationRepository
+
+
+@dataclass(slots=True)
+class SearchHistoryUseCase:
+    repository: GenerationRepository
+    default_limit: int = 20
+    max_limit: int = 200
+
+    async def execute(self, query: SearchQuery) -> SearchPage:
+        limit = min(query.limit or self.default_limit, self.max_limit)
+        return await self.repository.search(replace(query, limit=limit))
@@ -1,21 +1,92 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import Literal
+from typing import Literal, Optional
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class UpstreamBackendSettings(BaseModel):
+    """An additional model/endpoint routed alongside ``openai_model``."""
+
+    model: str
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    cost: float = Field(default=1.0, gt=0)
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_prefix="CODEGEN_", case_sensitive=False)
 
     environment: Literal["dev", "prod"] = Field(default="dev")
     openai_api_key: str = Field(alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4.1-mini")
+    openai_base_url: Optional[str] = Field(default=None)
+    openai_http2: bool = Field(default=True)
+    openai_max_connections: int = Field(default=100, gt=0)
+    openai_max_keepalive_connections: int = Field(default=20, ge=0)
+    openai_keepalive_expiry_seconds: float = Field(default=30.0, gt=0)
+    openai_timeout_seconds: float = Field(default=120.0, gt=0)
+    openai_connect_timeout_seconds: float = Field(default=5.0, gt=0)
+    openai_preload_sdk: bool = Field(default=True)
     database_url: str = Field(default="sqlite+aiosqlite:///./codegen.db")
     max_tokens_limit: int = Field(default=2048, gt=0)
+    openai_max_retries: int = Field(default=2, ge=0)
+    retry_base_delay_ms: int = Field(default=200, gt=0)
+    retry_max_delay_ms: int = Field(default=5000, gt=0)
+    retry_min_attempt_ms: int = Field(default=500, ge=0)
+    openai_model_cost: float = Field(default=1.0, gt=0)
+    routing_backends: list[UpstreamBackendSettings] = Field(default_factory=list)
+    routing_hedge_percentile: Optional[float] = Field(default=0.95, gt=0, le=1)
+    routing_min_samples: int = Field(default=20, gt=0)
+    routing_load_threshold: Optional[int] = Field(default=None, gt=0)
+    circuit_breaker_failure_threshold: int = Field(default=5, gt=0)
+    circuit_breaker_reset_seconds: float = Field(default=30.0, gt=0)
+    openai_context_window: Optional[int] = Field(default=None, gt=0)
+    token_overflow: Literal["reject", "trim"] = Field(default="reject")
+    min_output_tokens: int = Field(default=16, gt=0)
+    rate_limit_enabled: bool = Field(default=True)
+    rate_limit_requests_per_minute: float = Field(default=60, gt=0)
+    rate_limit_tokens_per_minute: float = Field(default=60_000, gt=0)
+    upstream_max_concurrency: int = Field(default=32, gt=0)
+    scheduler_max_queue_wait_seconds: float = Field(default=10.0, gt=0)
+    scheduler_weights: dict[str, float] = Field(default_factory=dict)
+    scheduler_priorities: dict[str, int] = Field(default_factory=dict)
+    safety_rules_path: Optional[str] = Field(default=None)
+    plugin_paths: list[str] = Field(default_factory=list)
+    plugin_process_workers: int = Field(default=2, gt=0)
+    metrics_enabled: bool = Field(default=True)
+    metrics_track_users: bool = Field(default=True)
+    blob_compression: Literal["zlib", "zstd"] = Field(default="zlib")
+    blob_compress_min_bytes: int = Field(default=256, ge=0)
     history_limit: int = Field(default=20, gt=0)
+    history_max_limit: int = Field(default=200, gt=0)
+    history_export_batch_size: int = Field(default=500, gt=0)
+    history_cache_enabled: bool = Field(default=True)
+    history_cache_max_entries: int = Field(default=256, gt=0)
+    history_cache_revalidate_seconds: Optional[float] = Field(default=5.0, gt=0)
+    usage_max_buckets: int = Field(default=744, gt=0)
+    cache_enabled: bool = Field(default=True)
+    cache_max_entries: int = Field(default=1024, gt=0)
+    cache_ttl_seconds: int = Field(default=3600, gt=0)
+    cache_db_enabled: bool = Field(default=True)
+    write_behind_enabled: bool = Field(default=False)
+    write_behind_queue_size: int = Field(default=1000, gt=0)
+    write_behind_batch_size: int = Field(default=100, gt=0)
+    write_behind_flush_interval_ms: int = Field(default=50, gt=0)
+    audit_enabled: bool = Field(default=True)
+    audit_buffer_size: int = Field(default=10_000, gt=0)
+    audit_batch_size: int = Field(default=200, gt=0)
+    audit_flush_interval_ms: int = Field(default=500, gt=0)
+    audit_overflow: Literal["drop_oldest", "block"] = Field(default="drop_oldest")
+    batch_max_items: int = Field(default=256, gt=0)
+    batch_concurrency: int = Field(default=8, gt=0)
+    jobs_enabled: bool = Field(default=True)
+    jobs_workers: int = Field(default=4, gt=0)
+    jobs_max_pending: int = Field(default=1000, gt=0)
+    jobs_stale_after_seconds: float = Field(default=900.0, gt=0)
+    jobs_max_wait_seconds: float = Field(default=30.0, gt=0)
 
 
 @lru_cache
@@ -1,18 +1,26 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Optional
 
+from .deadline import Deadline
 from .language import ProgrammingLanguage
 
 
+class IncompleteGeneration(Exception):
+    """A streamed generation stopped before the provider reported it complete."""
+
+
 @dataclass(slots=True)
 class CodeGenerationRequest:
     prompt: str
     language: ProgrammingLanguage
     max_tokens: int
     user_id: Optional[str] = None
+    deadline: Optional[Deadline] = None
+    client_address: Optional[str] = None
 
     def ensure_safe(self) -> None:
         if not self.prompt.strip():
@@ -20,6 +28,20 @@ class CodeGenerationRequest:
         if self.max_tokens <= 0:
             raise ValueError("max_tokens must be positive")
 
+    def fingerprint(self, model: str) -> str:
+        normalized = " ".join(self.prompt.split())
+        raw = "\x1f".join((normalized, self.language.value, str(self.max_tokens), model))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class PluginRun:
+    """How one post-processor fared on one result; ``status`` is ``ok`` or ``timeout``."""
+
+    name: str
+    status: str
+    duration: float
+
 
 @dataclass(slots=True)
 class CodeGenerationResult:
@@ -29,6 +51,10 @@ class CodeGenerationResult:
     token_usage: int
     created_at: datetime
     record_id: int | None = None
+    cached: bool = False
+    prompt_tokens: int | None = None
+    prompt_tokens_estimate: int | None = None
+    plugin_runs: list[PluginRun] = field(default_factory=list)
 
     @classmethod
     def new(
@@ -39,6 +65,8 @@ class CodeGenerationResult:
         token_usage: int,
         created_at: Optional[datetime] = None,
         record_id: int | None = None,
+        cached: bool = False,
+        prompt_tokens: int | None = None,
     ) -> "CodeGenerationResult":
         timestamp = created_at or datetime.now(timezone.utc)
         return cls(
@@ -48,4 +76,6 @@ class CodeGenerationResult:
             token_usage=token_usage,
             created_at=timestamp,
             record_id=record_id,
+            cached=cached,
+            prompt_tokens=prompt_tokens,
         )
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's deadline passed before the work could finish."""
+
+
+@dataclass(frozen=True, slots=True)
+class Deadline:
+    """Absolute point on the ``time.monotonic`` clock after which the caller has given up."""
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> Deadline:
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        if self.expired:
+            raise DeadlineExceeded(f"Request deadline exceeded before {stage}")
+
+    def cap(self, timeout: float | None) -> float:
+        """Shorten ``timeout`` so it ends no later than the deadline."""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .language import ProgrammingLanguage
+
+
+@dataclass(slots=True, frozen=True)
+class HistoryCursor:
+    """Keyset position in the (created_at, id) descending history order."""
+
+    created_at: datetime
+    record_id: int
+
+    def encode(self) -> str:
+        raw = f"{self.created_at.isoformat()}|{self.record_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, token: str) -> "HistoryCursor":
+        try:
+            raw = base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+            created_at, record_id = raw.rsplit("|", 1)
+            return cls(datetime.fromisoformat(created_at), int(record_id))
+        except (ValueError, UnicodeError, binascii.Error) as exc:
+            raise ValueError(f"Invalid history cursor: {token}") from exc
+
+
+@dataclass(slots=True)
+class HistoryQuery:
+    limit: int | None = None
+    cursor: HistoryCursor | None = None
+    user_id: str | None = None
+    language: ProgrammingLanguage | None = None
+    model: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class HistoryEntry:
+    record_id: int
+    user_id: str | None
+    language: ProgrammingLanguage
+    model: str
+    token_usage: int
+    created_at: datetime
+
+
+@dataclass(slots=True)
+class HistoryPage:
+    items: list[HistoryEntry] = field(default_factory=list)
+    next_cursor: HistoryCursor | None = None
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from .code_generation import CodeGenerationRequest, CodeGenerationResult
+from .deadline import Deadline
+from .language import ProgrammingLanguage
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+FINISHED_STATUSES: frozenset[str] = frozenset({"succeeded", "failed"})
+
+
+class JobNotFound(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class GenerationJob:
+    """A generation accepted by ``POST /jobs`` and run later by the job workers.
+
+    ``timeout_ms`` is a budget for the run itself; it starts when a worker picks the
+    job up, not when it was submitted.
+    """
+
+    job_id: str
+    prompt: str
+    language: ProgrammingLanguage
+    max_tokens: int
+    user_id: Optional[str] = None
+    client_address: Optional[str] = None
+    timeout_ms: Optional[int] = None
+    status: JobStatus = "queued"
+    attempts: int = 0
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    record_id: Optional[int] = None
+    code: Optional[str] = None
+    model: Optional[str] = None
+    token_usage: Optional[int] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def new(cls, request: CodeGenerationRequest, timeout_ms: int | None = None) -> GenerationJob:
+        return cls(
+            job_id=uuid.uuid4().hex,
+            prompt=request.prompt,
+            language=request.language,
+            max_tokens=request.max_tokens,
+            user_id=request.user_id,
+            client_address=request.client_address,
+            timeout_ms=timeout_ms,
+        )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_request(self) -> CodeGenerationRequest:
+        return CodeGenerationRequest(
+            prompt=self.prompt,
+            language=self.language,
+            max_tokens=self.max_tokens,
+            user_id=self.user_id,
+            deadline=Deadline.after(self.timeout_ms / 1000) if self.timeout_ms else None,
+            client_address=self.client_address,
+        )
+
+    def succeed(self, result: CodeGenerationResult) -> None:
+        self.status = "succeeded"
+        self.finished_at = datetime.now(timezone.utc)
+        self.record_id = result.record_id
+        self.code = result.code
+        self.model = result.model
+        self.token_usage = result.token_usage
+
+    def fail(self, error: str) -> None:
+        self.status = "failed"
+        self.finished_at = datetime.now(timezone.utc)
+        self.error = error
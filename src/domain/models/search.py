@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .language import ProgrammingLanguage
+
+
+class SearchUnavailable(Exception):
+    """The configured database has no full-text index this service knows how to use."""
+
+
+@dataclass(slots=True, frozen=True)
+class SearchCursor:
+    """Keyset position in the (score, id) descending relevance order."""
+
+    score: float
+    record_id: int
+
+    def encode(self) -> str:
+        raw = f"{self.score.hex()}|{self.record_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, token: str) -> "SearchCursor":
+        try:
+            raw = base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+            score, record_id = raw.rsplit("|", 1)
+            return cls(float.fromhex(score), int(record_id))
+        except (ValueError, UnicodeError, binascii.Error) as exc:
+            raise ValueError(f"Invalid search cursor: {token}") from exc
+
+
+@dataclass(slots=True)
+class SearchQuery:
+    text: str
+    limit: int | None = None
+    cursor: SearchCursor | None = None
+    user_id: str | None = None
+    language: ProgrammingLanguage | None = None
+    model: str | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class SearchHit:
+    record_id: int
+    user_id: str | None
+    language: ProgrammingLanguage
+    model: str
+    token_usage: int
+    created_at: datetime
+    prompt: str
+    code: str
+    score: float
+
+
+@dataclass(slots=True)
+class SearchPage:
+    items: list[SearchHit] = field(default_factory=list)
+    next_cursor: SearchCursor | None = None
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from .language import ProgrammingLanguage
+
+Granularity = Literal["hour", "day"]
+UsageDimension = Literal["user", "language", "model"]
+
+BUCKET_WIDTHS: dict[str, timedelta] = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def bucket_start(moment: datetime, granularity: Granularity) -> datetime:
+    """Start of the UTC hour/day containing ``moment``; naive values are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    else:
+        moment = moment.astimezone(timezone.utc)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+@dataclass(slots=True)
+class UsageQuery:
+    """Usage aggregated per bucket; dimensions not in ``group_by`` are summed together.
+
+    ``since`` is rounded down to its bucket, ``until`` is exclusive.
+    """
+
+    granularity: Granularity = "day"
+    since: datetime | None = None
+    until: datetime | None = None
+    user_id: str | None = None
+    language: ProgrammingLanguage | None = None
+    model: str | None = None
+    group_by: tuple[UsageDimension, ...] = ()
+
+
+@dataclass(slots=True, frozen=True)
+class UsageBucket:
+    bucket_start: datetime
+    requests: int
+    token_usage: int
+    prompt_tokens: int
+    user_id: str | None = None
+    language: ProgrammingLanguage | None = None
+    model: str | None = None
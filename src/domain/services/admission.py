@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Protocol
+
+from ..models.code_generation import CodeGenerationRequest, CodeGenerationResult
+
+ANONYMOUS_KEY = "anonymous"
+
+
+def rate_limit_key(request: CodeGenerationRequest) -> str:
+    """``user_id``, else one bucket per client address so anonymous callers do not share."""
+    if request.user_id:
+        return request.user_id
+    if request.client_address:
+        return f"{ANONYMOUS_KEY}:{request.client_address}"
+    return ANONYMOUS_KEY
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller must back off; ``retry_after`` is in seconds."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamBusy(RateLimitExceeded):
+    """Raised when no upstream capacity is available for the request."""
+
+
+class RateLimitBackend(Protocol):
+    """Token-bucket state store. Shared backends let several workers enforce one quota."""
+
+    async def acquire(self, key: str, requests: float, tokens: float) -> float:
+        """Take ``requests`` and ``tokens`` from the key's buckets.
+
+        Returns 0 when admitted; otherwise nothing is taken and the number of seconds
+        until the buckets could cover the cost is returned.
+        """
+        ...
+
+    async def refund(self, key: str, tokens: float) -> None:
+        """Give back reserved tokens (negative values charge extra)."""
+        ...
+
+
+@dataclass(slots=True)
+class RateLimiter:
+    """Per-user admission measured in requests and tokens.
+
+    ``max_tokens`` is reserved up front and settled against the actual
+    ``token_usage`` once the result is known.
+    """
+
+    backend: RateLimitBackend
+
+    async def admit(self, request: CodeGenerationRequest) -> None:
+        key = rate_limit_key(request)
+        retry_after = await self.backend.acquire(key, 1, request.max_tokens)
+        if retry_after > 0:
+            raise RateLimitExceeded(f"Rate limit exceeded for {key}", retry_after)
+
+    async def settle(
+        self, request: CodeGenerationRequest, result: CodeGenerationResult | None
+    ) -> None:
+        used = 0 if result is None or result.cached else result.token_usage
+        if used != request.max_tokens:
+            await self.backend.refund(rate_limit_key(request), request.max_tokens - used)
+
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Protocol
+
+from ..models.code_generation import CodeGenerationRequest, CodeGenerationResult
+
+
+@dataclass(slots=True)
+class AuditEvent:
+    event: str
+    payload: dict[str, Any]
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @classmethod
+    def generation(cls, result: CodeGenerationResult) -> AuditEvent:
+        return cls(
+            "generation",
+            {
+                "record_id": result.record_id,
+                "user_id": result.request.user_id,
+                "language": result.request.language.value,
+                "model": result.model,
+                "token_usage": result.token_usage,
+                "cached": result.cached,
+            },
+        )
+
+    @classmethod
+    def rejection(
+        cls, event: str, request: CodeGenerationRequest, error: BaseException
+    ) -> AuditEvent:
+        return cls(
+            event,
+            {
+                "user_id": request.user_id,
+                "language": request.language.value,
+                "max_tokens": request.max_tokens,
+                "prompt_chars": len(request.prompt),
+                "reason": str(error),
+            },
+        )
+
+
+class AuditSink(Protocol):
+    """Where audit events go; ``record`` must not wait on the database."""
+
+    async def record(self, event: AuditEvent) -> None:
+        ...
+
+
+class NullAuditSink:
+    """Default AuditSink that discards everything."""
+
+    async def record(self, event: AuditEvent) -> None:
+        return None
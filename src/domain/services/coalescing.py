@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, replace
+
+from ..models.code_generation import CodeGenerationRequest, CodeGenerationResult
+
+
+@dataclass(slots=True)
+class CoalescingStats:
+    upstream_calls: int = 0
+    coalesced: int = 0
+
+
+@dataclass(slots=True)
+class _InFlight:
+    task: asyncio.Task[CodeGenerationResult]
+    waiters: int = 0
+
+
+class RequestCoalescer:
+    """Single-flight table: identical concurrent requests share one upstream call.
+
+    The upstream call runs in its own task so that one caller going away does not
+    fail the others; it is only cancelled once every waiter has left. Each caller
+    receives its own copy of the result bound to its own request.
+    """
+
+    def __init__(self, namespace: str = "") -> None:
+        self._namespace = namespace
+        self._inflight: dict[str, _InFlight] = {}
+        self.stats = CoalescingStats()
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def run(
+        self,
+        request: CodeGenerationRequest,
+        call: Callable[[CodeGenerationRequest], Awaitable[CodeGenerationResult]],
+    ) -> CodeGenerationResult:
+        key = request.fingerprint(self._namespace)
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(call(request))
+            entry = _InFlight(task)
+            self._inflight[key] = entry
+            task.add_done_callback(lambda _: self._forget(key, entry))
+            self.stats.upstream_calls += 1
+        else:
+            self.stats.coalesced += 1
+
+        entry.waiters += 1
+        try:
+            shared = await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            if not entry.task.done() and entry.waiters == 1:
+                entry.task.cancel()
+            raise
+        finally:
+            entry.waiters -= 1
+        return replace(shared, request=request, record_id=None)
+
+    def _forget(self, key: str, entry: _InFlight) -> None:
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "upstream_calls": self.stats.upstream_calls,
+            "coalesced": self.stats.coalesced,
+            "inflight": self.inflight,
+        }
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from time import perf_counter
+from types import TracebackType
+from typing import Protocol
+
+from ..models.code_generation import CodeGenerationResult
+
+
+class GenerationMetrics(Protocol):
+    """Hot-path instrumentation port; implementations must be cheap and non-blocking."""
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        ...
+
+    def observe_plugin(self, plugin: str, seconds: float) -> None:
+        ...
+
+    def record_tokens(self, result: CodeGenerationResult) -> None:
+        ...
+
+    def record_error(self, stage: str, error: BaseException) -> None:
+        ...
+
+
+class NullMetrics:
+    """Default GenerationMetrics that records nothing."""
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        return None
+
+    def observe_plugin(self, plugin: str, seconds: float) -> None:
+        return None
+
+    def record_tokens(self, result: CodeGenerationResult) -> None:
+        return None
+
+    def record_error(self, stage: str, error: BaseException) -> None:
+        return None
+
+
+class StageTimer:
+    """``with StageTimer(metrics, "save"):`` observes the block's duration and any error."""
+
+    __slots__ = ("_metrics", "_stage", "_started")
+
+    def __init__(self, metrics: GenerationMetrics, stage: str) -> None:
+        self._metrics = metrics
+        self._stage = stage
+        self._started = 0.0
+
+    def __enter__(self) -> StageTimer:
+        self._started = perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._metrics.observe_stage(self._stage, perf_counter() - self._started)
+        if exc is not None:
+            self._metrics.record_error(self._stage, exc)
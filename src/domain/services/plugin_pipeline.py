@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass, replace
+from time import perf_counter
+from typing import Union
+
+from ..models.code_generation import CodeGenerationResult, PluginRun
+from .metrics import GenerationMetrics, NullMetrics
+from .postprocessing import (
+    BlockingPostProcessor,
+    ExecutionKind,
+    PostProcessor,
+    TimeoutPolicy,
+)
+
+Plugin = Union[PostProcessor, BlockingPostProcessor]
+
+
+class PluginTimeout(TimeoutError):
+    """A plugin with ``on_timeout = "fail"`` exceeded its timeout."""
+
+
+@dataclass(frozen=True, slots=True)
+class PluginSpec:
+    plugin: Plugin
+    name: str
+    execution: ExecutionKind
+    depends_on: tuple[str, ...]
+    timeout: float | None
+    on_timeout: TimeoutPolicy
+    mutates: bool
+
+    @classmethod
+    def of(cls, plugin: Plugin) -> PluginSpec:
+        execution = getattr(plugin, "execution", "async")
+        if execution not in ("async", "io", "cpu"):
+            raise ValueError(f"Plugin {plugin.name} has unknown execution kind {execution!r}")
+        return cls(
+            plugin=plugin,
+            name=plugin.name,
+            execution=execution,
+            depends_on=tuple(getattr(plugin, "depends_on", ())),
+            timeout=getattr(plugin, "timeout", None),
+            on_timeout=getattr(plugin, "on_timeout", "fail"),
+            mutates=getattr(plugin, "mutates", True),
+        )
+
+
+class PluginPipeline:
+    """Runs post-processors as a dependency graph.
+
+    A plugin starts as soon as the plugins it ``depends_on`` have finished, so
+    independent plugins overlap. ``io`` plugins run in threads and ``cpu`` plugins in
+    ``process_pool`` (threads if none is given), keeping the event loop free.
+
+    Code-modifying plugins must be totally ordered. Those without an explicit
+    ``depends_on`` follow the previous modifying plugin in list order, which keeps the
+    original sequential behaviour. Every plugin sees the code produced by its latest
+    modifying ancestor; the pipeline returns the code of the last one.
+    """
+
+    def __init__(self, plugins: Sequence[Plugin], process_pool: Executor | None = None) -> None:
+        self._process_pool = process_pool
+        self._specs = [PluginSpec.of(plugin) for plugin in plugins]
+        self._deps = _effective_dependencies(self._specs)
+        self._order = _topological_order(self._specs, self._deps)
+        _check_writers_ordered(self._order, self._deps)
+        # Plain async plugins without dependencies or timeouts form the implicit chain and
+        # are simply awaited in order, without the per-plugin task and copy.
+        self._sequential = all(
+            spec.execution == "async"
+            and spec.timeout is None
+            and spec.mutates
+            and not spec.depends_on
+            for spec in self._specs
+        )
+
+    @property
+    def plugins(self) -> list[Plugin]:
+        return [spec.plugin for spec in self._specs]
+
+    @property
+    def needs_process_pool(self) -> bool:
+        return any(spec.execution == "cpu" for spec in self._specs)
+
+    async def run(
+        self, result: CodeGenerationResult, metrics: GenerationMetrics | None = None
+    ) -> CodeGenerationResult:
+        metrics = metrics or NullMetrics()
+        if not self._specs:
+            return result
+        if self._sequential:
+            return await self._run_chain(result, metrics)
+        return await self._run_graph(result, metrics)
+
+    async def _run_chain(
+        self, result: CodeGenerationResult, metrics: GenerationMetrics
+    ) -> CodeGenerationResult:
+        runs: list[PluginRun] = []
+        for spec in self._order:
+            started = perf_counter()
+            try:
+                result = await spec.plugin.run(result)  # type: ignore[union-attr]
+            except Exception as exc:
+                metrics.record_error(f"plugin:{spec.name}", exc)
+                raise
+            runs.append(self._finished(spec, "ok", started, metrics))
+        result.plugin_runs = runs
+        return result
+
+    async def _run_graph(
+        self, result: CodeGenerationResult, metrics: GenerationMetrics
+    ) -> CodeGenerationResult:
+        # Each plugin's output state is (index of the latest modifying plugin, result).
+        initial = (-1, result)
+        tasks: dict[str, asyncio.Task[tuple[int, CodeGenerationResult]]] = {}
+        runs: dict[str, PluginRun] = {}
+
+        async def run_one(index: int, spec: PluginSpec) -> tuple[int, CodeGenerationResult]:
+            states = [await tasks[name] for name in self._deps[spec.name]]
+            source = max(states, key=lambda state: state[0], default=initial)
+            started = perf_counter()
+            try:
+                output = await self._invoke(spec, replace(source[1]))
+            except asyncio.TimeoutError as exc:
+                metrics.record_error(f"plugin:{spec.name}", exc)
+                if spec.on_timeout == "fail":
+                    raise PluginTimeout(
+                        f"Plugin {spec.name} timed out after {spec.timeout}s"
+                    ) from exc
+                runs[spec.name] = self._finished(spec, "timeout", started, metrics)
+                return source
+            except Exception as exc:
+                metrics.record_error(f"plugin:{spec.name}", exc)
+                raise
+            runs[spec.name] = self._finished(spec, "ok", started, metrics)
+            return (index, output) if spec.mutates else source
+
+        for index, spec in enumerate(self._order):
+            tasks[spec.name] = asyncio.ensure_future(run_one(index, spec))
+        try:
+            states = await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        final = max(states, key=lambda state: state[0], default=initial)[1]
+        final.plugin_runs = [runs[spec.name] for spec in self._order if spec.name in runs]
+        return final
+
+    async def _invoke(self, spec: PluginSpec, result: CodeGenerationResult) -> CodeGenerationResult:
+        if spec.execution == "async":
+            call = spec.plugin.run(result)  # type: ignore[union-attr]
+        else:
+            loop = asyncio.get_running_loop()
+            executor = self._process_pool if spec.execution == "cpu" else None
+            call = loop.run_in_executor(
+                executor,
+                spec.plugin.transform,  # type: ignore[union-attr]
+                result.code,
+                result.request.language.value,
+            )
+        if spec.timeout is not None:
+            # For io/cpu plugins this only stops waiting: the thread or worker process
+            # cannot be interrupted, runs the transform to completion and keeps its
+            # executor slot until then.
+            output = await asyncio.wait_for(call, spec.timeout)
+        else:
+            output = await call
+        if isinstance(output, str):
+            result.code = output
+            return result
+        return output
+
+    @staticmethod
+    def _finished(
+        spec: PluginSpec, status: str, started: float, metrics: GenerationMetrics
+    ) -> PluginRun:
+        duration = perf_counter() - started
+        metrics.observe_plugin(spec.name, duration)
+        return PluginRun(spec.name, status, duration)
+
+
+def _effective_dependencies(specs: Sequence[PluginSpec]) -> dict[str, tuple[str, ...]]:
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Plugin names must be unique")
+    deps: dict[str, tuple[str, ...]] = {}
+    previous_writer: str | None = None
+    for spec in specs:
+        unknown = set(spec.depends_on) - set(names)
+        if unknown:
+            raise ValueError(f"Plugin {spec.name} depends on unknown {sorted(unknown)}")
+        if spec.depends_on or not spec.mutates or previous_writer is None:
+            deps[spec.name] = spec.depends_on
+        else:
+            deps[spec.name] = (previous_writer,)
+        if spec.mutates:
+            previous_writer = spec.name
+    return deps
+
+
+def _topological_order(
+    specs: Sequence[PluginSpec], deps: dict[str, tuple[str, ...]]
+) -> list[PluginSpec]:
+    by_name = {spec.name: spec for spec in specs}
+    order: list[PluginSpec] = []
+    state: dict[str, bool] = {}  # False while visiting, True once placed
+
+    def visit(name: str) -> None:
+        if state.get(name) is True:
+            return
+        if state.get(name) is False:
+            raise ValueError(f"Plugin dependency cycle through {name}")
+        state[name] = False
+        for dependency in deps[name]:
+            visit(dependency)
+        state[name] = True
+        order.append(by_name[name])
+
+    for spec in specs:
+        visit(spec.name)
+    return order
+
+
+def _check_writers_ordered(order: Sequence[PluginSpec], deps: dict[str, tuple[str, ...]]) -> None:
+    ancestors: dict[str, set[str]] = {}
+    for spec in order:
+        ancestors[spec.name] = set()
+        for dependency in deps[spec.name]:
+            ancestors[spec.name] |= ancestors[dependency] | {dependency}
+    writers = [spec.name for spec in order if spec.mutates]
+    for earlier, later in zip(writers, writers[1:]):
+        if earlier not in ancestors[later]:
+            raise ValueError(
+                f"Plugins {earlier} and {later} both modify code; one must depend on the other"
+            )
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
 from typing import Protocol
 
 from ..models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from ..models.history import HistoryPage, HistoryQuery
+from ..models.job import GenerationJob
+from ..models.search import SearchPage, SearchQuery
+from ..models.usage import UsageBucket, UsageQuery
 
 
 class CodeGenerationProvider(Protocol):
@@ -10,9 +16,75 @@ class CodeGenerationProvider(Protocol):
         ...
 
 
+class StreamingCodeGenerationProvider(CodeGenerationProvider, Protocol):
+    def stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        """Yield text deltas as they arrive, then the complete result as the last item."""
+        ...
+
+
 class GenerationRepository(Protocol):
     async def save(self, result: CodeGenerationResult) -> None:
         ...
 
+    async def save_many(self, results: Sequence[CodeGenerationResult]) -> None:
+        ...
+
     async def list_recent(self, limit: int = 20) -> list[CodeGenerationResult]:
         ...
+
+    async def list_history(self, query: HistoryQuery) -> HistoryPage:
+        ...
+
+    def iter_history(
+        self, query: HistoryQuery, batch_size: int = 500
+    ) -> AsyncIterator[CodeGenerationResult]:
+        """Yield full results newest first, fetching ``batch_size`` rows at a time.
+
+        ``query.limit`` caps the total number of rows; ``None`` streams everything.
+        """
+        ...
+
+    async def search(self, query: SearchQuery) -> SearchPage:
+        """Full-text search over prompts and code, most relevant first.
+
+        Raises SearchUnavailable when the store has no text index.
+        """
+        ...
+
+
+class UsageRepository(Protocol):
+    async def usage(self, query: UsageQuery) -> list[UsageBucket]:
+        """Aggregate pre-computed rollups; cost depends on buckets, not history size."""
+        ...
+
+
+class JobRepository(Protocol):
+    async def add(self, job: GenerationJob) -> None:
+        ...
+
+    async def get(self, job_id: str) -> GenerationJob | None:
+        ...
+
+    async def claim(self, job_id: str) -> GenerationJob | None:
+        """Atomically move a queued job to running; None if it is not queued any more."""
+        ...
+
+    async def finish(self, job: GenerationJob) -> None:
+        """Persist a succeeded or failed job's outcome."""
+        ...
+
+    async def release(self, job_id: str) -> None:
+        """Put a running job back in the queue, e.g. when its worker shuts down."""
+        ...
+
+    async def resumable(self, started_before: datetime) -> list[str]:
+        """Requeue jobs left running since before ``started_before`` (their worker died)
+        and return the ids of every queued job, oldest first."""
+        ...
+
+
+class TokenEstimator(Protocol):
+    def count(self, text: str, model: str) -> int:
+        ...
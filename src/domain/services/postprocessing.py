@@ -1,12 +1,58 @@
 from __future__ import annotations
 
-from typing import Protocol
+from typing import Literal, Protocol
 
 from ..models.code_generation import CodeGenerationResult
 
+ExecutionKind = Literal["async", "io", "cpu"]
+TimeoutPolicy = Literal["skip", "fail"]
+
 
 class PostProcessor(Protocol):
+    """A step of the post-processing pipeline.
+
+    Optional class attributes tune how PluginPipeline runs it: ``execution``
+    (default ``"async"``), ``depends_on`` (plugin names), ``timeout`` in seconds,
+    ``on_timeout`` (``"skip"`` or ``"fail"``, default ``"fail"``) and ``mutates``
+    (default ``True``; read-only checks set it to ``False``).
+    """
+
     name: str
 
     async def run(self, result: CodeGenerationResult) -> CodeGenerationResult:
         ...
+
+
+class BlockingPostProcessor(Protocol):
+    """Plugin whose work is a synchronous function of the code, used instead of ``run``.
+
+    With ``execution = "io"`` it runs in a thread, with ``"cpu"`` in the worker process
+    pool, so ``transform`` and the plugin instance must be picklable.
+    """
+
+    name: str
+    execution: ExecutionKind
+
+    def transform(self, code: str, language: str) -> str:
+        ...
+
+
+class DeltaProcessor(Protocol):
+    """Per-stream state of an incremental post-processor."""
+
+    def feed(self, delta: str) -> str:
+        ...
+
+    def finish(self) -> str:
+        ...
+
+
+class StreamingPostProcessor(PostProcessor, Protocol):
+    """Post-processor that can also transform a stream of deltas.
+
+    Concatenating everything returned by ``feed`` and ``finish`` must equal the
+    code ``run`` would produce for the whole text.
+    """
+
+    def open_stream(self) -> DeltaProcessor:
+        ...
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+
+from ..models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from .ports import CodeGenerationProvider, StreamingCodeGenerationProvider
+
+
+@dataclass(slots=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    ``min_attempt`` is the least time an attempt needs to be worth starting; a retry
+    whose backoff would leave less than that before the request deadline is skipped.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5.0
+    min_attempt: float = 0.5
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+@dataclass(slots=True)
+class RetryStats:
+    retries: int = 0
+    skipped: int = 0
+    exhausted: int = 0
+
+
+class RetryingCodeGenerationProvider(StreamingCodeGenerationProvider):
+    """Retries retryable provider errors within the request's deadline."""
+
+    def __init__(
+        self,
+        inner: CodeGenerationProvider,
+        policy: RetryPolicy,
+        is_retryable: Callable[[Exception], bool],
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self._inner = inner
+        self._policy = policy
+        self._is_retryable = is_retryable
+        self._sleep = sleep
+        self.stats = RetryStats()
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        attempt = 0
+        while True:
+            try:
+                return await self._inner.generate(request)
+            except Exception as exc:
+                await self._before_retry(request, exc, attempt)
+            attempt += 1
+
+    async def stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        # Deltas already forwarded cannot be taken back, so only retry before the first.
+        attempt = 0
+        while True:
+            yielded = False
+            try:
+                inner_stream = getattr(self._inner, "stream", None)
+                if inner_stream is None:
+                    result = await self._inner.generate(request)
+                    yielded = True
+                    yield result.code
+                    yield result
+                else:
+                    async for event in inner_stream(request):
+                        yielded = True
+                        yield event
+                return
+            except Exception as exc:
+                if yielded:
+                    raise
+                await self._before_retry(request, exc, attempt)
+            attempt += 1
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "retries": self.stats.retries,
+            "skipped": self.stats.skipped,
+            "exhausted": self.stats.exhausted,
+        }
+
+    async def _before_retry(
+        self, request: CodeGenerationRequest, exc: Exception, attempt: int
+    ) -> None:
+        """Sleep before the next attempt, or re-raise ``exc`` when there should be none."""
+        if not self._is_retryable(exc):
+            raise exc
+        if attempt + 1 >= self._policy.max_attempts:
+            self.stats.exhausted += 1
+            raise exc
+        delay = self._policy.backoff(attempt)
+        if request.deadline is not None:
+            if request.deadline.remaining() - delay < self._policy.min_attempt:
+                self.stats.skipped += 1
+                raise exc
+        self.stats.retries += 1
+        await self._sleep(delay)
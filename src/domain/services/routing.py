@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Sequence
+from dataclasses import dataclass, field
+
+from ..models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from .admission import UpstreamBusy
+from .ports import CodeGenerationProvider, StreamingCodeGenerationProvider
+
+
+class NoBackendAvailable(UpstreamBusy):
+    """Every backend's circuit breaker is open."""
+
+
+class LatencyTracker:
+    """Sliding window of recent call outcomes for one backend."""
+
+    def __init__(self, window: int = 256) -> None:
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[bool] = deque(maxlen=window)
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def record(self, latency: float | None) -> None:
+        """Record a call; ``None`` marks a failure."""
+        self._outcomes.append(latency is not None)
+        if latency is not None:
+            self._latencies.append(latency)
+
+    def percentile(self, q: float) -> float:
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds one trial call is let through (half-open); its
+    outcome closes the breaker again or re-opens it for another timeout.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self._reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self._reset_timeout - self._clock())
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Forget an admitted call that was abandoned before it finished."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self._failure_threshold:
+            if self._opened_at is None or self._trial_in_flight:
+                self.trips += 1
+            self._opened_at = self._clock()
+        self._trial_in_flight = False
+
+
+@dataclass(slots=True)
+class RoutedBackend:
+    """One upstream the router may pick; ``cost`` ranks backends when shedding load."""
+
+    name: str
+    provider: CodeGenerationProvider
+    cost: float = 1.0
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    latency: LatencyTracker = field(default_factory=LatencyTracker)
+    inflight: int = 0
+    calls: int = 0
+
+
+@dataclass(slots=True)
+class RoutingStats:
+    hedges: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    load_fallbacks: int = 0
+
+
+class RoutingCodeGenerationProvider(StreamingCodeGenerationProvider):
+    """Composite provider that spreads calls over several backends.
+
+    Healthy backends are ranked by p95 latency inflated by their error rate; backends
+    with fewer than ``min_samples`` observations keep their configured order so new
+    ones get traffic. When more than ``load_threshold`` calls are in flight the
+    cheapest backend is preferred instead. A generate call that is still pending after
+    the primary's ``hedge_percentile`` latency gets a hedged copy on the next backend,
+    and whichever finishes first wins. Failures feed each backend's circuit breaker
+    and fail over to the next candidate. UpstreamBusy (e.g. a backend's scheduler
+    shedding the call) is local back-pressure: it is raised as is, without touching
+    the breaker or failing over.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[RoutedBackend],
+        hedge_percentile: float | None = 0.95,
+        min_samples: int = 20,
+        load_threshold: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not backends:
+            raise ValueError("RoutingCodeGenerationProvider needs at least one backend")
+        self._backends = list(backends)
+        self._hedge_percentile = hedge_percentile
+        self._min_samples = min_samples
+        self._load_threshold = load_threshold
+        self._clock = clock
+        self._inflight = 0
+        self.stats = RoutingStats()
+
+    @property
+    def backends(self) -> list[RoutedBackend]:
+        return self._backends
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        candidates = self._candidates()
+        self._inflight += 1
+        try:
+            return await self._generate(request, candidates)
+        finally:
+            self._inflight -= 1
+
+    async def stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        # A stream cannot be hedged once deltas have been forwarded, so only fail over
+        # while nothing has been yielded yet.
+        candidates = self._candidates()
+        self._inflight += 1
+        try:
+            error: Exception | None = None
+            for backend in candidates:
+                if not backend.breaker.allow():
+                    continue
+                if error is not None:
+                    self.stats.failovers += 1
+                started = self._clock()
+                backend.inflight += 1
+                backend.calls += 1
+                yielded = False
+                try:
+                    inner_stream = getattr(backend.provider, "stream", None)
+                    if inner_stream is None:
+                        result = await backend.provider.generate(request)
+                        yielded = True
+                        yield result.code
+                        yield result
+                    else:
+                        async for event in inner_stream(request):
+                            yielded = True
+                            yield event
+                except (asyncio.CancelledError, GeneratorExit, UpstreamBusy):
+                    backend.breaker.release()
+                    raise
+                except Exception as exc:
+                    self._record(backend, None)
+                    if yielded:
+                        raise
+                    error = exc
+                    continue
+                finally:
+                    backend.inflight -= 1
+                self._record(backend, self._clock() - started)
+                return
+            raise error or self._unavailable()
+        finally:
+            self._inflight -= 1
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "inflight": self._inflight,
+            "hedges": self.stats.hedges,
+            "hedge_wins": self.stats.hedge_wins,
+            "failovers": self.stats.failovers,
+            "load_fallbacks": self.stats.load_fallbacks,
+            "backends": {
+                backend.name: {
+                    "state": backend.breaker.state,
+                    "trips": backend.breaker.trips,
+                    "calls": backend.calls,
+                    "inflight": backend.inflight,
+                    "p50_ms": round(backend.latency.percentile(0.5) * 1000, 3),
+                    "p95_ms": round(backend.latency.percentile(0.95) * 1000, 3),
+                    "error_rate": round(backend.latency.error_rate, 4),
+                }
+                for backend in self._backends
+            },
+        }
+
+    def _candidates(self) -> list[RoutedBackend]:
+        available = [backend for backend in self._backends if backend.breaker.state != "open"]
+        if not available:
+            raise self._unavailable()
+        if self._load_threshold is not None and self._inflight >= self._load_threshold:
+            self.stats.load_fallbacks += 1
+            return sorted(available, key=lambda backend: (backend.cost, self._score(backend)))
+        return sorted(available, key=self._score)
+
+    def _unavailable(self) -> NoBackendAvailable:
+        retry_after = min(backend.breaker.retry_after for backend in self._backends)
+        return NoBackendAvailable(
+            "All upstream backends are unavailable", retry_after=max(retry_after, 1.0)
+        )
+
+    def _score(self, backend: RoutedBackend) -> float:
+        if backend.latency.samples < self._min_samples:
+            return 0.0
+        healthy = max(1.0 - backend.latency.error_rate, 0.05)
+        return backend.latency.percentile(0.95) / healthy
+
+    def _hedge_delay(self, backend: RoutedBackend) -> float | None:
+        if self._hedge_percentile is None or backend.latency.samples < self._min_samples:
+            return None
+        return backend.latency.percentile(self._hedge_percentile)
+
+    async def _generate(
+        self, request: CodeGenerationRequest, candidates: list[RoutedBackend]
+    ) -> CodeGenerationResult:
+        pending: dict[asyncio.Task[CodeGenerationResult], RoutedBackend] = {}
+        queue = deque(candidates)
+        error: Exception | None = None
+
+        def launch() -> bool:
+            while queue:
+                backend = queue.popleft()
+                if backend.breaker.allow():
+                    pending[asyncio.ensure_future(self._call(backend, request))] = backend
+                    return True
+            return False
+
+        if not launch():
+            raise self._unavailable()
+        try:
+            while pending:
+                primary = next(iter(pending.values()))
+                delay = self._hedge_delay(primary) if len(pending) == 1 and queue else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if launch():
+                        self.stats.hedges += 1
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        if backend is not primary:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()  # type: ignore[assignment]
+                if not pending and not isinstance(error, UpstreamBusy) and launch():
+                    self.stats.failovers += 1
+        finally:
+            for task in pending:
+                if not task.cancel() and not task.cancelled():
+                    task.exception()  # finished alongside the winner; already recorded
+        assert error is not None
+        raise error
+
+    async def _call(
+        self, backend: RoutedBackend, request: CodeGenerationRequest
+    ) -> CodeGenerationResult:
+        started = self._clock()
+        backend.inflight += 1
+        backend.calls += 1
+        try:
+            result = await backend.provider.generate(request)
+        except (asyncio.CancelledError, UpstreamBusy):
+            # A losing hedge or a shed call says nothing about the backend's health.
+            backend.breaker.release()
+            raise
+        except Exception:
+            self._record(backend, None)
+            raise
+        finally:
+            backend.inflight -= 1
+        self._record(backend, self._clock() - started)
+        return result
+
+    def _record(self, backend: RoutedBackend, latency: float | None) -> None:
+        backend.latency.record(latency)
+        if latency is None:
+            backend.breaker.record_failure()
+        else:
+            backend.breaker.record_success()
@@ -1,28 +1,142 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from typing import Iterable
 
 
 class SafetyViolation(Exception):
     """Raised when a safety gate blocks the request."""
 
+    def __init__(self, message: str, gate: str | None = None, rule: str | None = None) -> None:
+        super().__init__(message)
+        self.gate = gate
+        self.rule = rule
+
+
+@dataclass(slots=True, frozen=True)
+class SafetyRule:
+    gate: str
+    rule_id: str
+    pattern: str
+    regex: bool = False
+    message: str | None = None
+
+    def violation(self) -> SafetyViolation:
+        message = self.message or f"Rule {self.rule_id} triggered by {self.gate} gate"
+        return SafetyViolation(message, gate=self.gate, rule=self.rule_id)
+
+
+BUILTIN_RULES: Mapping[str, tuple[SafetyRule, ...]] = {
+    "RB-SECRET": (
+        SafetyRule(
+            "RB-SECRET",
+            "openai-key-prefix",
+            "sk-",
+            message="Potential secret detected by RB-SECRET gate",
+        ),
+    ),
+    "RB-DRIFT": (
+        SafetyRule(
+            "RB-DRIFT",
+            "hack",
+            "hack",
+            message="Prompt drift detected by RB-DRIFT gate",
+        ),
+    ),
+}
+
+
+class SafetyEngine:
+    """Every rule of every gate, compiled once and checked in declaration order.
+
+    The first rule that matches wins, as when gates ran one after another. Literal
+    rules are lowercased and also folded into a prefix trie, so a prompt that contains
+    none of them is cleared with one scan of the lowercased text instead of one per
+    literal. Regex rules are compiled case-insensitively, each on its own so that
+    backreferences keep their numbering.
+    """
+
+    def __init__(self, rules: Iterable[SafetyRule]) -> None:
+        matchers: list[tuple[SafetyRule, str | re.Pattern[str]]] = []
+        literals: set[str] = set()
+        for rule in rules:
+            if rule.regex:
+                matchers.append((rule, re.compile(rule.pattern, re.IGNORECASE)))
+            else:
+                literal = rule.pattern.lower()
+                literals.add(literal)
+                matchers.append((rule, literal))
+        self._matchers = tuple(matchers)
+        self._literal_pattern = re.compile(_trie_pattern(literals)) if literals else None
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._matchers)
+
+    def find(self, text: str) -> SafetyRule | None:
+        lowered = text.lower()
+        any_literal = (
+            self._literal_pattern is not None
+            and self._literal_pattern.search(lowered) is not None
+        )
+        for rule, matcher in self._matchers:
+            if isinstance(matcher, str):
+                if any_literal and matcher in lowered:
+                    return rule
+            elif matcher.search(text) is not None:
+                return rule
+        return None
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict[str, dict]) -> str:
+        branches = [re.escape(char) + render(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return render(trie)
+
 
 @dataclass(slots=True)
 class SafetyGate:
     name: str
+    rules: tuple[SafetyRule, ...] = ()
+    _engine: SafetyEngine = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.rules:
+            self.rules = BUILTIN_RULES.get(self.name, ())
+        self._engine = SafetyEngine(self.rules)
 
     def check(self, text: str) -> None:
-        if self.name == "RB-SECRET" and "sk-" in text.lower():
-            raise SafetyViolation("Potential secret detected by RB-SECRET gate")
-        if self.name == "RB-DRIFT" and "hack" in text.lower():
-            raise SafetyViolation("Prompt drift detected by RB-DRIFT gate")
+        rule = self._engine.find(text)
+        if rule is not None:
+            raise rule.violation()
 
 
 @dataclass(slots=True)
 class SafetyOrchestrator:
     gates: Iterable[SafetyGate]
+    _engine: SafetyEngine = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.gates = tuple(self.gates)
+        self._engine = SafetyEngine(rule for gate in self.gates for rule in gate.rules)
 
     def validate(self, prompt: str) -> None:
-        for gate in self.gates:
-            gate.check(prompt)
+        rule = self._engine.find(prompt)
+        if rule is not None:
+            raise rule.violation()
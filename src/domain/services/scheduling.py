@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator, Callable, Mapping
+from dataclasses import dataclass, field
+
+from ..models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from .admission import ANONYMOUS_KEY, UpstreamBusy
+from .ports import CodeGenerationProvider, StreamingCodeGenerationProvider
+
+
+class QueueWaitExceeded(UpstreamBusy):
+    """The request waited longer than the scheduler's queue deadline and was shed."""
+
+
+@dataclass(slots=True)
+class SchedulerStats:
+    admitted: int = 0
+    shed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+@dataclass(order=True, slots=True)
+class _Ticket:
+    priority: int
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+class FairScheduler:
+    """Weighted fair queuing over a fixed number of upstream slots.
+
+    Every tenant (``user_id``) gets a virtual finish tag of
+    ``max(virtual_time, tenant's last tag) + max_tokens / weight``. Free slots go to
+    the lowest configured priority first, then to the smallest finish tag, so small
+    interactive requests overtake large batch jobs and no tenant can monopolise the
+    slots by queuing many requests. Requests still queued after ``max_wait`` seconds
+    are shed with QueueWaitExceeded.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        weights: Mapping[str, float] | None = None,
+        priorities: Mapping[str, int] | None = None,
+        max_wait: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._slots = slots
+        self._weights = dict(weights or {})
+        self._priorities = dict(priorities or {})
+        self._max_wait = max_wait
+        self._clock = clock
+        self._active = 0
+        self._queue: list[_Ticket] = []
+        self._waiting = 0
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._seq = itertools.count()
+        self.stats = SchedulerStats()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    async def acquire(self, request: CodeGenerationRequest) -> None:
+        tenant = request.user_id or ANONYMOUS_KEY
+        weight = self._weights.get(tenant, 1.0)
+        start = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        finish = start + request.max_tokens / weight
+        self._last_finish[tenant] = finish
+
+        if self._active < self._slots and not self._waiting:
+            self._active += 1
+            self._advance(start)
+            self._record_wait(0.0)
+            return
+
+        ticket = _Ticket(
+            priority=self._priorities.get(tenant, 0),
+            finish_tag=finish,
+            seq=next(self._seq),
+            start_tag=start,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._queue, ticket)
+        self._waiting += 1
+        enqueued = self._clock()
+        try:
+            await asyncio.wait_for(ticket.future, self._max_wait)
+        except asyncio.TimeoutError:
+            self._waiting -= 1
+            self.stats.shed += 1
+            raise QueueWaitExceeded(
+                f"Waited more than {self._max_wait}s for an upstream slot",
+                retry_after=self._max_wait or 1.0,
+            ) from None
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self.release()
+            else:
+                self._waiting -= 1
+            raise
+        self._record_wait(self._clock() - enqueued)
+
+    def release(self) -> None:
+        self._active -= 1
+        while self._queue and self._active < self._slots:
+            ticket = heapq.heappop(self._queue)
+            if ticket.future.done():
+                continue
+            self._waiting -= 1
+            self._active += 1
+            self._advance(ticket.start_tag)
+            ticket.future.set_result(None)
+        if not self._waiting:
+            # The backlog is gone, so there is no queue left for past usage to be fair
+            # against; without this, uncontended traffic never moves virtual time and
+            # every tenant it has seen would stay in ``_last_finish``.
+            self._last_finish.clear()
+
+    def _advance(self, start_tag: float) -> None:
+        if start_tag <= self._virtual_time:
+            return
+        self._virtual_time = start_tag
+        # A tenant whose last finish tag the clock has passed starts from virtual time
+        # again, so its entry no longer matters.
+        self._last_finish = {
+            tenant: finish
+            for tenant, finish in self._last_finish.items()
+            if finish > start_tag
+        }
+
+    def _record_wait(self, waited: float) -> None:
+        self.stats.admitted += 1
+        self.stats.total_wait += waited
+        self.stats.max_wait = max(self.stats.max_wait, waited)
+
+    def snapshot(self) -> dict[str, float]:
+        admitted = self.stats.admitted
+        return {
+            "slots": self._slots,
+            "active": self._active,
+            "queue_depth": self._waiting,
+            "tenants": len(self._last_finish),
+            "admitted": admitted,
+            "shed": self.stats.shed,
+            "avg_wait_ms": round(self.stats.total_wait / admitted * 1000, 3) if admitted else 0.0,
+            "max_wait_ms": round(self.stats.max_wait * 1000, 3),
+        }
+
+
+class ScheduledCodeGenerationProvider(StreamingCodeGenerationProvider):
+    """Runs any provider behind a FairScheduler slot."""
+
+    def __init__(self, inner: CodeGenerationProvider, scheduler: FairScheduler) -> None:
+        self._inner = inner
+        self._scheduler = scheduler
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        await self._scheduler.acquire(request)
+        try:
+            return await self._inner.generate(request)
+        finally:
+            self._scheduler.release()
+
+    async def stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        await self._scheduler.acquire(request)
+        try:
+            inner_stream = getattr(self._inner, "stream", None)
+            if inner_stream is None:
+                result = await self._inner.generate(request)
+                yield result.code
+                yield result
+                return
+            async for event in inner_stream(request):
+                yield event
+        finally:
+            self._scheduler.release()
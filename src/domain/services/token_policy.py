@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Literal
+
+from ..models.code_generation import CodeGenerationRequest
+from .ports import TokenEstimator
 
 
 class TokenLimitExceeded(Exception):
@@ -10,9 +14,38 @@ class TokenLimitExceeded(Exception):
 @dataclass(slots=True)
 class TokenPolicy:
     hard_limit: int
+    model: str | None = None
+    context_window: int | None = None
+    estimator: TokenEstimator | None = None
+    overflow: Literal["reject", "trim"] = "reject"
+    min_output_tokens: int = 16
 
     def ensure_within_limit(self, requested: int) -> None:
         if requested > self.hard_limit:
             raise TokenLimitExceeded(
                 f"Requested tokens {requested} exceed hard limit {self.hard_limit}"
             )
+
+    def admit(self, request: CodeGenerationRequest) -> int | None:
+        """Check the output budget and, when an estimator is configured, the whole context.
+
+        Returns the estimated prompt token count (``None`` without an estimator). With the
+        ``trim`` overflow policy ``request.max_tokens`` is lowered to what still fits.
+        """
+        self.ensure_within_limit(request.max_tokens)
+        if self.estimator is None or self.model is None:
+            return None
+        prompt_tokens = self.estimator.count(request.prompt, self.model)
+        if self.context_window is None:
+            return prompt_tokens
+
+        available = self.context_window - prompt_tokens
+        if request.max_tokens <= available:
+            return prompt_tokens
+        if self.overflow == "trim" and available >= self.min_output_tokens:
+            request.max_tokens = available
+            return prompt_tokens
+        raise TokenLimitExceeded(
+            f"Prompt of ~{prompt_tokens} tokens plus {request.max_tokens} output tokens "
+            f"exceeds the {self.context_window} token context window of {self.model}"
+        )
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ...domain.services.audit import AuditEvent, AuditSink
+from ..db.models import AuditLog
+
+OverflowPolicy = Literal["drop_oldest", "block"]
+
+
+@dataclass(slots=True)
+class AuditStats:
+    recorded: int = 0
+    dropped: int = 0
+    blocked: int = 0
+    flushed: int = 0
+    batches: int = 0
+    failed: int = 0
+
+
+class BufferedAuditSink(AuditSink):
+    """Ring buffer of audit events drained into ``audit_logs`` by a background task.
+
+    ``record`` only appends to a bounded deque, so the request path never touches the
+    database; there is no lock because producers and the flusher share one event loop
+    and never await between checking and mutating the buffer. When the buffer is full,
+    ``drop_oldest`` evicts the oldest event (counted in ``dropped``) and ``block`` makes
+    the producer wait until the flusher frees space (it falls back to dropping when no
+    flusher is running). Events recorded once ``stop`` has begun, including those of
+    producers still blocked at that point, are counted as dropped. Events are written in multi-row
+    inserts of up to ``batch_size`` rows, at least every ``flush_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        capacity: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow: OverflowPolicy = "drop_oldest",
+    ) -> None:
+        self._session_factory = session_factory
+        self._buffer: deque[AuditEvent] = deque(maxlen=capacity)
+        self._capacity = capacity
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._overflow = overflow
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+        self.stats = AuditStats()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher after writing out everything still buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._space.set()  # wake blocked producers; they see the sink closed
+        if self._task is not None:
+            self._ready.set()
+            await self._task
+        else:
+            await self._drain()
+
+    async def record(self, event: AuditEvent) -> None:
+        if len(self._buffer) >= self._capacity:
+            if self._overflow == "block" and self._task is not None and not self._closed:
+                self.stats.blocked += 1
+                while len(self._buffer) >= self._capacity and not self._closed:
+                    self._space.clear()
+                    self._ready.set()
+                    await self._space.wait()
+            elif not self._closed:
+                self.stats.dropped += 1
+        if self._closed:
+            # The final drain may already be done; an appended event would never be written.
+            self.stats.dropped += 1
+            return
+        self._buffer.append(event)
+        self.stats.recorded += 1
+        if len(self._buffer) >= self._batch_size:
+            self._ready.set()
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "capacity": self._capacity,
+            "recorded": self.stats.recorded,
+            "dropped": self.stats.dropped,
+            "blocked": self.stats.blocked,
+            "flushed": self.stats.flushed,
+            "batches": self.stats.batches,
+            "failed": self.stats.failed,
+        }
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            await self._drain()
+        await self._drain()
+
+    async def _drain(self) -> None:
+        while self._buffer:
+            count = min(len(self._buffer), self._batch_size)
+            batch = [self._buffer.popleft() for _ in range(count)]
+            self._space.set()
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[AuditEvent]) -> None:
+        rows = [
+            {
+                "event": event.event,
+                "payload": json.dumps(event.payload, default=str),
+                "created_at": event.created_at,
+            }
+            for event in batch
+        ]
+        try:
+            async with self._session_factory() as session:
+                await session.execute(insert(AuditLog), rows)
+                await session.commit()
+        except Exception:
+            # Audit is best effort: a failed batch is counted and dropped, never retried
+            # into a buffer that is already absorbing new traffic.
+            self.stats.failed += len(batch)
+            return
+        self.stats.batches += 1
+        self.stats.flushed += len(batch)
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Delete, delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ...domain.models.code_generation import (
+    CodeGenerationRequest,
+    CodeGenerationResult,
+    IncompleteGeneration,
+)
+from ...domain.services.ports import (
+    CodeGenerationProvider,
+    StreamingCodeGenerationProvider,
+)
+from ..db.dialect import upsert_insert
+from ..db.models import GenerationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CacheStats:
+    memory_hits: int = 0
+    db_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    write_errors: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.db_hits
+
+
+@dataclass(slots=True, frozen=True)
+class CachedGeneration:
+    code: str
+    model: str
+    token_usage: int
+
+
+class MemoryGenerationCache:
+    """Size-bounded LRU with a per-entry TTL, first tier of the result cache."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        stats: CacheStats,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._entries: OrderedDict[str, tuple[float, CachedGeneration]] = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._stats = stats
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedGeneration | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self._stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedGeneration) -> None:
+        self._entries[key] = (self._clock() + self._ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+
+class DatabaseGenerationCache:
+    """Second tier shared by every worker pointing at the same database.
+
+    Each ``put`` also deletes expired rows and, past ``max_entries``, the rows closest
+    to expiring, so the table stays within the same bound as the memory tier.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        ttl_seconds: float,
+        max_entries: int,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+
+    async def get(self, key: str) -> CachedGeneration | None:
+        stmt = select(
+            GenerationCacheEntry.code,
+            GenerationCacheEntry.model,
+            GenerationCacheEntry.token_usage,
+        ).where(
+            GenerationCacheEntry.key == key,
+            GenerationCacheEntry.expires_at > datetime.now(timezone.utc),
+        )
+        async with self._session_factory() as session:
+            row = (await session.execute(stmt)).first()
+        if row is None:
+            return None
+        return CachedGeneration(code=row.code, model=row.model, token_usage=row.token_usage)
+
+    async def put(self, key: str, entry: CachedGeneration) -> None:
+        now = datetime.now(timezone.utc)
+        values = {
+            "key": key,
+            "code": entry.code,
+            "model": entry.model,
+            "token_usage": entry.token_usage,
+            "expires_at": now + timedelta(seconds=self._ttl),
+        }
+        async with self._session_factory() as session:
+            insert = upsert_insert(session)
+            if insert is None:
+                await session.merge(GenerationCacheEntry(**values))
+            else:
+                # Workers filling the same key at once must not fail on the primary key.
+                stmt = insert(GenerationCacheEntry).values(**values)
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["key"],
+                        set_={name: stmt.excluded[name] for name in values if name != "key"},
+                    )
+                )
+            await session.execute(self._prune(now))
+            await session.commit()
+
+    def _prune(self, now: datetime) -> Delete:
+        expires_at = GenerationCacheEntry.expires_at
+        # Every entry gets the same TTL, so the oldest entries are the ones expiring first.
+        oldest_kept = (
+            select(expires_at)
+            .order_by(expires_at.desc())
+            .offset(self._max_entries - 1)
+            .limit(1)
+            .scalar_subquery()
+        )
+        return delete(GenerationCacheEntry).where(
+            or_(expires_at <= now, expires_at < oldest_kept)
+        )
+
+
+class GenerationResultCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.stats = CacheStats()
+        self._memory = MemoryGenerationCache(max_entries, ttl_seconds, self.stats, clock)
+        self._database = (
+            DatabaseGenerationCache(session_factory, ttl_seconds, max_entries)
+            if session_factory
+            else None
+        )
+
+    async def get(self, key: str) -> CachedGeneration | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self.stats.memory_hits += 1
+            return entry
+        if self._database is not None:
+            entry = await self._database.get(key)
+            if entry is not None:
+                self.stats.db_hits += 1
+                self._memory.put(key, entry)
+                return entry
+        self.stats.misses += 1
+        return None
+
+    async def put(self, key: str, entry: CachedGeneration) -> None:
+        self._memory.put(key, entry)
+        if self._database is None:
+            return
+        try:
+            await self._database.put(key, entry)
+        except Exception:
+            # The result is already paid for; losing the shared copy must not fail the request.
+            self.stats.write_errors += 1
+            logger.warning("Could not write generation cache entry %s", key, exc_info=True)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "hits": self.stats.hits,
+            "memory_hits": self.stats.memory_hits,
+            "db_hits": self.stats.db_hits,
+            "misses": self.stats.misses,
+            "evictions": self.stats.evictions,
+            "expirations": self.stats.expirations,
+            "write_errors": self.stats.write_errors,
+            "size": len(self._memory),
+        }
+
+
+class CachingCodeGenerationProvider(StreamingCodeGenerationProvider):
+    """Serves repeated prompts from the result cache before going upstream.
+
+    Hits are returned as fresh results bound to the caller's request, so the
+    use case still runs post-processors and persists a history record.
+    """
+
+    def __init__(
+        self, inner: CodeGenerationProvider, cache: GenerationResultCache, model: str
+    ) -> None:
+        self._inner = inner
+        self._cache = cache
+        self._model = model
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        key = request.fingerprint(self._model)
+        entry = await self._cache.get(key)
+        if entry is not None:
+            return self._from_entry(request, entry)
+
+        result = await self._inner.generate(request)
+        await self._remember(key, result)
+        return result
+
+    async def stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        key = request.fingerprint(self._model)
+        entry = await self._cache.get(key)
+        if entry is not None:
+            yield entry.code
+            yield self._from_entry(request, entry)
+            return
+
+        result: CodeGenerationResult | None = None
+        inner_stream = getattr(self._inner, "stream", None)
+        if inner_stream is None:
+            result = await self._inner.generate(request)
+            yield result.code
+        else:
+            async for event in inner_stream(request):
+                if isinstance(event, CodeGenerationResult):
+                    result = event
+                    break
+                yield event
+        if result is None:
+            raise IncompleteGeneration("Provider stream ended without a result")
+        await self._remember(key, result)
+        yield result
+
+    async def _remember(self, key: str, result: CodeGenerationResult) -> None:
+        if result.model != self._model:
+            # Served by a fallback backend; keys assume ``model``, so caching it would
+            # hand the fallback's output to later requests for the whole TTL.
+            return
+        await self._cache.put(
+            key,
+            CachedGeneration(code=result.code, model=result.model, token_usage=result.token_usage),
+        )
+
+    @staticmethod
+    def _from_entry(
+        request: CodeGenerationRequest, entry: CachedGeneration
+    ) -> CodeGenerationResult:
+        return CodeGenerationResult.new(
+            request=request,
+            code=entry.code,
+            model=entry.model,
+            token_usage=entry.token_usage,
+            cached=True,
+        )
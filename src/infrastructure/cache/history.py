@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db.models import GenerationRecord
+
+
+@dataclass(slots=True)
+class HistoryCacheStats:
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+
+
+class HistoryResponseCache:
+    """Serialized ``/history`` pages keyed by query shape, valid until the next save.
+
+    History only grows, so a page can only change when a newer record is saved. The
+    ETag of a page is derived from the newest record's id and created_at plus the query
+    shape; ``invalidate`` (called by the repository after every commit) moves that
+    marker and drops every cached page. The marker is read from the database on the
+    first request and, with ``revalidate_after`` set, again when it is older than that, which
+    picks up saves made by other worker processes.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_entries: int = 256,
+        revalidate_after: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._session_factory = session_factory
+        self._max_entries = max_entries
+        self._revalidate_after = revalidate_after
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        self._marker: str | None = None
+        self._marker_read_at = 0.0
+        self.stats = HistoryCacheStats()
+
+    async def etag(self, key: str) -> str:
+        """The current ETag for the page identified by ``key``."""
+        if self._marker is None or self._marker_expired():
+            self._set_marker(await self._load_marker())
+        return self._etag_for(key)  # type: ignore[return-value]
+
+    def get(self, key: str, etag: str) -> bytes | None:
+        item = self._entries.get(key)
+        if item is None or item[0] != etag:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return item[1]
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        """Cache ``body`` unless a save has moved the marker since ``etag`` was issued."""
+        if etag != self._etag_for(key):
+            return
+        self._entries[key] = (etag, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, record_id: int, created_at: datetime) -> None:
+        self._set_marker(_marker(record_id, created_at))
+        self.stats.invalidations += 1
+
+    def not_modified(self) -> None:
+        self.stats.not_modified += 1
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "not_modified": self.stats.not_modified,
+            "invalidations": self.stats.invalidations,
+            "evictions": self.stats.evictions,
+        }
+
+    def _etag_for(self, key: str) -> str | None:
+        if self._marker is None:
+            return None
+        digest = hashlib.sha256(f"{self._marker}|{key}".encode("utf-8")).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def _set_marker(self, marker: str) -> None:
+        if marker != self._marker:
+            self._entries.clear()
+        self._marker = marker
+        self._marker_read_at = self._clock()
+
+    def _marker_expired(self) -> bool:
+        if self._revalidate_after is None:
+            return False
+        return self._clock() - self._marker_read_at >= self._revalidate_after
+
+    async def _load_marker(self) -> str:
+        stmt = (
+            select(GenerationRecord.id, GenerationRecord.created_at)
+            .order_by(GenerationRecord.id.desc())
+            .limit(1)
+        )
+        async with self._session_factory() as session:
+            row = (await session.execute(stmt)).first()
+        if row is None:
+            return "empty"
+        return _marker(row.id, row.created_at)
+
+
+def _marker(record_id: int, created_at: datetime) -> str:
+    return f"{record_id}|{created_at.replace(tzinfo=None).isoformat()}"
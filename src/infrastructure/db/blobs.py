@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .dialect import upsert_insert
+from .models import ContentBlob
+
+try:  # optional dependency, installed with the "zstd" extra
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+RAW = "raw"
+ZLIB = "zlib"
+ZSTD = "zstd"
+
+Compression = Literal["zlib", "zstd"]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedBody:
+    hash: str
+    codec: str
+    size: int
+    data: bytes
+
+
+class BodyCodec:
+    """Turns prompt/code text into content-addressed, optionally compressed blobs.
+
+    Bodies shorter than ``threshold`` bytes are stored raw: below a few hundred bytes
+    the compression header eats most of the saving and decoding is pure overhead.
+    ``zstd`` needs the optional ``zstandard`` package and falls back to zlib without it.
+    """
+
+    def __init__(self, compression: Compression = ZLIB, threshold: int = 256, level: int = 6):
+        if compression == ZSTD and zstandard is None:
+            compression = ZLIB
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+
+    def encode(self, text: str) -> EncodedBody:
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        if len(raw) >= self.threshold:
+            packed = self._compress(raw)
+            if len(packed) < len(raw):
+                return EncodedBody(digest, self.compression, len(raw), packed)
+        return EncodedBody(digest, RAW, len(raw), raw)
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.compression == ZSTD:
+            return zstandard.ZstdCompressor(level=self.level).compress(raw)
+        return zlib.compress(raw, self.level)
+
+
+def decode_body(codec: str, data: bytes) -> str:
+    if codec == RAW:
+        return data.decode("utf-8")
+    if codec == ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but the zstandard package is missing")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown blob codec: {codec!r}")
+
+
+async def store_blobs(session: AsyncSession, bodies: Iterable[EncodedBody]) -> None:
+    """Insert the blobs that are not stored yet; identical bodies are written once.
+
+    SQLite and Postgres get ``INSERT ... ON CONFLICT DO NOTHING`` so two writers racing
+    on the same new body cannot trip the primary key; other dialects check first.
+    """
+    pending = {body.hash: body for body in bodies}
+    if not pending:
+        return
+    table = ContentBlob.__table__
+    insert = upsert_insert(session)
+    if insert is not None:
+        stmt = insert(table).on_conflict_do_nothing(index_elements=["hash"])
+    else:
+        existing = await session.execute(select(table.c.hash).where(table.c.hash.in_(pending)))
+        for digest in existing.scalars():
+            pending.pop(digest, None)
+        if not pending:
+            return
+        stmt = table.insert()
+    await session.execute(
+        stmt,
+        [
+            {"hash": body.hash, "codec": body.codec, "size": body.size, "data": body.data}
+            for body in pending.values()
+        ],
+    )
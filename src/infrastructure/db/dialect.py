@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_UPSERT_INSERTS: dict[str, Callable[..., Any]] = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+def upsert_insert(session: AsyncSession) -> Callable[..., Any] | None:
+    """The bound dialect's ``INSERT ... ON CONFLICT`` constructor, ``None`` if it has none."""
+    return _UPSERT_INSERTS.get(session.get_bind().dialect.name)
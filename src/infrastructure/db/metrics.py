@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_CHECKED_OUT_AT = "checked_out_at"
+
+
+@dataclass(slots=True)
+class PoolMetrics:
+    """How long connections stay checked out of the pool, fed by pool events."""
+
+    checkouts: int = 0
+    checked_out: int = 0
+    total_hold_seconds: float = 0.0
+    max_hold_seconds: float = 0.0
+
+    def attach(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, _dbapi_conn: Any, record: Any, _proxy: Any) -> None:
+        record.info[_CHECKED_OUT_AT] = time.perf_counter()
+        self.checkouts += 1
+        self.checked_out += 1
+
+    def _on_checkin(self, _dbapi_conn: Any, record: Any) -> None:
+        started = record.info.pop(_CHECKED_OUT_AT, None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        self.checked_out -= 1
+        self.total_hold_seconds += held
+        self.max_hold_seconds = max(self.max_hold_seconds, held)
+
+    def snapshot(self) -> dict[str, float]:
+        average = self.total_hold_seconds / self.checkouts if self.checkouts else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "checked_out": self.checked_out,
+            "avg_hold_ms": round(average * 1000, 3),
+            "max_hold_ms": round(self.max_hold_seconds * 1000, 3),
+        }
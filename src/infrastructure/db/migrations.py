@@ -0,0 +1,203 @@
+"""Schema upgrades and data backfills.
+
+Run ``python -m src.infrastructure.db.migrations`` once after upgrading to move inline
+prompt/code bodies into ``content_blobs`` and to index records saved before full-text
+search existed; the service keeps working in the meantime.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import Connection, delete, insert, inspect, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.schema import CreateColumn
+
+from ...config.settings import get_settings
+from .base import Base
+from ..repositories.generation import result_from_row, select_results
+from ..search.index import SearchDocument, SearchIndex, search_index_for
+from .blobs import BodyCodec, EncodedBody, store_blobs
+from .models import GenerationRecord, SchemaVersion
+
+# Bump whenever the ORM models or the search index DDL change: startup compares it with the
+# stored version and only runs ``upgrade_schema`` when they differ.
+SCHEMA_VERSION = 4
+
+
+async def ensure_schema(engine: AsyncEngine) -> bool:
+    """Upgrade the schema unless it is already at ``SCHEMA_VERSION``; returns whether it ran.
+
+    An up-to-date database costs a single SELECT instead of a full metadata reflection.
+    """
+    async with engine.connect() as conn:
+        version = await current_schema_version(conn)
+    if version == SCHEMA_VERSION:
+        return False
+    async with engine.begin() as conn:
+        await upgrade_schema(conn)
+    return True
+
+
+async def current_schema_version(conn: AsyncConnection) -> int | None:
+    """The recorded schema version, or None for a database that predates the version table."""
+    try:
+        result = await conn.execute(select(SchemaVersion.version).where(SchemaVersion.id == 1))
+    except DBAPIError:
+        return None
+    return result.scalar_one_or_none()
+
+
+async def upgrade_schema(conn: AsyncConnection) -> None:
+    """Create missing tables, then the nullable columns and indexes existing tables lack.
+
+    The full-text index lives outside the ORM metadata because its DDL is dialect
+    specific; it is created here too when the database supports one. Finally the
+    schema is stamped with ``SCHEMA_VERSION``.
+    """
+    await conn.run_sync(Base.metadata.create_all)
+    await conn.run_sync(_add_missing_columns)
+    await conn.run_sync(_add_missing_indexes)
+    search_index = search_index_for(str(conn.engine.url))
+    if search_index is not None:
+        await search_index.create_schema(conn)
+    await conn.execute(delete(SchemaVersion))
+    await conn.execute(
+        insert(SchemaVersion).values(
+            id=1, version=SCHEMA_VERSION, upgraded_at=datetime.now(timezone.utc)
+        )
+    )
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present or not column.nullable:
+                continue
+            definition = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {definition}")
+
+
+def _add_missing_indexes(conn: Connection) -> None:
+    # create_all skips tables that already exist, indexes included.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+async def backfill_content_blobs(
+    session_factory: async_sessionmaker[AsyncSession],
+    codec: BodyCodec | None = None,
+    batch_size: int = 500,
+) -> int:
+    """Move inline bodies of pre-blob rows into ``content_blobs``; returns rows migrated.
+
+    Each batch commits on its own, so an interrupted run simply resumes where it stopped.
+    """
+    codec = codec or BodyCodec()
+    migrated = 0
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            rows = (
+                await session.execute(
+                    select(GenerationRecord.id, GenerationRecord.prompt, GenerationRecord.code)
+                    .where(GenerationRecord.prompt_hash.is_(None), GenerationRecord.id > last_id)
+                    .order_by(GenerationRecord.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                return migrated
+            bodies: list[EncodedBody] = []
+            updates = []
+            for row in rows:
+                prompt, code = codec.encode(row.prompt), codec.encode(row.code)
+                bodies.extend((prompt, code))
+                updates.append(
+                    {
+                        "id": row.id,
+                        "prompt_hash": prompt.hash,
+                        "code_hash": code.hash,
+                        "prompt": "",
+                        "code": "",
+                    }
+                )
+            await store_blobs(session, bodies)
+            await session.execute(update(GenerationRecord), updates)
+            await session.commit()
+        migrated += len(rows)
+        last_id = rows[-1].id
+
+
+async def backfill_search_index(
+    session_factory: async_sessionmaker[AsyncSession],
+    search_index: SearchIndex,
+    batch_size: int = 500,
+) -> int:
+    """Index every record the full-text index does not hold yet; returns records indexed.
+
+    Saves index their own rows, so this only finds records from before the index existed
+    (or from a restore), however many have been saved since.
+    """
+    last_id = 0
+    indexed = 0
+    while True:
+        async with session_factory() as session:
+            rows = (
+                await session.execute(
+                    select_results()
+                    .where(
+                        GenerationRecord.id > last_id,
+                        ~search_index.contains(GenerationRecord.id),
+                    )
+                    .order_by(GenerationRecord.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                return indexed
+            documents = []
+            for row in rows:
+                result = result_from_row(row)
+                documents.append(SearchDocument(row.id, result.request.prompt, result.code))
+            await search_index.add(session, documents)
+            await session.commit()
+        indexed += len(rows)
+        last_id = rows[-1].id
+
+
+async def _main(batch_size: int) -> None:
+    from .session import db
+
+    settings = get_settings()
+    await ensure_schema(db.engine)
+    migrated = await backfill_content_blobs(
+        db.session_factory,
+        BodyCodec(settings.blob_compression, settings.blob_compress_min_bytes),
+        batch_size=batch_size,
+    )
+    print(f"moved {migrated} generation records into content_blobs")
+    search_index = search_index_for(settings.database_url)
+    if search_index is not None:
+        indexed = await backfill_search_index(
+            db.session_factory, search_index, batch_size=batch_size
+        )
+        print(f"indexed {indexed} generation records for full-text search")
+    await db.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Upgrade the schema and backfill data")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(_main(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ...domain.models.code_generation import CodeGenerationResult
+from ...domain.models.usage import Granularity, bucket_start
+from .dialect import upsert_insert
+from .models import GenerationRecord, UsageRollup
+
+GRANULARITIES: tuple[Granularity, ...] = ("hour", "day")
+
+_KEY = ("granularity", "bucket_start", "user_id", "language", "model")
+_COUNTERS = ("requests", "token_usage", "prompt_tokens")
+
+
+@dataclass(frozen=True, slots=True)
+class UsageSample:
+    user_id: str | None
+    language: str
+    model: str
+    token_usage: int
+    prompt_tokens: int | None
+    created_at: datetime
+
+    @classmethod
+    def of(cls, result: CodeGenerationResult) -> UsageSample:
+        return cls(
+            user_id=result.request.user_id,
+            language=result.request.language.value,
+            model=result.model,
+            token_usage=result.token_usage,
+            prompt_tokens=result.prompt_tokens,
+            created_at=result.created_at,
+        )
+
+
+def usage_deltas(samples: Iterable[UsageSample]) -> list[dict[str, Any]]:
+    """Collapse samples into one counter increment per rollup row they touch."""
+    totals: dict[tuple[Any, ...], list[int]] = {}
+    for sample in samples:
+        for granularity in GRANULARITIES:
+            key = (
+                granularity,
+                bucket_start(sample.created_at, granularity),
+                sample.user_id or "",
+                sample.language,
+                sample.model,
+            )
+            counters = totals.setdefault(key, [0, 0, 0])
+            counters[0] += 1
+            counters[1] += sample.token_usage
+            counters[2] += sample.prompt_tokens or 0
+    # A stable key order makes concurrent batches lock rows in the same sequence.
+    return [
+        {**dict(zip(_KEY, key)), **dict(zip(_COUNTERS, counters))}
+        for key, counters in sorted(totals.items(), key=lambda item: item[0])
+    ]
+
+
+async def apply_usage(session: AsyncSession, samples: Iterable[UsageSample]) -> None:
+    """Add ``samples`` to the rollups inside the caller's transaction."""
+    deltas = usage_deltas(samples)
+    if not deltas:
+        return
+    table = UsageRollup.__table__
+    insert = upsert_insert(session)
+    if insert is None:
+        for delta in deltas:
+            row = await session.get(UsageRollup, tuple(delta[name] for name in _KEY))
+            if row is None:
+                session.add(UsageRollup(**delta))
+            else:
+                for name in _COUNTERS:
+                    setattr(row, name, getattr(row, name) + delta[name])
+        return
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={name: table.c[name] + stmt.excluded[name] for name in _COUNTERS},
+    )
+    await session.execute(stmt, deltas)
+
+
+async def rebuild_usage_rollups(
+    session_factory: async_sessionmaker[AsyncSession], chunk_size: int = 1000
+) -> int:
+    """Recompute the rollups from ``generation_records``; returns the records counted.
+
+    The rollups are cleared and the highest record id noted in one transaction. Saves
+    that commit afterwards keep updating the rollups themselves, and the scan only
+    covers ids up to that mark, so nothing is counted twice while the service runs.
+    """
+    async with session_factory() as session:
+        await session.execute(delete(UsageRollup))
+        high_water = (await session.execute(select(func.max(GenerationRecord.id)))).scalar()
+        await session.commit()
+    if high_water is None:
+        return 0
+
+    counted = 0
+    last_id = 0
+    while last_id < high_water:
+        async with session_factory() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        GenerationRecord.id,
+                        GenerationRecord.user_id,
+                        GenerationRecord.language,
+                        GenerationRecord.model,
+                        GenerationRecord.token_usage,
+                        GenerationRecord.prompt_tokens,
+                        GenerationRecord.created_at,
+                    )
+                    .where(GenerationRecord.id > last_id, GenerationRecord.id <= high_water)
+                    .order_by(GenerationRecord.id)
+                    .limit(chunk_size)
+                )
+            ).all()
+            if not rows:
+                break
+            await apply_usage(
+                session,
+                (
+                    UsageSample(
+                        row.user_id,
+                        row.language,
+                        row.model,
+                        row.token_usage,
+                        row.prompt_tokens,
+                        row.created_at,
+                    )
+                    for row in rows
+                ),
+            )
+            await session.commit()
+        counted += len(rows)
+        last_id = rows[-1].id
+    return counted
@@ -5,20 +5,41 @@ from collections.abc import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from ...config.settings import get_settings
+from .metrics import PoolMetrics
 
 
 class Database:
-    def __init__(self) -> None:
-        settings = get_settings()
-        self._engine: AsyncEngine = create_async_engine(settings.database_url, echo=False, future=True)
-        self._session_factory = async_sessionmaker(self._engine, expire_on_commit=False)
+    """Engine and session factory, created on first use so importing the app stays cheap."""
+
+    def __init__(self, url: str | None = None) -> None:
+        self._url = url
+        self._engine: AsyncEngine | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self.pool_metrics = PoolMetrics()
+
+    @property
+    def url(self) -> str:
+        return self._url or get_settings().database_url
 
     @property
     def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(self.url, echo=False, future=True)
+            self.pool_metrics.attach(self._engine)
         return self._engine
 
+    @property
+    def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        if self._session_factory is None:
+            self._session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+        return self._session_factory
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+
     async def session(self) -> AsyncIterator[AsyncSession]:
-        async with self._session_factory() as session:
+        async with self.session_factory() as session:
             yield session
 
 
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Mapping
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+
+from ...domain.models.code_generation import CodeGenerationResult
+from ...domain.services.admission import ANONYMOUS_KEY
+
+# Stage latencies range from sub-millisecond validation to multi-second upstream calls.
+STAGE_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(STAGE_BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(STAGE_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    def buckets(self) -> list[tuple[str, float]]:
+        cumulative = 0
+        out: list[tuple[str, float]] = []
+        for bound, count in zip((*map(str, STAGE_BUCKETS), "+Inf"), self.counts):
+            cumulative += count
+            out.append((bound, cumulative))
+        return out
+
+
+class PrometheusMetrics(Collector):
+    """GenerationMetrics exported in the Prometheus text format, one registry per container.
+
+    Observations only touch plain dicts and lists on the event loop (no locks, no label
+    validation), which keeps instrumentation to a few microseconds per request (see
+    ``benchmarks.metrics_overhead``); the Prometheus families are assembled when
+    ``/metrics`` is scraped. Runtime snapshots
+    (DB pool, cache, scheduler) are registered with ``watch``.
+    """
+
+    content_type = CONTENT_TYPE_LATEST
+
+    def __init__(self, registry: CollectorRegistry | None = None, track_users: bool = True) -> None:
+        self.registry = registry or CollectorRegistry()
+        self._track_users = track_users
+        self._stages: dict[str, _Histogram] = {}
+        self._plugins: dict[str, _Histogram] = {}
+        self._tokens: dict[tuple[str, str, str, str], int] = {}
+        self._errors: dict[tuple[str, str], int] = {}
+        self.registry.register(self)
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = _Histogram()
+        histogram.observe(seconds)
+
+    def observe_plugin(self, plugin: str, seconds: float) -> None:
+        histogram = self._plugins.get(plugin)
+        if histogram is None:
+            histogram = self._plugins[plugin] = _Histogram()
+        histogram.observe(seconds)
+
+    def record_tokens(self, result: CodeGenerationResult) -> None:
+        user = (result.request.user_id or ANONYMOUS_KEY) if self._track_users else ""
+        model, language = result.model, result.request.language.value
+        prompt = result.prompt_tokens or result.prompt_tokens_estimate
+        if prompt:
+            key = (model, language, user, "prompt")
+            self._tokens[key] = self._tokens.get(key, 0) + prompt
+        key = (model, language, user, "output")
+        self._tokens[key] = self._tokens.get(key, 0) + result.token_usage
+
+    def record_error(self, stage: str, error: BaseException) -> None:
+        key = (stage, type(error).__name__)
+        self._errors[key] = self._errors.get(key, 0) + 1
+
+    def watch(self, name: str, snapshot: Callable[[], Mapping[str, object]]) -> None:
+        """Export the numeric fields of a ``snapshot()`` as ``codegen_<name>_<field>`` gauges."""
+        self.registry.register(_SnapshotCollector(name, snapshot))
+
+    def render(self) -> bytes:
+        return generate_latest(self.registry)
+
+    def collect(self) -> Iterator[Metric]:
+        yield _histogram_family(
+            "codegen_stage_seconds",
+            "Latency of each GenerateCodeUseCase stage",
+            "stage",
+            self._stages,
+        )
+        yield _histogram_family(
+            "codegen_plugin_seconds", "Latency of each post-processor", "plugin", self._plugins
+        )
+        tokens = CounterMetricFamily(
+            "codegen_tokens",
+            "Tokens consumed by generations",
+            labels=["model", "language", "user", "kind"],
+        )
+        for labels, value in self._tokens.items():
+            tokens.add_metric(labels, value)
+        yield tokens
+        errors = CounterMetricFamily(
+            "codegen_errors",
+            "Errors raised by GenerateCodeUseCase stages",
+            labels=["stage", "type"],
+        )
+        for labels, value in self._errors.items():
+            errors.add_metric(labels, value)
+        yield errors
+
+
+def _histogram_family(
+    name: str, documentation: str, label: str, histograms: Mapping[str, _Histogram]
+) -> HistogramMetricFamily:
+    family = HistogramMetricFamily(name, documentation, labels=[label])
+    for value, histogram in histograms.items():
+        family.add_metric([value], histogram.buckets(), sum_value=histogram.total)
+    return family
+
+
+class _SnapshotCollector(Collector):
+    def __init__(self, name: str, snapshot: Callable[[], Mapping[str, object]]) -> None:
+        self._name = name
+        self._snapshot = snapshot
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        for field, value in self._snapshot().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield GaugeMetricFamily(
+                    f"codegen_{self._name}_{field}", f"{self._name} {field}", value=value
+                )
@@ -1,27 +1,117 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator, Callable
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
-from openai import AsyncOpenAI
+import httpx
 
-from ...config.settings import get_settings
-from ...domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
-from ...domain.services.ports import CodeGenerationProvider
+from ...config.settings import Settings, get_settings
+from ...domain.models.code_generation import (
+    CodeGenerationRequest,
+    CodeGenerationResult,
+    IncompleteGeneration,
+)
+from ...domain.models.deadline import DeadlineExceeded
+from ...domain.services.ports import StreamingCodeGenerationProvider
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, NotGiven
 
-class OpenAICodeGenerationProvider(CodeGenerationProvider):
-    def __init__(self, client: AsyncOpenAI | None = None, model: str | None = None) -> None:
-        settings = get_settings()
-        self._client = client or AsyncOpenAI(api_key=settings.openai_api_key)
-        self._model = model or settings.openai_model
+# The openai SDK costs a few hundred milliseconds to import, so it is only imported once a
+# client is actually built (the first upstream call), not when this module is.
+
+
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Pooled upstream transport shared by every provider for the process lifetime."""
+    return httpx.AsyncClient(
+        http2=settings.openai_http2,
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.openai_timeout_seconds,
+            connect=settings.openai_connect_timeout_seconds,
+        ),
+    )
+
+
+def build_openai_client(
+    settings: Settings,
+    http_client: httpx.AsyncClient,
+    base_url: str | None = None,
+    api_key: str | None = None,
+) -> AsyncOpenAI:
+    from openai import AsyncOpenAI
+
+    # Retries are done by RetryingCodeGenerationProvider, which knows the request deadline.
+    return AsyncOpenAI(
+        api_key=api_key or settings.openai_api_key,
+        base_url=base_url or settings.openai_base_url,
+        http_client=http_client,
+        max_retries=0,
+    )
+
+
+def preload_sdk() -> None:
+    """Import the openai SDK ahead of the first upstream call; run off the event loop."""
+    import openai  # noqa: F401
+    import openai.resources.responses  # noqa: F401  (loaded lazily by ``client.responses``)
+
+
+def is_retryable_error(exc: Exception) -> bool:
+    """Transient upstream failures: connection problems, timeouts, 408/409/429 and 5xx."""
+    import openai
+
+    if isinstance(exc, openai.APIConnectionError):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+class OpenAICodeGenerationProvider(StreamingCodeGenerationProvider):
+    def __init__(
+        self,
+        client: AsyncOpenAI | None = None,
+        model: str | None = None,
+        timeout: float | None = None,
+        client_factory: Callable[[], AsyncOpenAI] | None = None,
+    ) -> None:
+        self._client_instance = client
+        self._client_factory = client_factory or _default_client
+        self._model = model or get_settings().openai_model
+        self._timeout = timeout
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @property
+    def _client(self) -> AsyncOpenAI:
+        if self._client_instance is None:
+            self._client_instance = self._client_factory()
+        return self._client_instance
 
     async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
-        response = await self._client.responses.create(
-            model=self._model,
-            input=request.prompt,
-            max_output_tokens=request.max_tokens,
-            metadata={"language": request.language.value, "user_id": request.user_id},
-        )
+        client = self._client
+        import openai
+
+        try:
+            response = await client.responses.create(
+                model=self._model,
+                input=request.prompt,
+                max_output_tokens=request.max_tokens,
+                metadata={"language": request.language.value, "user_id": request.user_id},
+                timeout=self._timeout_for(request),
+            )
+        except openai.APITimeoutError as exc:
+            # A timeout caused by the capped deadline is the caller's, not a flaky upstream.
+            if request.deadline is not None and request.deadline.expired:
+                raise DeadlineExceeded("Deadline exceeded during upstream call") from exc
+            raise
         output_text = response.output[0].content[0].text  # type: ignore[index]
         token_usage = response.usage.output_tokens  # type: ignore[attr-defined]
         created = datetime.now(timezone.utc)
@@ -31,4 +121,69 @@ class OpenAICodeGenerationProvider(CodeGenerationProvider):
             model=self._model,
             token_usage=token_usage,
             created_at=created,
+            prompt_tokens=response.usage.input_tokens,  # type: ignore[attr-defined]
         )
+
+    async def stream(
+        self, request: CodeGenerationRequest
+    ) -> AsyncIterator[str | CodeGenerationResult]:
+        client = self._client
+        import openai
+
+        try:
+            events = await client.responses.create(
+                model=self._model,
+                input=request.prompt,
+                max_output_tokens=request.max_tokens,
+                metadata={"language": request.language.value, "user_id": request.user_id},
+                stream=True,
+                timeout=self._timeout_for(request),
+            )
+        except openai.APITimeoutError as exc:
+            if request.deadline is not None and request.deadline.expired:
+                raise DeadlineExceeded("Deadline exceeded during upstream call") from exc
+            raise
+        chunks: list[str] = []
+        usage = None
+        async with events:
+            async for event in events:
+                if event.type == "response.output_text.delta":
+                    chunks.append(event.delta)
+                    yield event.delta
+                elif event.type == "response.completed":
+                    usage = event.response.usage
+                elif event.type == "response.failed":
+                    error = event.response.error
+                    reason = error.message if error is not None else "unknown error"
+                    raise IncompleteGeneration(f"Upstream response failed: {reason}")
+                elif event.type == "response.incomplete":
+                    details = event.response.incomplete_details
+                    reason = details.reason if details is not None else "unknown reason"
+                    raise IncompleteGeneration(f"Upstream response incomplete: {reason}")
+                elif event.type == "error":
+                    raise IncompleteGeneration(f"Upstream stream error: {event.message}")
+        if usage is None:
+            # Also covers a connection closed before the completion event arrived.
+            raise IncompleteGeneration("Upstream stream ended before the response completed")
+        yield CodeGenerationResult.new(
+            request=request,
+            code="".join(chunks),
+            model=self._model,
+            token_usage=usage.output_tokens,
+            prompt_tokens=usage.input_tokens,
+        )
+
+    def _timeout_for(self, request: CodeGenerationRequest) -> float | NotGiven:
+        from openai import NOT_GIVEN
+
+        if request.deadline is None:
+            return self._timeout if self._timeout is not None else NOT_GIVEN
+        request.deadline.check("the upstream call")
+        return request.deadline.cap(self._timeout)
+
+
+def _default_client() -> AsyncOpenAI:
+    from openai import AsyncOpenAI
+
+    settings = get_settings()
+    return AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import importlib
+from collections.abc import Sequence
+
+from ...domain.services.plugin_pipeline import Plugin
+
+
+def load_plugins(paths: Sequence[str]) -> list[Plugin]:
+    """Instantiate plugins from ``"package.module:ClassName"`` references."""
+    plugins: list[Plugin] = []
+    for path in paths:
+        module_name, _, attribute = path.partition(":")
+        if not module_name or not attribute:
+            raise ValueError(f"Plugin reference {path!r} must look like 'module:ClassName'")
+        factory = getattr(importlib.import_module(module_name), attribute)
+        plugins.append(factory())
+    return plugins
@@ -1,12 +1,38 @@
 from __future__ import annotations
 
 from ...domain.models.code_generation import CodeGenerationResult
-from ...domain.services.postprocessing import PostProcessor
+from ...domain.services.postprocessing import DeltaProcessor, StreamingPostProcessor
 
 
-class TrimWhitespacePlugin(PostProcessor):
+class _TrimStream(DeltaProcessor):
+    __slots__ = ("_started", "_pending")
+
+    def __init__(self) -> None:
+        self._started = False
+        self._pending = ""
+
+    def feed(self, delta: str) -> str:
+        if not self._started:
+            delta = delta.lstrip()
+            if not delta:
+                return ""
+            self._started = True
+        text = self._pending + delta
+        kept = text.rstrip()
+        self._pending = text[len(kept):]
+        return kept
+
+    def finish(self) -> str:
+        self._pending = ""
+        return "\n"
+
+
+class TrimWhitespacePlugin(StreamingPostProcessor):
     name = "trim-whitespace"
 
     async def run(self, result: CodeGenerationResult) -> CodeGenerationResult:
         result.code = result.code.strip() + "\n"
         return result
+
+    def open_stream(self) -> DeltaProcessor:
+        return _TrimStream()
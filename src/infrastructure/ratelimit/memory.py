@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from ...domain.services.admission import RateLimitBackend
+
+
+@dataclass(slots=True)
+class _Buckets:
+    requests: float
+    tokens: float
+    updated: float
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process token buckets; each key refills continuously at the per-minute rates."""
+
+    _PRUNE_EVERY = 1024
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        request_burst: float | None = None,
+        token_burst: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._request_rate = requests_per_minute / 60
+        self._token_rate = tokens_per_minute / 60
+        self._request_capacity = request_burst or requests_per_minute
+        self._token_capacity = token_burst or tokens_per_minute
+        self._clock = clock
+        self._buckets: dict[str, _Buckets] = {}
+        self._calls = 0
+
+    async def acquire(self, key: str, requests: float, tokens: float) -> float:
+        buckets = self._refill(key)
+        requests = min(requests, self._request_capacity)
+        tokens = min(tokens, self._token_capacity)
+        wait = max(
+            (requests - buckets.requests) / self._request_rate,
+            (tokens - buckets.tokens) / self._token_rate,
+            0.0,
+        )
+        if wait > 0:
+            return wait
+        buckets.requests -= requests
+        buckets.tokens -= tokens
+        self._maybe_prune()
+        return 0.0
+
+    async def refund(self, key: str, tokens: float) -> None:
+        buckets = self._refill(key)
+        buckets.tokens = min(self._token_capacity, buckets.tokens + tokens)
+
+    def _refill(self, key: str) -> _Buckets:
+        now = self._clock()
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            buckets = _Buckets(self._request_capacity, self._token_capacity, now)
+            self._buckets[key] = buckets
+            return buckets
+        elapsed = now - buckets.updated
+        buckets.requests = min(
+            self._request_capacity, buckets.requests + elapsed * self._request_rate
+        )
+        buckets.tokens = min(self._token_capacity, buckets.tokens + elapsed * self._token_rate)
+        buckets.updated = now
+        return buckets
+
+    def _maybe_prune(self) -> None:
+        self._calls += 1
+        if self._calls % self._PRUNE_EVERY:
+            return
+        now = self._clock()
+        idle = max(
+            self._request_capacity / self._request_rate, self._token_capacity / self._token_rate
+        )
+        for key in [key for key, b in self._buckets.items() if now - b.updated >= idle]:
+            del self._buckets[key]
@@ -1,62 +1,316 @@
 from __future__ import annotations
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from collections.abc import AsyncIterator, Sequence
+
+from sqlalchemy import Row, Select, and_, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
 
 from ...domain.models.code_generation import CodeGenerationResult
+from ...domain.models.history import HistoryCursor, HistoryEntry, HistoryPage, HistoryQuery
+from ...domain.models.search import (
+    SearchCursor,
+    SearchHit,
+    SearchPage,
+    SearchQuery,
+    SearchUnavailable,
+)
 from ...domain.services.ports import GenerationRepository
 from ...domain.models.language import ProgrammingLanguage
-from ..db.models import GenerationRecord
+from ..cache.history import HistoryResponseCache
+from ..db.blobs import BodyCodec, EncodedBody, store_blobs
+from ..db.models import ContentBlob, GenerationRecord
+from ..db.rollups import UsageSample, apply_usage
+from ..search.index import SearchDocument, SearchIndex
+from .stored import StoredCodeGenerationRequest, StoredCodeGenerationResult
+
+PromptBlob = aliased(ContentBlob, name="prompt_blob")
+CodeBlob = aliased(ContentBlob, name="code_blob")
 
 
 class SqlAlchemyGenerationRepository(GenerationRepository):
-    def __init__(self, session: AsyncSession) -> None:
-        self._session = session
+    """Opens a short-lived session per operation.
+
+    Sessions are never held across provider calls, so a pooled connection is only
+    checked out for the duration of the actual statement(s). Prompt and code bodies go
+    to the content-addressed ``content_blobs`` table; results read back decode them
+    only when ``prompt``/``code`` is first touched. Usage rollups and, when a
+    ``search_index`` is given, the full-text index are updated in the same transaction
+    as the rows they cover. A ``history_cache`` is invalidated once each save commits.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        codec: BodyCodec | None = None,
+        search_index: SearchIndex | None = None,
+        history_cache: HistoryResponseCache | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._codec = codec or BodyCodec()
+        self._search_index = search_index
+        self._history_cache = history_cache
 
     async def save(self, result: CodeGenerationResult) -> None:
-        record = GenerationRecord(
-            user_id=result.request.user_id,
-            prompt=result.request.prompt,
-            language=result.request.language.value,
-            model=result.model,
-            code=result.code,
-            token_usage=result.token_usage,
-            created_at=result.created_at,
-        )
-        self._session.add(record)
-        await self._session.flush()
-        result.record_id = record.id
-        await self._session.commit()
+        bodies: list[EncodedBody] = []
+        record = record_from_result(result, self._codec, bodies)
+        async with self._session_factory() as session:
+            await store_blobs(session, bodies)
+            session.add(record)
+            await session.flush()
+            await apply_usage(session, [UsageSample.of(result)])
+            result.record_id = record.id
+            await self._index(session, [result])
+            await session.commit()
+        self._invalidate(record)
+
+    async def save_many(self, results: Sequence[CodeGenerationResult]) -> None:
+        if not results:
+            return
+        bodies: list[EncodedBody] = []
+        records = [record_from_result(result, self._codec, bodies) for result in results]
+        async with self._session_factory() as session:
+            await store_blobs(session, bodies)
+            session.add_all(records)
+            await session.flush()
+            await apply_usage(session, map(UsageSample.of, results))
+            for result, record in zip(results, records):
+                result.record_id = record.id
+            await self._index(session, results)
+            await session.commit()
+        self._invalidate(max(records, key=lambda record: record.id))
 
     async def list_recent(self, limit: int = 20) -> list[CodeGenerationResult]:
         stmt = (
-            select(GenerationRecord)
+            select_results()
             .order_by(GenerationRecord.created_at.desc())
             .limit(limit)
         )
-        rows = (await self._session.execute(stmt)).scalars().all()
-        results: list[CodeGenerationResult] = []
-        for row in rows:
-            request = result_request_from_record(row)
-            results.append(
-                CodeGenerationResult(
-                    request=request,
-                    code=row.code,
+        async with self._session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+        return [result_from_row(row) for row in rows]
+
+    async def iter_history(
+        self, query: HistoryQuery, batch_size: int = 500
+    ) -> AsyncIterator[CodeGenerationResult]:
+        """Stream full results through a server-side cursor, ``batch_size`` rows per fetch.
+
+        Unlike the other operations this keeps one session open for the whole iteration,
+        so only exports and other long reads should use it.
+        """
+        stmt = (
+            apply_history_filters(select_results(), query)
+            .order_by(GenerationRecord.created_at.desc(), GenerationRecord.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        if query.limit is not None:
+            stmt = stmt.limit(query.limit)
+        async with self._session_factory() as session:
+            rows = await session.stream(stmt)
+            try:
+                async for partition in rows.partitions():
+                    for row in partition:
+                        yield result_from_row(row)
+            finally:
+                await rows.close()
+
+    async def search(self, query: SearchQuery) -> SearchPage:
+        if self._search_index is None:
+            raise SearchUnavailable("Full-text search is not available for this database")
+        match = self._search_index.match(query.text)
+        limit = query.limit or 20
+        stmt = (
+            select_results()
+            .add_columns(match.score.label("score"))
+            .join(match.source, match.record_id == GenerationRecord.id)
+            .where(match.condition)
+        )
+        if query.user_id is not None:
+            stmt = stmt.where(GenerationRecord.user_id == query.user_id)
+        if query.language is not None:
+            stmt = stmt.where(GenerationRecord.language == query.language.value)
+        if query.model is not None:
+            stmt = stmt.where(GenerationRecord.model == query.model)
+        if query.cursor is not None:
+            # Spelled out rather than a row comparison: the score is a computed expression.
+            stmt = stmt.where(
+                or_(
+                    match.score < query.cursor.score,
+                    and_(
+                        match.score == query.cursor.score,
+                        GenerationRecord.id < query.cursor.record_id,
+                    ),
+                )
+            )
+        stmt = stmt.order_by(match.score.desc(), GenerationRecord.id.desc()).limit(limit + 1)
+        async with self._session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+
+        items = []
+        for row in rows[:limit]:
+            result = result_from_row(row)
+            items.append(
+                SearchHit(
+                    record_id=row.id,
+                    user_id=row.user_id,
+                    language=result.request.language,
                     model=row.model,
                     token_usage=row.token_usage,
                     created_at=row.created_at,
-                    record_id=row.id,
+                    prompt=result.request.prompt,
+                    code=result.code,
+                    score=row.score,
                 )
             )
-        return results
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = SearchCursor(last.score, last.record_id)
+        return SearchPage(items=items, next_cursor=next_cursor)
+
+    async def list_history(self, query: HistoryQuery) -> HistoryPage:
+        limit = query.limit or 20
+        stmt = (
+            apply_history_filters(
+                select(
+                    GenerationRecord.id,
+                    GenerationRecord.user_id,
+                    GenerationRecord.language,
+                    GenerationRecord.model,
+                    GenerationRecord.token_usage,
+                    GenerationRecord.created_at,
+                ),
+                query,
+            )
+            .order_by(GenerationRecord.created_at.desc(), GenerationRecord.id.desc())
+            .limit(limit + 1)
+        )
+        async with self._session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+
+        items = [
+            HistoryEntry(
+                record_id=row.id,
+                user_id=row.user_id,
+                language=ProgrammingLanguage.from_str(row.language),
+                model=row.model,
+                token_usage=row.token_usage,
+                created_at=row.created_at,
+            )
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = HistoryCursor(last.created_at, last.record_id)
+        return HistoryPage(items=items, next_cursor=next_cursor)
+
+    def _invalidate(self, newest: GenerationRecord) -> None:
+        if self._history_cache is not None:
+            self._history_cache.invalidate(newest.id, newest.created_at)
+
+    async def _index(
+        self, session: AsyncSession, results: Sequence[CodeGenerationResult]
+    ) -> None:
+        if self._search_index is not None:
+            await self._search_index.add(
+                session,
+                [
+                    SearchDocument(result.record_id, result.request.prompt, result.code)
+                    for result in results
+                ],
+            )
+
+
+def apply_history_filters(stmt: Select, query: HistoryQuery) -> Select:
+    if query.user_id is not None:
+        stmt = stmt.where(GenerationRecord.user_id == query.user_id)
+    if query.language is not None:
+        stmt = stmt.where(GenerationRecord.language == query.language.value)
+    if query.model is not None:
+        stmt = stmt.where(GenerationRecord.model == query.model)
+    if query.since is not None:
+        stmt = stmt.where(GenerationRecord.created_at >= query.since)
+    if query.until is not None:
+        stmt = stmt.where(GenerationRecord.created_at < query.until)
+    if query.cursor is not None:
+        stmt = stmt.where(
+            tuple_(GenerationRecord.created_at, GenerationRecord.id)
+            < tuple_(query.cursor.created_at, query.cursor.record_id)
+        )
+    return stmt
 
 
-def result_request_from_record(record: GenerationRecord):
-    from ...domain.models.code_generation import CodeGenerationRequest
+def select_results() -> Select:
+    """Plain columns plus still-compressed blob bodies, as read by ``result_from_row``.
 
-    return CodeGenerationRequest(
-        prompt=record.prompt,
-        language=ProgrammingLanguage.from_str(record.language),
-        max_tokens=record.token_usage,
-        user_id=record.user_id,
+    Column rows rather than ORM entities keep streamed reads out of the identity map.
+    """
+    return (
+        select(
+            GenerationRecord.id,
+            GenerationRecord.user_id,
+            GenerationRecord.prompt,
+            GenerationRecord.language,
+            GenerationRecord.model,
+            GenerationRecord.code,
+            GenerationRecord.token_usage,
+            GenerationRecord.prompt_tokens,
+            GenerationRecord.prompt_tokens_estimate,
+            GenerationRecord.created_at,
+            PromptBlob.codec.label("prompt_codec"),
+            PromptBlob.data.label("prompt_data"),
+            CodeBlob.codec.label("code_codec"),
+            CodeBlob.data.label("code_data"),
+        )
+        .outerjoin(PromptBlob, PromptBlob.hash == GenerationRecord.prompt_hash)
+        .outerjoin(CodeBlob, CodeBlob.hash == GenerationRecord.code_hash)
+    )
+
+
+def record_from_result(
+    result: CodeGenerationResult, codec: BodyCodec, bodies: list[EncodedBody]
+) -> GenerationRecord:
+    """Build the row for ``result``, appending its encoded bodies to ``bodies``."""
+    prompt = codec.encode(result.request.prompt)
+    code = codec.encode(result.code)
+    bodies.extend((prompt, code))
+    return GenerationRecord(
+        user_id=result.request.user_id,
+        prompt_hash=prompt.hash,
+        language=result.request.language.value,
+        model=result.model,
+        code_hash=code.hash,
+        token_usage=result.token_usage,
+        prompt_tokens=result.prompt_tokens,
+        prompt_tokens_estimate=result.prompt_tokens_estimate,
+        created_at=result.created_at,
+    )
+
+
+def result_from_row(row: Row) -> StoredCodeGenerationResult:
+    """Rebuild a result from a ``select_results`` row without decompressing anything yet.
+
+    Rows that predate the blob table (no hash yet) keep serving their inline text.
+    """
+    request = StoredCodeGenerationRequest(
+        prompt=row.prompt,
+        language=ProgrammingLanguage.from_str(row.language),
+        max_tokens=row.token_usage,
+        user_id=row.user_id,
+    )
+    if row.prompt_codec is not None:
+        request._prompt_blob = (row.prompt_codec, row.prompt_data)
+    result = StoredCodeGenerationResult(
+        request=request,
+        code=row.code,
+        model=row.model,
+        token_usage=row.token_usage,
+        created_at=row.created_at,
+        record_id=row.id,
+        prompt_tokens=row.prompt_tokens,
+        prompt_tokens_estimate=row.prompt_tokens_estimate,
     )
+    if row.code_codec is not None:
+        result._code_blob = (row.code_codec, row.code_data)
+    return result
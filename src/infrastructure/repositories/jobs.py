@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ...domain.models.job import GenerationJob
+from ...domain.models.language import ProgrammingLanguage
+from ...domain.services.ports import JobRepository
+from ..db.models import GenerationJobRecord
+
+
+class SqlAlchemyJobRepository(JobRepository):
+    """Job state in ``generation_jobs``; status changes are conditional updates, so two
+    workers (or two processes) never run the same job at once."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    async def add(self, job: GenerationJob) -> None:
+        async with self._session_factory() as session:
+            session.add(
+                GenerationJobRecord(
+                    id=job.job_id,
+                    status=job.status,
+                    user_id=job.user_id,
+                    client_address=job.client_address,
+                    prompt=job.prompt,
+                    language=job.language.value,
+                    max_tokens=job.max_tokens,
+                    timeout_ms=job.timeout_ms,
+                    attempts=job.attempts,
+                    created_at=job.created_at,
+                )
+            )
+            await session.commit()
+
+    async def get(self, job_id: str) -> GenerationJob | None:
+        async with self._session_factory() as session:
+            record = await session.get(GenerationJobRecord, job_id)
+            return _to_job(record) if record is not None else None
+
+    async def claim(self, job_id: str) -> GenerationJob | None:
+        async with self._session_factory() as session:
+            claimed = await session.execute(
+                update(GenerationJobRecord)
+                .where(GenerationJobRecord.id == job_id, GenerationJobRecord.status == "queued")
+                .values(
+                    status="running",
+                    attempts=GenerationJobRecord.attempts + 1,
+                    started_at=datetime.now(timezone.utc),
+                )
+            )
+            if claimed.rowcount != 1:
+                await session.rollback()
+                return None
+            record = await session.get(GenerationJobRecord, job_id, populate_existing=True)
+            await session.commit()
+            return _to_job(record)  # type: ignore[arg-type]
+
+    async def finish(self, job: GenerationJob) -> None:
+        async with self._session_factory() as session:
+            await session.execute(
+                update(GenerationJobRecord)
+                .where(GenerationJobRecord.id == job.job_id)
+                .values(
+                    status=job.status,
+                    finished_at=job.finished_at,
+                    record_id=job.record_id,
+                    code=job.code,
+                    model=job.model,
+                    token_usage=job.token_usage,
+                    error=job.error,
+                )
+            )
+            await session.commit()
+
+    async def release(self, job_id: str) -> None:
+        async with self._session_factory() as session:
+            await session.execute(
+                update(GenerationJobRecord)
+                .where(GenerationJobRecord.id == job_id, GenerationJobRecord.status == "running")
+                .values(status="queued", started_at=None)
+            )
+            await session.commit()
+
+    async def resumable(self, started_before: datetime) -> list[str]:
+        async with self._session_factory() as session:
+            await session.execute(
+                update(GenerationJobRecord)
+                .where(
+                    GenerationJobRecord.status == "running",
+                    GenerationJobRecord.started_at < started_before,
+                )
+                .values(status="queued", started_at=None)
+            )
+            await session.commit()
+            rows = await session.execute(
+                select(GenerationJobRecord.id)
+                .where(GenerationJobRecord.status == "queued")
+                .order_by(GenerationJobRecord.created_at, GenerationJobRecord.id)
+            )
+            return list(rows.scalars())
+
+
+def _to_job(record: GenerationJobRecord) -> GenerationJob:
+    return GenerationJob(
+        job_id=record.id,
+        prompt=record.prompt,
+        language=ProgrammingLanguage(record.language),
+        max_tokens=record.max_tokens,
+        user_id=record.user_id,
+        client_address=record.client_address,
+        timeout_ms=record.timeout_ms,
+        status=record.status,  # type: ignore[arg-type]
+        attempts=record.attempts,
+        created_at=record.created_at,
+        started_at=record.started_at,
+        finished_at=record.finished_at,
+        record_id=record.record_id,
+        code=record.code,
+        model=record.model,
+        token_usage=record.token_usage,
+        error=record.error,
+    )
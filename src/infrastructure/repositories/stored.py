@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any
+
+from ...domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from ..db.blobs import decode_body
+
+
+class _LazyBody:
+    """Data descriptor over a slots field that decodes its stored blob on first read.
+
+    The undecoded ``(codec, data)`` pair sits in a side slot; reading the field decodes
+    it once and caches the text in the original slot, assigning replaces it outright.
+    """
+
+    __slots__ = ("_field", "_pending")
+
+    def __init__(self, field: Any, pending: str) -> None:
+        self._field = field
+        self._pending = pending
+
+    def __get__(self, obj: Any, owner: type | None = None) -> Any:
+        if obj is None:
+            return self
+        blob = getattr(obj, self._pending)
+        if blob is not None:
+            self._field.__set__(obj, decode_body(*blob))
+            setattr(obj, self._pending, None)
+        return self._field.__get__(obj, owner)
+
+    def __set__(self, obj: Any, value: str) -> None:
+        self._field.__set__(obj, value)
+        setattr(obj, self._pending, None)
+
+
+class StoredCodeGenerationRequest(CodeGenerationRequest):
+    """A request read back from storage whose ``prompt`` is decompressed on access."""
+
+    __slots__ = ("_prompt_blob",)
+
+    prompt = _LazyBody(CodeGenerationRequest.__dict__["prompt"], "_prompt_blob")
+
+
+class StoredCodeGenerationResult(CodeGenerationResult):
+    """A result read back from storage whose ``code`` is decompressed on access."""
+
+    __slots__ = ("_code_blob",)
+
+    code = _LazyBody(CodeGenerationResult.__dict__["code"], "_code_blob")
+
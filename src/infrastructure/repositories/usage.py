@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ...domain.models.language import ProgrammingLanguage
+from ...domain.models.usage import UsageBucket, UsageQuery, bucket_start
+from ...domain.services.ports import UsageRepository
+from ..db.models import UsageRollup
+
+_DIMENSIONS = {
+    "user": UsageRollup.user_id,
+    "language": UsageRollup.language,
+    "model": UsageRollup.model,
+}
+
+
+class SqlAlchemyUsageRepository(UsageRepository):
+    """Answers usage queries from ``usage_rollups`` without touching generation rows."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    async def usage(self, query: UsageQuery) -> list[UsageBucket]:
+        dimensions = [_DIMENSIONS[name] for name in query.group_by]
+        stmt = (
+            select(
+                UsageRollup.bucket_start,
+                *dimensions,
+                func.sum(UsageRollup.requests).label("requests"),
+                func.sum(UsageRollup.token_usage).label("token_usage"),
+                func.sum(UsageRollup.prompt_tokens).label("prompt_tokens"),
+            )
+            .where(UsageRollup.granularity == query.granularity)
+            .group_by(UsageRollup.bucket_start, *dimensions)
+            .order_by(UsageRollup.bucket_start, *dimensions)
+        )
+        if query.since is not None:
+            stmt = stmt.where(
+                UsageRollup.bucket_start >= bucket_start(query.since, query.granularity)
+            )
+        if query.until is not None:
+            stmt = stmt.where(UsageRollup.bucket_start < query.until)
+        if query.user_id is not None:
+            stmt = stmt.where(UsageRollup.user_id == query.user_id)
+        if query.language is not None:
+            stmt = stmt.where(UsageRollup.language == query.language.value)
+        if query.model is not None:
+            stmt = stmt.where(UsageRollup.model == query.model)
+
+        async with self._session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+        return [
+            UsageBucket(
+                bucket_start=bucket_start(row.bucket_start, query.granularity),
+                requests=row.requests,
+                token_usage=row.token_usage,
+                prompt_tokens=row.prompt_tokens,
+                user_id=(row.user_id or None) if "user" in query.group_by else None,
+                language=(
+                    ProgrammingLanguage.from_str(row.language)
+                    if "language" in query.group_by
+                    else None
+                ),
+                model=row.model if "model" in query.group_by else None,
+            )
+            for row in rows
+        ]
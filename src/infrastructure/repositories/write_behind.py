@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass, field
+
+from ...domain.models.code_generation import CodeGenerationResult
+from ...domain.models.history import HistoryPage, HistoryQuery
+from ...domain.models.search import SearchPage, SearchQuery
+from ...domain.services.audit import AuditEvent, AuditSink
+from ...domain.services.ports import GenerationRepository
+from .generation import SqlAlchemyGenerationRepository
+
+
+@dataclass(slots=True)
+class PendingSave:
+    """Handle for a queued write; await ``record_id()`` to get the id once flushed."""
+
+    result: CodeGenerationResult
+    future: asyncio.Future[int] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+    async def record_id(self) -> int:
+        return await asyncio.shield(self.future)
+
+
+@dataclass(slots=True)
+class WriteBehindStats:
+    enqueued: int = 0
+    flushed: int = 0
+    batches: int = 0
+    failed: int = 0
+
+
+class WriteBehindGenerationRepository(GenerationRepository):
+    """Queues results and persists them from a background task in multi-row batches.
+
+    ``save`` returns as soon as the result is queued; it blocks only while the
+    queue is full. ``result.record_id`` is filled in once the batch commits.
+
+    With an ``audit`` sink the generation events are recorded here, after each batch,
+    so they carry the record ids (``audits_saves`` tells callers not to record them).
+    """
+
+    def __init__(
+        self,
+        inner: SqlAlchemyGenerationRepository,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        audit: AuditSink | None = None,
+    ) -> None:
+        self._inner = inner
+        self._audit = audit
+        self._queue: asyncio.Queue[PendingSave | None] = asyncio.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+        self.stats = WriteBehindStats()
+
+    @property
+    def audits_saves(self) -> bool:
+        return self._audit is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting writes and flush everything already queued."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await self._queue.put(None)
+        await self._task
+
+    async def enqueue(self, result: CodeGenerationResult) -> PendingSave:
+        if self._closed:
+            raise RuntimeError("Write-behind repository is stopped")
+        pending = PendingSave(result)
+        await self._queue.put(pending)
+        self.stats.enqueued += 1
+        return pending
+
+    async def save(self, result: CodeGenerationResult) -> None:
+        await self.enqueue(result)
+
+    async def save_many(self, results: Sequence[CodeGenerationResult]) -> None:
+        for result in results:
+            await self.enqueue(result)
+
+    async def list_recent(self, limit: int = 20) -> list[CodeGenerationResult]:
+        return await self._inner.list_recent(limit=limit)
+
+    async def list_history(self, query: HistoryQuery) -> HistoryPage:
+        return await self._inner.list_history(query)
+
+    def iter_history(
+        self, query: HistoryQuery, batch_size: int = 500
+    ) -> AsyncIterator[CodeGenerationResult]:
+        return self._inner.iter_history(query, batch_size=batch_size)
+
+    async def search(self, query: SearchQuery) -> SearchPage:
+        return await self._inner.search(query)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.stats.enqueued,
+            "flushed": self.stats.flushed,
+            "batches": self.stats.batches,
+            "failed": self.stats.failed,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+        await self._drain()
+
+    async def _drain(self) -> None:
+        # Producers that were blocked on a full queue when stop() ran can land after the
+        # sentinel. Each get wakes one of them, so yield before checking for more and
+        # stop only once a pass finds the queue empty.
+        while True:
+            await asyncio.sleep(0)
+            if self._queue.empty():
+                return
+            batch: list[PendingSave] = []
+            while len(batch) < self._batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list[PendingSave]) -> None:
+        try:
+            await self._inner.save_many([pending.result for pending in batch])
+        except Exception as exc:
+            self.stats.failed += len(batch)
+            for pending in batch:
+                pending.future.set_exception(exc)
+        else:
+            self.stats.batches += 1
+            self.stats.flushed += len(batch)
+            for pending in batch:
+                pending.future.set_result(pending.result.record_id)  # type: ignore[arg-type]
+        if self._audit is not None:
+            # Failed writes are still audited, without a record id, as before write-behind.
+            for pending in batch:
+                await self._audit.record(AuditEvent.generation(pending.result))
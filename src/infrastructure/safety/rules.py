@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from ...domain.services.safety import SafetyGate, SafetyRule
+
+
+def load_safety_gates(path: str | Path) -> list[SafetyGate]:
+    """Read gates from a JSON file mapping gate names to rule lists.
+
+    Each rule is an object with ``id`` and ``pattern`` and optional ``regex``
+    (default false, i.e. a case-insensitive literal) and ``message``::
+
+        {"RB-SECRET": [{"id": "aws-key", "pattern": "AKIA[0-9A-Z]{16}", "regex": true}]}
+    """
+    document = json.loads(Path(path).read_text(encoding="utf-8"))
+    gates: list[SafetyGate] = []
+    for gate_name, entries in document.items():
+        rules = tuple(
+            SafetyRule(
+                gate=gate_name,
+                rule_id=str(entry["id"]),
+                pattern=str(entry["pattern"]),
+                regex=bool(entry.get("regex", False)),
+                message=entry.get("message"),
+            )
+            for entry in entries
+        )
+        gates.append(SafetyGate(gate_name, rules))
+    return gates
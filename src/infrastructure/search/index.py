@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from typing import NamedTuple, Protocol
+
+from sqlalchemy import (
+    ColumnElement,
+    FromClause,
+    column,
+    exists,
+    func,
+    literal,
+    literal_column,
+    table,
+    text,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchDocument(NamedTuple):
+    record_id: int
+    prompt: str
+    code: str
+
+
+class Match(NamedTuple):
+    """What a text query contributes to a search statement.
+
+    ``source`` is joined on ``record_id == generation_records.id`` and filtered by
+    ``condition``; higher ``score`` is more relevant on every backend.
+    """
+
+    source: FromClause
+    record_id: ColumnElement[int]
+    score: ColumnElement[float]
+    condition: ColumnElement[bool]
+
+
+class SearchIndex(Protocol):
+    async def create_schema(self, conn: AsyncConnection) -> None:
+        ...
+
+    async def add(self, session: AsyncSession, documents: Sequence[SearchDocument]) -> None:
+        """Index freshly inserted records inside the caller's transaction."""
+        ...
+
+    def match(self, text: str) -> Match:
+        """Raises ValueError when ``text`` holds nothing searchable."""
+        ...
+
+    def contains(self, record_id: ColumnElement[int]) -> ColumnElement[bool]:
+        """Whether ``record_id`` is indexed, for finding records a backfill still needs."""
+        ...
+
+
+class SqliteFtsIndex:
+    """FTS5 contentless table: bodies already live in ``content_blobs``, only the
+    inverted index is stored here, and ``rowid`` is the generation record id."""
+
+    _table = table("generation_search", column("rowid"))
+
+    async def create_schema(self, conn: AsyncConnection) -> None:
+        await conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS generation_search"
+            " USING fts5(prompt, code, content='', tokenize='unicode61')"
+        )
+
+    async def add(self, session: AsyncSession, documents: Sequence[SearchDocument]) -> None:
+        if documents:
+            await session.execute(
+                text(
+                    "INSERT INTO generation_search (rowid, prompt, code)"
+                    " VALUES (:record_id, :prompt, :code)"
+                ),
+                [document._asdict() for document in documents],
+            )
+
+    def match(self, text: str) -> Match:
+        terms = _WORD.findall(text)
+        if not terms:
+            raise ValueError("Search query has no searchable terms")
+        # Quoting every term keeps FTS5 operators and punctuation in user input inert.
+        expression = " ".join(f'"{term}"' for term in terms)
+        source = self._table
+        return Match(
+            source=source,
+            record_id=source.c.rowid,
+            score=-func.bm25(literal_column("generation_search")),
+            condition=literal_column("generation_search").op("MATCH")(expression),
+        )
+
+    def contains(self, record_id: ColumnElement[int]) -> ColumnElement[bool]:
+        # A rowid equality is answered from the FTS5 docsize table, one lookup per record.
+        return exists().where(self._table.c.rowid == record_id)
+
+
+class PostgresTsvectorIndex:
+    """``tsvector`` per record behind a GIN index; prompt terms outrank code terms."""
+
+    _table = table("generation_search", column("record_id"), column("document"))
+
+    def __init__(self, config: str = "english") -> None:
+        self._config = config
+
+    async def create_schema(self, conn: AsyncConnection) -> None:
+        await conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS generation_search ("
+            " record_id INTEGER PRIMARY KEY REFERENCES generation_records (id),"
+            " document TSVECTOR NOT NULL)"
+        )
+        await conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_generation_search_document"
+            " ON generation_search USING GIN (document)"
+        )
+
+    async def add(self, session: AsyncSession, documents: Sequence[SearchDocument]) -> None:
+        if documents:
+            await session.execute(
+                text(
+                    "INSERT INTO generation_search (record_id, document) VALUES (:record_id,"
+                    " setweight(to_tsvector(CAST(:config AS regconfig), :prompt), 'A')"
+                    " || setweight(to_tsvector(CAST(:config AS regconfig), :code), 'B'))"
+                    " ON CONFLICT (record_id) DO NOTHING"
+                ),
+                [{**document._asdict(), "config": self._config} for document in documents],
+            )
+
+    def match(self, text: str) -> Match:
+        if not _WORD.search(text):
+            raise ValueError("Search query has no searchable terms")
+        source = self._table
+        query = func.websearch_to_tsquery(literal(self._config).cast(REGCONFIG), text)
+        return Match(
+            source=source,
+            record_id=source.c.record_id,
+            score=func.ts_rank_cd(source.c.document, query),
+            condition=source.c.document.op("@@")(query),
+        )
+
+    def contains(self, record_id: ColumnElement[int]) -> ColumnElement[bool]:
+        return exists().where(self._table.c.record_id == record_id)
+
+
+def search_index_for(database_url: str) -> SearchIndex | None:
+    """Pick the full-text backend matching ``database_url``; None if it has none."""
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        return SqliteFtsIndex()
+    if backend == "postgresql":
+        return PostgresTsvectorIndex()
+    return None
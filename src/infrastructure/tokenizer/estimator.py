@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import importlib.util
+import math
+import re
+from functools import lru_cache
+from typing import Any
+
+from ...domain.services.ports import TokenEstimator
+
+# tiktoken is an optional dependency, installed with the "tokenizer" extra. It is imported on
+# the first count rather than at module import, to keep startup fast.
+
+MODEL_CONTEXT_WINDOWS: dict[str, int] = {
+    "gpt-4.1": 1_047_576,
+    "gpt-4o": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4-mini": 200_000,
+}
+
+_WORD_OR_SYMBOL = re.compile(r"\w+|[^\w\s]")
+
+
+def context_window_for(model: str) -> int | None:
+    """Longest known model-name prefix wins, so ``gpt-4.1-mini`` maps to ``gpt-4.1``."""
+    matches = [name for name in MODEL_CONTEXT_WINDOWS if model.startswith(name)]
+    if not matches:
+        return None
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+class HeuristicTokenEstimator(TokenEstimator):
+    """Tokenizer-free approximation: BPE vocabularies average ~4 characters per token,
+    but never fewer tokens than words plus punctuation marks."""
+
+    def count(self, text: str, model: str) -> int:
+        return _approximate(text)
+
+
+@lru_cache(maxsize=4096)
+def _approximate(text: str) -> int:
+    pieces = len(_WORD_OR_SYMBOL.findall(text))
+    return max(math.ceil(len(text) / 4), pieces)
+
+
+class TiktokenEstimator(TokenEstimator):
+    def __init__(self, fallback_encoding: str = "o200k_base") -> None:
+        if not _tiktoken_available():
+            raise RuntimeError("tiktoken is not installed")
+        self._fallback_encoding = fallback_encoding
+
+    def count(self, text: str, model: str) -> int:
+        encoding = _encoding_for(model, self._fallback_encoding)
+        return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=32)
+def _encoding_for(model: str, fallback_encoding: str) -> Any:
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(fallback_encoding)
+
+
+def _tiktoken_available() -> bool:
+    return importlib.util.find_spec("tiktoken") is not None
+
+
+def build_token_estimator() -> TokenEstimator:
+    if _tiktoken_available():
+        return TiktokenEstimator()
+    return HeuristicTokenEstimator()
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import httpx
+
+from ...application.use_cases.generate_code import GenerateCodeUseCase
+from ...application.use_cases.generation_jobs import GenerationJobRunner
+from ...config.settings import Settings
+from ...domain.services.admission import RateLimiter
+from ...domain.services.audit import AuditSink, NullAuditSink
+from ...domain.services.coalescing import RequestCoalescer
+from ...domain.services.metrics import GenerationMetrics, NullMetrics
+from ...domain.services.ports import (
+    CodeGenerationProvider,
+    GenerationRepository,
+    UsageRepository,
+)
+from ...domain.services.plugin_pipeline import Plugin, PluginPipeline
+from ...domain.services.retry import RetryingCodeGenerationProvider, RetryPolicy
+from ...domain.services.routing import (
+    CircuitBreaker,
+    RoutedBackend,
+    RoutingCodeGenerationProvider,
+)
+from ...domain.services.safety import SafetyGate, SafetyOrchestrator
+from ...domain.services.scheduling import FairScheduler, ScheduledCodeGenerationProvider
+from ...domain.services.token_policy import TokenPolicy
+from ...infrastructure.audit.buffer import BufferedAuditSink
+from ...infrastructure.cache.generation import (
+    CachingCodeGenerationProvider,
+    GenerationResultCache,
+)
+from ...infrastructure.cache.history import HistoryResponseCache
+from ...infrastructure.db.blobs import BodyCodec
+from ...infrastructure.db.session import Database
+from ...infrastructure.metrics.prometheus import PrometheusMetrics
+from ...infrastructure.openai.client import (
+    OpenAICodeGenerationProvider,
+    build_http_client,
+    build_openai_client,
+    is_retryable_error,
+    preload_sdk,
+)
+from ...infrastructure.plugins.loader import load_plugins
+from ...infrastructure.plugins.trim_plugin import TrimWhitespacePlugin
+from ...infrastructure.ratelimit.memory import InMemoryRateLimitBackend
+from ...infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from ...infrastructure.repositories.jobs import SqlAlchemyJobRepository
+from ...infrastructure.repositories.usage import SqlAlchemyUsageRepository
+from ...infrastructure.repositories.write_behind import WriteBehindGenerationRepository
+from ...infrastructure.search.index import search_index_for
+from ...infrastructure.safety.rules import load_safety_gates
+from ...infrastructure.tokenizer.estimator import build_token_estimator, context_window_for
+
+
+@dataclass(slots=True)
+class ServiceContainer:
+    """Stateless services built once in ``lifespan`` and shared by every request."""
+
+    settings: Settings
+    database: Database
+    http_client: httpx.AsyncClient
+    provider: CodeGenerationProvider
+    repository: GenerationRepository
+    usage: UsageRepository
+    safety: SafetyOrchestrator
+    token_policy: TokenPolicy
+    plugins: tuple[Plugin, ...]
+    pipeline: PluginPipeline
+    process_pool: ProcessPoolExecutor | None
+    result_cache: GenerationResultCache
+    coalescer: RequestCoalescer
+    scheduler: FairScheduler
+    router: RoutingCodeGenerationProvider | None
+    retries: RetryingCodeGenerationProvider
+    metrics: GenerationMetrics
+    rate_limiter: RateLimiter | None
+    audit: AuditSink
+    history_cache: HistoryResponseCache | None = None
+    jobs: GenerationJobRunner | None = None
+    sdk_preload: asyncio.Future[None] | None = None
+
+    @classmethod
+    def build(cls, settings: Settings, database: Database) -> ServiceContainer:
+        http_client = build_http_client(settings)
+        scheduler = FairScheduler(
+            slots=settings.upstream_max_concurrency,
+            weights=settings.scheduler_weights,
+            priorities=settings.scheduler_priorities,
+            max_wait=settings.scheduler_max_queue_wait_seconds,
+        )
+        upstream: CodeGenerationProvider = OpenAICodeGenerationProvider(
+            client_factory=partial(build_openai_client, settings, http_client),
+            model=settings.openai_model,
+            timeout=settings.openai_timeout_seconds,
+        )
+        router = _build_router(settings, http_client, upstream, scheduler)
+        # Each upstream attempt holds its own scheduler slot: the router schedules every
+        # backend call, hedges included. Retries sit outside the scheduler so backoff
+        # sleeps do not hold a slot.
+        retries = RetryingCodeGenerationProvider(
+            router or ScheduledCodeGenerationProvider(upstream, scheduler),
+            RetryPolicy(
+                max_attempts=settings.openai_max_retries + 1,
+                base_delay=settings.retry_base_delay_ms / 1000,
+                max_delay=settings.retry_max_delay_ms / 1000,
+                min_attempt=settings.retry_min_attempt_ms / 1000,
+            ),
+            is_retryable=is_retryable_error,
+        )
+        provider: CodeGenerationProvider = retries
+        result_cache = GenerationResultCache(
+            max_entries=settings.cache_max_entries,
+            ttl_seconds=settings.cache_ttl_seconds,
+            session_factory=database.session_factory if settings.cache_db_enabled else None,
+        )
+        if settings.cache_enabled:
+            provider = CachingCodeGenerationProvider(provider, result_cache, settings.openai_model)
+        history_cache = None
+        if settings.history_cache_enabled:
+            history_cache = HistoryResponseCache(
+                database.session_factory,
+                max_entries=settings.history_cache_max_entries,
+                revalidate_after=settings.history_cache_revalidate_seconds,
+            )
+        repository: GenerationRepository = SqlAlchemyGenerationRepository(
+            database.session_factory,
+            BodyCodec(settings.blob_compression, settings.blob_compress_min_bytes),
+            search_index=search_index_for(settings.database_url),
+            history_cache=history_cache,
+        )
+        audit: AuditSink = (
+            BufferedAuditSink(
+                database.session_factory,
+                capacity=settings.audit_buffer_size,
+                batch_size=settings.audit_batch_size,
+                flush_interval=settings.audit_flush_interval_ms / 1000,
+                overflow=settings.audit_overflow,
+            )
+            if settings.audit_enabled
+            else NullAuditSink()
+        )
+        if settings.write_behind_enabled:
+            repository = WriteBehindGenerationRepository(
+                repository,
+                max_queue=settings.write_behind_queue_size,
+                batch_size=settings.write_behind_batch_size,
+                flush_interval=settings.write_behind_flush_interval_ms / 1000,
+                audit=audit,
+            )
+        plugins = (TrimWhitespacePlugin(), *load_plugins(settings.plugin_paths))
+        process_pool = None
+        if any(getattr(plugin, "execution", "async") == "cpu" for plugin in plugins):
+            process_pool = ProcessPoolExecutor(max_workers=settings.plugin_process_workers)
+        container = cls(
+            settings=settings,
+            database=database,
+            http_client=http_client,
+            provider=provider,
+            repository=repository,
+            usage=SqlAlchemyUsageRepository(database.session_factory),
+            safety=SafetyOrchestrator(_safety_gates(settings)),
+            token_policy=TokenPolicy(
+                settings.max_tokens_limit,
+                model=settings.openai_model,
+                context_window=(
+                    settings.openai_context_window or context_window_for(settings.openai_model)
+                ),
+                estimator=build_token_estimator(),
+                overflow=settings.token_overflow,
+                min_output_tokens=settings.min_output_tokens,
+            ),
+            plugins=plugins,
+            pipeline=PluginPipeline(plugins, process_pool=process_pool),
+            process_pool=process_pool,
+            result_cache=result_cache,
+            history_cache=history_cache,
+            coalescer=RequestCoalescer(namespace=settings.openai_model),
+            scheduler=scheduler,
+            router=router,
+            retries=retries,
+            rate_limiter=(
+                RateLimiter(
+                    InMemoryRateLimitBackend(
+                        requests_per_minute=settings.rate_limit_requests_per_minute,
+                        tokens_per_minute=settings.rate_limit_tokens_per_minute,
+                    )
+                )
+                if settings.rate_limit_enabled
+                else None
+            ),
+            metrics=NullMetrics(),
+            audit=audit,
+        )
+        if settings.metrics_enabled:
+            container.metrics = _prometheus_metrics(container)
+        if settings.jobs_enabled:
+            container.jobs = GenerationJobRunner(
+                container.generate_use_case(),
+                SqlAlchemyJobRepository(database.session_factory),
+                workers=settings.jobs_workers,
+                max_pending=settings.jobs_max_pending,
+                stale_after=settings.jobs_stale_after_seconds,
+                max_wait=settings.jobs_max_wait_seconds,
+            )
+            if isinstance(container.metrics, PrometheusMetrics):
+                container.metrics.watch("jobs", container.jobs.snapshot)
+        return container
+
+    def generate_use_case(self) -> GenerateCodeUseCase:
+        return GenerateCodeUseCase(
+            self.provider,
+            self.repository,
+            self.safety,
+            self.token_policy,
+            self.plugins,
+            coalescer=self.coalescer,
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            pipeline=self.pipeline,
+            audit=self.audit,
+        )
+
+    def start(self) -> None:
+        if isinstance(self.repository, WriteBehindGenerationRepository):
+            self.repository.start()
+        if isinstance(self.audit, BufferedAuditSink):
+            self.audit.start()
+        if self.jobs is not None:
+            self.jobs.start()
+        if self.settings.openai_preload_sdk:
+            # Startup does not wait for the SDK import; it finishes in a worker thread while
+            # the app already answers, so the first generation does not pay for it either.
+            self.sdk_preload = asyncio.ensure_future(asyncio.to_thread(preload_sdk))
+
+    async def aclose(self) -> None:
+        if self.sdk_preload is not None:
+            await self.sdk_preload
+        if self.jobs is not None:
+            await self.jobs.stop()
+        if isinstance(self.repository, WriteBehindGenerationRepository):
+            await self.repository.stop()
+        if isinstance(self.audit, BufferedAuditSink):
+            await self.audit.stop()
+        await self.http_client.aclose()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _prometheus_metrics(container: ServiceContainer) -> PrometheusMetrics:
+    metrics = PrometheusMetrics(track_users=container.settings.metrics_track_users)
+    metrics.watch("db_pool", container.database.pool_metrics.snapshot)
+    metrics.watch("cache", container.result_cache.snapshot)
+    if container.history_cache is not None:
+        metrics.watch("history_cache", container.history_cache.snapshot)
+    metrics.watch("coalescing", container.coalescer.snapshot)
+    metrics.watch("upstream", container.scheduler.snapshot)
+    metrics.watch("retries", container.retries.snapshot)
+    if isinstance(container.repository, WriteBehindGenerationRepository):
+        metrics.watch("write_behind", container.repository.snapshot)
+    if isinstance(container.audit, BufferedAuditSink):
+        metrics.watch("audit", container.audit.snapshot)
+    return metrics
+
+
+def _safety_gates(settings: Settings) -> list[SafetyGate]:
+    if settings.safety_rules_path:
+        return load_safety_gates(settings.safety_rules_path)
+    return [SafetyGate("RB-SECRET"), SafetyGate("RB-DRIFT")]
+
+
+def _build_router(
+    settings: Settings,
+    http_client: httpx.AsyncClient,
+    primary: CodeGenerationProvider,
+    scheduler: FairScheduler,
+) -> RoutingCodeGenerationProvider | None:
+    if not settings.routing_backends:
+        return None
+    backends = [
+        RoutedBackend(
+            settings.openai_model,
+            ScheduledCodeGenerationProvider(primary, scheduler),
+            cost=settings.openai_model_cost,
+        )
+    ]
+    for backend in settings.routing_backends:
+        backends.append(
+            RoutedBackend(
+                f"{backend.model}@{backend.base_url}" if backend.base_url else backend.model,
+                ScheduledCodeGenerationProvider(
+                    OpenAICodeGenerationProvider(
+                        client_factory=partial(
+                            build_openai_client,
+                            settings,
+                            http_client,
+                            base_url=backend.base_url,
+                            api_key=backend.api_key,
+                        ),
+                        model=backend.model,
+                        timeout=settings.openai_timeout_seconds,
+                    ),
+                    scheduler,
+                ),
+                cost=backend.cost,
+            )
+        )
+    for backend in backends:
+        backend.breaker = CircuitBreaker(
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            reset_timeout=settings.circuit_breaker_reset_seconds,
+        )
+    return RoutingCodeGenerationProvider(
+        backends,
+        hedge_percentile=settings.routing_hedge_percentile,
+        min_samples=settings.routing_min_samples,
+        load_threshold=settings.routing_load_threshold,
+    )
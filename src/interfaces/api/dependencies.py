@@ -1,40 +1,81 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
-
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, Request, status
 
+from ...application.use_cases.export_history import ExportHistoryUseCase
+from ...application.use_cases.generate_batch import GenerateBatchUseCase
 from ...application.use_cases.generate_code import GenerateCodeUseCase
+from ...application.use_cases.generation_jobs import GenerationJobRunner
 from ...application.use_cases.get_history import GetHistoryUseCase
-from ...config.settings import get_settings
-from ...domain.services.safety import SafetyGate, SafetyOrchestrator
-from ...domain.services.token_policy import TokenPolicy
-from ...infrastructure.db.session import db
-from ...infrastructure.openai.client import OpenAICodeGenerationProvider
-from ...infrastructure.plugins.trim_plugin import TrimWhitespacePlugin
-from ...infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from ...application.use_cases.get_usage import GetUsageUseCase
+from ...application.use_cases.search_history import SearchHistoryUseCase
+from ...infrastructure.cache.history import HistoryResponseCache
+from .container import ServiceContainer
 
 
-async def get_session() -> AsyncIterator[AsyncSession]:
-    async for session in db.session():
-        yield session
+def get_container(request: Request) -> ServiceContainer:
+    return request.app.state.container
 
 
 def get_generate_use_case(
-    session: AsyncSession = Depends(get_session),
+    container: ServiceContainer = Depends(get_container),
 ) -> GenerateCodeUseCase:
-    settings = get_settings()
-    repository = SqlAlchemyGenerationRepository(session)
-    safety = SafetyOrchestrator([SafetyGate("RB-SECRET"), SafetyGate("RB-DRIFT")])
-    token_policy = TokenPolicy(settings.max_tokens_limit)
-    provider = OpenAICodeGenerationProvider()
-    plugins = (TrimWhitespacePlugin(),)
-    return GenerateCodeUseCase(provider, repository, safety, token_policy, plugins)
+    return container.generate_use_case()
+
+
+def get_generate_batch_use_case(
+    use_case: GenerateCodeUseCase = Depends(get_generate_use_case),
+    container: ServiceContainer = Depends(get_container),
+) -> GenerateBatchUseCase:
+    settings = container.settings
+    return GenerateBatchUseCase(
+        use_case,
+        concurrency=settings.batch_concurrency,
+        max_items=settings.batch_max_items,
+    )
 
 
 def get_history_use_case(
-    session: AsyncSession = Depends(get_session),
+    container: ServiceContainer = Depends(get_container),
 ) -> GetHistoryUseCase:
-    repository = SqlAlchemyGenerationRepository(session)
-    return GetHistoryUseCase(repository)
+    return GetHistoryUseCase(
+        container.repository,
+        default_limit=container.settings.history_limit,
+        max_limit=container.settings.history_max_limit,
+    )
+
+
+def get_history_cache(
+    container: ServiceContainer = Depends(get_container),
+) -> HistoryResponseCache | None:
+    return container.history_cache
+
+
+def get_search_history_use_case(
+    container: ServiceContainer = Depends(get_container),
+) -> SearchHistoryUseCase:
+    return SearchHistoryUseCase(
+        container.repository,
+        default_limit=container.settings.history_limit,
+        max_limit=container.settings.history_max_limit,
+    )
+
+
+def get_export_history_use_case(
+    container: ServiceContainer = Depends(get_container),
+) -> ExportHistoryUseCase:
+    return ExportHistoryUseCase(
+        container.repository, batch_size=container.settings.history_export_batch_size
+    )
+
+
+def get_usage_use_case(
+    container: ServiceContainer = Depends(get_container),
+) -> GetUsageUseCase:
+    return GetUsageUseCase(container.usage, max_buckets=container.settings.usage_max_buckets)
+
+
+def get_job_runner(container: ServiceContainer = Depends(get_container)) -> GenerationJobRunner:
+    if container.jobs is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Jobs are disabled")
+    return container.jobs
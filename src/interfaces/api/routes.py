@@ -1,69 +1,564 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+import math
+from collections.abc import AsyncIterator, Awaitable
+from datetime import datetime, timezone
+from typing import Any, Optional, TypeVar
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 
 from ...application.dto.generation import (
+    BatchGeneratePayload,
+    BatchGenerateResponse,
+    BatchItemResult,
     GenerateCodePayload,
     GeneratedCode,
+    GenerationJobResponse,
     HistoryItem,
     HistoryResponse,
+    JobResult,
+    PluginTiming,
+    SearchHitItem,
+    SearchResponse,
+    UsageItem,
+    UsageResponse,
 )
+from ...application.use_cases.export_history import ExportHistoryUseCase
+from ...application.use_cases.generate_batch import BatchLimitExceeded, GenerateBatchUseCase
 from ...application.use_cases.generate_code import GenerateCodeUseCase
+from ...application.use_cases.generation_jobs import GenerationJobRunner
 from ...application.use_cases.get_history import GetHistoryUseCase
-from ...domain.models.code_generation import CodeGenerationRequest
+from ...application.use_cases.get_usage import GetUsageUseCase, UsageRangeTooLarge
+from ...application.use_cases.search_history import SearchHistoryUseCase
+from ...domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from ...domain.models.deadline import Deadline, DeadlineExceeded
+from ...domain.models.history import HistoryCursor, HistoryPage, HistoryQuery
+from ...domain.models.job import GenerationJob, JobNotFound, JobQueueFull
+from ...domain.models.language import ProgrammingLanguage
+from ...domain.models.search import SearchCursor, SearchQuery, SearchUnavailable
+from ...domain.models.usage import Granularity, UsageDimension, UsageQuery
+from ...domain.services.admission import RateLimitExceeded
+from ...domain.services.audit import AuditEvent
+from ...domain.services.plugin_pipeline import PluginTimeout
 from ...domain.services.safety import SafetyViolation
 from ...domain.services.token_policy import TokenLimitExceeded
-from .dependencies import get_generate_use_case, get_history_use_case
+from ...infrastructure.audit.buffer import BufferedAuditSink
+from ...infrastructure.cache.history import HistoryResponseCache
+from ...infrastructure.metrics.prometheus import PrometheusMetrics
+from ...infrastructure.repositories.write_behind import WriteBehindGenerationRepository
+from .container import ServiceContainer
+from .dependencies import (
+    get_container,
+    get_export_history_use_case,
+    get_generate_batch_use_case,
+    get_generate_use_case,
+    get_history_cache,
+    get_history_use_case,
+    get_job_runner,
+    get_search_history_use_case,
+    get_usage_use_case,
+)
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+DISCONNECT_POLL_SECONDS = 0.25
+HTTP_499_CLIENT_CLOSED_REQUEST = 499
+
 
 @router.get("/health", tags=["ops"])
 async def health() -> dict[str, str]:
     return {"status": "green"}
 
 
+@router.get("/stats", tags=["ops"])
+async def stats(
+    container: ServiceContainer = Depends(get_container),
+) -> dict[str, dict[str, Any]]:
+    return {
+        "cache": container.result_cache.snapshot(),
+        "coalescing": container.coalescer.snapshot(),
+        "db_pool": container.database.pool_metrics.snapshot(),
+        "upstream": container.scheduler.snapshot(),
+        "retries": container.retries.snapshot(),
+        **_audit_stats(container),
+        **_history_cache_stats(container),
+        **_job_stats(container),
+        **_routing_stats(container),
+        **_write_behind_stats(container),
+    }
+
+
+@router.get("/metrics", tags=["ops"], response_class=Response)
+async def metrics(container: ServiceContainer = Depends(get_container)) -> Response:
+    if not isinstance(container.metrics, PrometheusMetrics):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    return Response(container.metrics.render(), media_type=container.metrics.content_type)
+
+
 @router.post("/generate", response_model=GeneratedCode, tags=["codegen"], status_code=201)
 async def generate_code(
     payload: GenerateCodePayload,
+    http_request: Request,
+    timeout_ms: Optional[int] = Header(default=None, alias="X-Request-Timeout-Ms", gt=0),
     use_case: GenerateCodeUseCase = Depends(get_generate_use_case),
 ) -> GeneratedCode:
-    request = CodeGenerationRequest(
+    request = _to_request(payload, timeout_ms, http_request)
+    try:
+        result = await _cancel_on_disconnect(http_request, use_case.execute(request))
+    except DeadlineExceeded as exc:
+        await _audit(use_case, "deadline_exceeded", request, exc)
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+    except PluginTimeout as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+    except TokenLimitExceeded as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except SafetyViolation as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except RateLimitExceeded as exc:
+        await _audit(use_case, "rate_limited", request, exc)
+        raise _too_many_requests(exc) from exc
+
+    return _to_generated(payload, result)
+
+
+@router.post("/generate/stream", tags=["codegen"])
+async def generate_code_stream(
+    payload: GenerateCodePayload,
+    http_request: Request,
+    timeout_ms: Optional[int] = Header(default=None, alias="X-Request-Timeout-Ms", gt=0),
+    use_case: GenerateCodeUseCase = Depends(get_generate_use_case),
+) -> StreamingResponse:
+    # StreamingResponse already cancels the event iterator when the client disconnects.
+    request = _to_request(payload, timeout_ms, http_request)
+    try:
+        events = await use_case.stream(request)
+    except DeadlineExceeded as exc:
+        await _audit(use_case, "deadline_exceeded", request, exc)
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+    except TokenLimitExceeded as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except SafetyViolation as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except RateLimitExceeded as exc:
+        await _audit(use_case, "rate_limited", request, exc)
+        raise _too_many_requests(exc) from exc
+
+    return StreamingResponse(
+        _sse_events(payload, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/generate/batch", response_model=BatchGenerateResponse, tags=["codegen"])
+async def generate_code_batch(
+    payload: BatchGeneratePayload,
+    http_request: Request,
+    timeout_ms: Optional[int] = Header(default=None, alias="X-Request-Timeout-Ms", gt=0),
+    use_case: GenerateBatchUseCase = Depends(get_generate_batch_use_case),
+) -> BatchGenerateResponse:
+    requests = [_to_request(item, timeout_ms, http_request) for item in payload.items]
+    try:
+        outcomes = await _cancel_on_disconnect(http_request, use_case.execute(requests))
+    except BatchLimitExceeded as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return BatchGenerateResponse(
+        items=[
+            BatchItemResult(
+                index=outcome.index,
+                result=(
+                    _to_generated(payload.items[outcome.index], outcome.result)
+                    if outcome.result is not None
+                    else None
+                ),
+                error=outcome.error,
+            )
+            for outcome in outcomes
+        ]
+    )
+
+
+@router.post("/jobs", response_model=GenerationJobResponse, tags=["codegen"], status_code=202)
+async def submit_job(
+    payload: GenerateCodePayload,
+    http_request: Request,
+    response: Response,
+    runner: GenerationJobRunner = Depends(get_job_runner),
+) -> GenerationJobResponse:
+    try:
+        job = await runner.submit(
+            _to_request(payload, http_request=http_request), timeout_ms=payload.timeout_ms
+        )
+    except (TokenLimitExceeded, SafetyViolation, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except JobQueueFull as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)
+        ) from exc
+    response.headers["Location"] = f"/jobs/{job.job_id}"
+    return _to_job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=GenerationJobResponse, tags=["codegen"])
+async def get_job(
+    job_id: str,
+    wait: float = Query(default=0, ge=0),
+    runner: GenerationJobRunner = Depends(get_job_runner),
+) -> GenerationJobResponse:
+    try:
+        job = await runner.wait(job_id, wait) if wait else await runner.get(job_id)
+    except JobNotFound as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    return _to_job_response(job)
+
+
+@router.get(
+    "/history",
+    response_model=HistoryResponse,
+    tags=["codegen"],
+    responses={304: {"description": "The page is unchanged since the given ETag"}},
+)
+async def get_history(
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    user_id: Optional[str] = Query(default=None, max_length=128),
+    language: Optional[ProgrammingLanguage] = Query(default=None),
+    model: Optional[str] = Query(default=None, max_length=64),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+    use_case: GetHistoryUseCase = Depends(get_history_use_case),
+    cache: Optional[HistoryResponseCache] = Depends(get_history_cache),
+) -> Response:
+    query = _history_query(limit, cursor, user_id, language, model, since, until)
+    if cache is None:
+        return _history_response(await use_case.execute(query))
+
+    # Pages are cached serialized, so neither a 304 nor a cache hit reads the database
+    # or runs the response model.
+    key = repr(query)
+    etag = await cache.etag(key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        cache.not_modified()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = cache.get(key, etag)
+    if body is None:
+        body = _history_response(await use_case.execute(query)).body
+        cache.put(key, etag, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/history/search", response_model=SearchResponse, tags=["codegen"])
+async def search_history(
+    q: str = Query(..., min_length=1, max_length=512),
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    user_id: Optional[str] = Query(default=None, max_length=128),
+    language: Optional[ProgrammingLanguage] = Query(default=None),
+    model: Optional[str] = Query(default=None, max_length=64),
+    use_case: SearchHistoryUseCase = Depends(get_search_history_use_case),
+) -> SearchResponse:
+    try:
+        page = await use_case.execute(
+            SearchQuery(
+                text=q,
+                limit=limit,
+                cursor=SearchCursor.decode(cursor) if cursor else None,
+                user_id=user_id,
+                language=language,
+                model=model,
+            )
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except SearchUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)) from exc
+    return SearchResponse(
+        items=[
+            SearchHitItem(
+                id=hit.record_id,
+                user_id=hit.user_id,
+                language=hit.language,
+                model=hit.model,
+                token_usage=hit.token_usage,
+                created_at=hit.created_at,
+                prompt=hit.prompt,
+                code=hit.code,
+                score=hit.score,
+            )
+            for hit in page.items
+        ],
+        next_cursor=page.next_cursor.encode() if page.next_cursor else None,
+    )
+
+
+@router.get("/history/export", tags=["codegen"], response_class=StreamingResponse)
+async def export_history(
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    user_id: Optional[str] = Query(default=None, max_length=128),
+    language: Optional[ProgrammingLanguage] = Query(default=None),
+    model: Optional[str] = Query(default=None, max_length=64),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    gzip: bool = Query(default=False),
+    use_case: ExportHistoryUseCase = Depends(get_export_history_use_case),
+) -> StreamingResponse:
+    query = _history_query(limit, cursor, user_id, language, model, since, until)
+    headers = {"Content-Disposition": 'attachment; filename="history.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        use_case.execute(query, compress=gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+
+@router.get("/usage", response_model=UsageResponse, tags=["codegen"])
+async def get_usage(
+    granularity: Granularity = Query(default="day"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    user_id: Optional[str] = Query(default=None, max_length=128),
+    language: Optional[ProgrammingLanguage] = Query(default=None),
+    model: Optional[str] = Query(default=None, max_length=64),
+    group_by: list[UsageDimension] = Query(default=[]),
+    use_case: GetUsageUseCase = Depends(get_usage_use_case),
+) -> UsageResponse:
+    try:
+        buckets = await use_case.execute(
+            UsageQuery(
+                granularity=granularity,
+                since=_as_utc(since),
+                until=_as_utc(until),
+                user_id=user_id,
+                language=language,
+                model=model,
+                group_by=tuple(dict.fromkeys(group_by)),
+            )
+        )
+    except UsageRangeTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return UsageResponse(
+        granularity=granularity,
+        items=[
+            UsageItem(
+                bucket_start=bucket.bucket_start,
+                requests=bucket.requests,
+                token_usage=bucket.token_usage,
+                prompt_tokens=bucket.prompt_tokens,
+                user_id=bucket.user_id,
+                language=bucket.language,
+                model=bucket.model,
+            )
+            for bucket in buckets
+        ],
+    )
+
+
+def _history_response(page: HistoryPage) -> Response:
+    response = HistoryResponse(
+        items=[
+            HistoryItem(
+                id=entry.record_id,
+                user_id=entry.user_id,
+                language=entry.language,
+                model=entry.model,
+                token_usage=entry.token_usage,
+                created_at=entry.created_at,
+            )
+            for entry in page.items
+        ],
+        next_cursor=page.next_cursor.encode() if page.next_cursor else None,
+    )
+    return Response(response.model_dump_json().encode("utf-8"), media_type="application/json")
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 prescribes for ``If-None-Match``."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _history_query(
+    limit: int | None,
+    cursor: str | None,
+    user_id: str | None,
+    language: ProgrammingLanguage | None,
+    model: str | None,
+    since: datetime | None,
+    until: datetime | None,
+) -> HistoryQuery:
+    try:
+        position = HistoryCursor.decode(cursor) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return HistoryQuery(
+        limit=limit,
+        cursor=position,
+        user_id=user_id,
+        language=language,
+        model=model,
+        since=_as_utc(since),
+        until=_as_utc(until),
+    )
+
+
+def _routing_stats(container: ServiceContainer) -> dict[str, dict[str, Any]]:
+    if container.router is not None:
+        return {"routing": container.router.snapshot()}
+    return {}
+
+
+def _audit_stats(container: ServiceContainer) -> dict[str, dict[str, int]]:
+    if isinstance(container.audit, BufferedAuditSink):
+        return {"audit": container.audit.snapshot()}
+    return {}
+
+
+def _history_cache_stats(container: ServiceContainer) -> dict[str, dict[str, int]]:
+    if container.history_cache is not None:
+        return {"history_cache": container.history_cache.snapshot()}
+    return {}
+
+
+def _job_stats(container: ServiceContainer) -> dict[str, dict[str, int]]:
+    if container.jobs is not None:
+        return {"jobs": container.jobs.snapshot()}
+    return {}
+
+
+def _write_behind_stats(container: ServiceContainer) -> dict[str, dict[str, int]]:
+    if isinstance(container.repository, WriteBehindGenerationRepository):
+        return {"write_behind": container.repository.snapshot()}
+    return {}
+
+
+async def _audit(
+    use_case: GenerateCodeUseCase, event: str, request: CodeGenerationRequest, exc: Exception
+) -> None:
+    # Token-limit and safety rejections are audited by the use case itself.
+    await use_case.audit.record(AuditEvent.rejection(event, request, exc))
+
+
+def _too_many_requests(exc: RateLimitExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(exc),
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc)
+
+
+def _to_request(
+    payload: GenerateCodePayload,
+    timeout_ms: int | None = None,
+    http_request: Request | None = None,
+) -> CodeGenerationRequest:
+    budgets = [budget for budget in (payload.timeout_ms, timeout_ms) if budget]
+    client = http_request.client if http_request is not None else None
+    return CodeGenerationRequest(
         prompt=payload.prompt,
         language=payload.language,
         max_tokens=payload.max_tokens,
         user_id=payload.user_id,
+        deadline=Deadline.after(min(budgets) / 1000) if budgets else None,
+        client_address=client.host if client is not None else None,
     )
+
+
+async def _cancel_on_disconnect(http_request: Request, work: Awaitable[T]) -> T:
+    """Await ``work``, cancelling it if the client goes away first."""
+    task = asyncio.ensure_future(work)
     try:
-        result = await use_case.execute(request)
-    except TokenLimitExceeded as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
-    except SafetyViolation as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                raise HTTPException(
+                    status_code=HTTP_499_CLIENT_CLOSED_REQUEST, detail="Client closed request"
+                )
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
 
+def _to_generated(payload: GenerateCodePayload, result: CodeGenerationResult) -> GeneratedCode:
     return GeneratedCode(
         request=payload,
         code=result.code,
         model=result.model,
         token_usage=result.token_usage,
         created_at=result.created_at,
+        plugins=[
+            PluginTiming(
+                name=run.name, status=run.status, duration_ms=round(run.duration * 1000, 3)
+            )
+            for run in result.plugin_runs
+        ],
     )
 
 
-@router.get("/history", response_model=HistoryResponse, tags=["codegen"])
-async def get_history(
-    use_case: GetHistoryUseCase = Depends(get_history_use_case),
-) -> HistoryResponse:
-    records = await use_case.execute()
-    items = [
-        HistoryItem(
-            id=record.record_id or index + 1,
-            user_id=record.request.user_id,
-            language=record.request.language,
-            model=record.model,
-            token_usage=record.token_usage,
-            created_at=record.created_at,
-        )
-        for index, record in enumerate(records)
-    ]
-    return HistoryResponse(items=items)
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _sse_events(
+    payload: GenerateCodePayload, events: AsyncIterator[str | CodeGenerationResult]
+) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            if isinstance(event, CodeGenerationResult):
+                yield _sse("result", _to_generated(payload, event).model_dump_json())
+            else:
+                yield _sse("delta", json.dumps({"text": event}))
+    except Exception as exc:  # the status line is already sent, report in-band
+        yield _sse("error", json.dumps({"detail": str(exc)}))
+
+
+def _to_job_response(job: GenerationJob) -> GenerationJobResponse:
+    return GenerationJobResponse(
+        id=job.job_id,
+        status=job.status,
+        request=GenerateCodePayload(
+            prompt=job.prompt,
+            language=job.language,
+            max_tokens=job.max_tokens,
+            user_id=job.user_id,
+            timeout_ms=job.timeout_ms,
+        ),
+        attempts=job.attempts,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result=(
+            JobResult(
+                record_id=job.record_id,
+                code=job.code,
+                model=job.model,
+                token_usage=job.token_usage,
+            )
+            if job.status == "succeeded"
+            else None
+        ),
+        error=job.error,
+    )
@@ -0,0 +1,87 @@
+"""Export generation history as NDJSON.
+
+    python -m src.interfaces.cli.export_history --output history.ndjson.gz --since 2024-01-01
+
+Output goes to stdout unless ``--output`` is given; a ``.gz`` suffix (or ``--gzip``) turns
+on compression. Pass the ``cursor`` of the last exported line to resume.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+from typing import BinaryIO
+
+from ...application.use_cases.export_history import ExportHistoryUseCase
+from ...config.settings import get_settings
+from ...domain.models.history import HistoryCursor, HistoryQuery
+from ...domain.models.language import ProgrammingLanguage
+from ...infrastructure.db.blobs import BodyCodec
+from ...infrastructure.db.session import Database
+from ...infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", "-o", help="file to write (default: stdout)")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--cursor", type=HistoryCursor.decode, help="resume after this cursor")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--user-id")
+    parser.add_argument("--language", type=ProgrammingLanguage.from_str)
+    parser.add_argument("--model")
+    parser.add_argument("--since", type=_timestamp)
+    parser.add_argument("--until", type=_timestamp)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--database-url")
+    return parser
+
+
+async def export(args: argparse.Namespace, sink: BinaryIO) -> None:
+    settings = get_settings()
+    database = Database(args.database_url)
+    use_case = ExportHistoryUseCase(
+        SqlAlchemyGenerationRepository(
+            database.session_factory,
+            BodyCodec(settings.blob_compression, settings.blob_compress_min_bytes),
+        ),
+        batch_size=args.batch_size or settings.history_export_batch_size,
+    )
+    query = HistoryQuery(
+        limit=args.limit,
+        cursor=args.cursor,
+        user_id=args.user_id,
+        language=args.language,
+        model=args.model,
+        since=args.since,
+        until=args.until,
+    )
+    compress = args.gzip or bool(args.output and args.output.endswith(".gz"))
+    try:
+        async for chunk in use_case.execute(query, compress=compress):
+            sink.write(chunk)
+    finally:
+        await database.engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.output:
+        with open(args.output, "wb") as sink:
+            asyncio.run(export(args, sink))
+    else:
+        asyncio.run(export(args, sys.stdout.buffer))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Recompute usage rollups from the raw generation records.
+
+    python -m src.interfaces.cli.rebuild_usage --chunk-size 1000
+
+Safe to run while the service is up; see ``rebuild_usage_rollups`` for how live saves
+are kept out of the recount.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from ...infrastructure.db.rollups import rebuild_usage_rollups
+from ...infrastructure.db.session import Database
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--database-url")
+    return parser
+
+
+async def rebuild(args: argparse.Namespace) -> int:
+    database = Database(args.database_url)
+    try:
+        return await rebuild_usage_rollups(database.session_factory, chunk_size=args.chunk_size)
+    finally:
+        await database.engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    counted = asyncio.run(rebuild(args))
+    print(f"rebuilt usage rollups from {counted} generation records")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,24 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from .infrastructure.db.base import Base
+from .config.settings import get_settings
+from .infrastructure.db.migrations import ensure_schema
 from .infrastructure.db.session import db
+from .interfaces.api.container import ServiceContainer
 from .interfaces.api.routes import router
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI):
-    async with db.engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield
+async def lifespan(app: FastAPI):
+    await ensure_schema(db.engine)
+    container = ServiceContainer.build(get_settings(), db)
+    app.state.container = container
+    container.start()
+    try:
+        yield
+    finally:
+        await container.aclose()
+        await db.dispose()
 
 
 def create_app() -> FastAPI:
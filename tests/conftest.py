@@ -17,15 +17,14 @@ os.environ.setdefault("CODEGEN_DATABASE_URL", "sqlite+aiosqlite:///./test_codege
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from src.infrastructure.db import models  # noqa: F401
 from src.infrastructure.db.base import Base
 
 
 @pytest.fixture()
-async def session() -> AsyncIterator[AsyncSession]:
+async def session_factory() -> AsyncIterator[async_sessionmaker[AsyncSession]]:
     engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    Session = async_sessionmaker(engine, expire_on_commit=False)
-    async with Session() as sess:
-        yield sess
+    yield async_sessionmaker(engine, expire_on_commit=False)
     await engine.dispose()
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.application.use_cases.generate_code import GenerateCodeUseCase
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.admission import RateLimiter, RateLimitExceeded, UpstreamBusy
+from src.domain.services.audit import AuditEvent
+from src.domain.services.safety import SafetyOrchestrator
+from src.domain.services.scheduling import (
+    FairScheduler,
+    QueueWaitExceeded,
+    ScheduledCodeGenerationProvider,
+)
+from src.domain.services.token_policy import TokenPolicy
+from src.infrastructure.ratelimit.memory import InMemoryRateLimitBackend
+from src.interfaces.api.dependencies import get_generate_use_case
+from src.main import create_app
+
+
+class FixedUsageProvider:
+    def __init__(self, usage: int) -> None:
+        self.usage = usage
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        return CodeGenerationResult.new(
+            request=request, code="pass", model="dummy", token_usage=self.usage
+        )
+
+
+class NullRepo:
+    async def save(self, result: CodeGenerationResult) -> None:
+        return None
+
+
+def make_request(max_tokens: int = 100, user_id: str | None = "neo") -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt="write hello",
+        language=ProgrammingLanguage.PYTHON,
+        max_tokens=max_tokens,
+        user_id=user_id,
+    )
+
+
+class RecordingAuditSink:
+    def __init__(self) -> None:
+        self.events: list[AuditEvent] = []
+
+    async def record(self, event: AuditEvent) -> None:
+        self.events.append(event)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_blocks_and_refills():
+    now = [0.0]
+    backend = InMemoryRateLimitBackend(
+        requests_per_minute=2, tokens_per_minute=1000, clock=lambda: now[0]
+    )
+
+    assert await backend.acquire("neo", 1, 10) == 0
+    assert await backend.acquire("neo", 1, 10) == 0
+    assert await backend.acquire("neo", 1, 10) == pytest.approx(30.0)
+    assert await backend.acquire("trinity", 1, 10) == 0
+
+    now[0] = 30.0
+    assert await backend.acquire("neo", 1, 10) == 0
+
+
+@pytest.mark.asyncio
+async def test_use_case_settles_reserved_tokens_with_actual_usage():
+    backend = InMemoryRateLimitBackend(requests_per_minute=100, tokens_per_minute=200)
+    use_case = GenerateCodeUseCase(
+        provider=FixedUsageProvider(usage=20),
+        repository=NullRepo(),
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(256),
+        rate_limiter=RateLimiter(backend),
+    )
+
+    # without settlement only two 100-token reservations would fit in the bucket
+    for _ in range(6):
+        await use_case.execute(make_request(max_tokens=100))
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        await use_case.execute(make_request(max_tokens=100))
+    assert excinfo.value.retry_after > 0
+
+
+@pytest.mark.asyncio
+async def test_streams_dropped_before_iteration_release_their_reservation():
+    backend = InMemoryRateLimitBackend(requests_per_minute=100, tokens_per_minute=200)
+    use_case = GenerateCodeUseCase(
+        provider=FixedUsageProvider(usage=20),
+        repository=NullRepo(),
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(256),
+        rate_limiter=RateLimiter(backend),
+    )
+
+    # e.g. the client disconnected before the response body was iterated; a leaked
+    # 100-token reservation would exhaust the bucket by the third stream
+    for _ in range(4):
+        events = await use_case.stream(make_request(max_tokens=100))
+        await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_queues_excess_calls_and_sheds_after_deadline():
+    release = asyncio.Event()
+
+    class SlowProvider(FixedUsageProvider):
+        async def generate(self, request):
+            await release.wait()
+            return await super().generate(request)
+
+    scheduler = FairScheduler(slots=1, max_wait=0.05)
+    provider = ScheduledCodeGenerationProvider(SlowProvider(usage=1), scheduler)
+    first = asyncio.create_task(provider.generate(make_request()))
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueWaitExceeded) as excinfo:
+        await provider.generate(make_request())
+    assert isinstance(excinfo.value, UpstreamBusy)
+
+    queued = asyncio.create_task(provider.generate(make_request()))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 1
+    release.set()
+    await first
+    await queued
+
+    stats = scheduler.snapshot()
+    assert stats["shed"] == 1
+    assert stats["admitted"] == 2
+    assert stats["queue_depth"] == 0
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_prefers_small_requests_and_weighted_tenants():
+    scheduler = FairScheduler(slots=1, weights={"gold": 4.0}, priorities={"ops": -1})
+    await scheduler.acquire(make_request())
+    order: list[str] = []
+
+    async def wait(name: str, user_id: str, max_tokens: int) -> None:
+        await scheduler.acquire(make_request(max_tokens=max_tokens, user_id=user_id))
+        order.append(name)
+        scheduler.release()
+
+    waiters = [
+        asyncio.create_task(wait("batch", "bulk", 2000)),
+        asyncio.create_task(wait("interactive", "trinity", 50)),
+        asyncio.create_task(wait("gold-large", "gold", 1000)),
+        asyncio.create_task(wait("ops", "ops", 4000)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 4
+
+    scheduler.release()
+    await asyncio.gather(*waiters)
+
+    assert order == ["ops", "interactive", "gold-large", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_forgets_tenants_the_virtual_clock_has_passed():
+    scheduler = FairScheduler(slots=1)
+    await scheduler.acquire(make_request(user_id="holder"))
+    light = [
+        asyncio.create_task(scheduler.acquire(make_request(max_tokens=10, user_id=name)))
+        for name in ("a", "b")
+    ]
+    heavy = [
+        asyncio.create_task(scheduler.acquire(make_request(max_tokens=100, user_id="heavy")))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.snapshot()["tenants"] == 4
+
+    for _ in range(4):
+        scheduler.release()
+    # dequeuing the second "heavy" ticket moved virtual time past every other tag
+    assert scheduler.snapshot()["tenants"] == 1
+    scheduler.release()
+    assert scheduler.snapshot()["tenants"] == 0
+    await asyncio.gather(*light, *heavy)
+    scheduler.release()
+
+    for index in range(20):
+        await scheduler.acquire(make_request(user_id=f"idle-{index}"))
+        scheduler.release()
+    assert scheduler.snapshot()["tenants"] == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_frees_slot_when_waiter_is_cancelled():
+    scheduler = FairScheduler(slots=1)
+    await scheduler.acquire(make_request())
+    waiter = asyncio.create_task(scheduler.acquire(make_request()))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    scheduler.release()
+
+    assert scheduler.queue_depth == 0
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_endpoint_returns_429_with_retry_after():
+    app = create_app()
+
+    class LimitedUseCase:
+        audit = RecordingAuditSink()
+
+        async def execute(self, request):
+            raise RateLimitExceeded("Rate limit exceeded for neo", retry_after=2.3)
+
+    async def override_generate():
+        return LimitedUseCase()
+
+    app.dependency_overrides[get_generate_use_case] = override_generate
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.post("/generate", json={"prompt": "write hello"})
+
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "3"
+    assert [event.event for event in LimitedUseCase.audit.events] == ["rate_limited"]
+
+
+@pytest.mark.asyncio
+async def test_anonymous_clients_get_separate_budgets():
+    backend = InMemoryRateLimitBackend(requests_per_minute=1, tokens_per_minute=1000)
+    use_case = GenerateCodeUseCase(
+        provider=FixedUsageProvider(usage=5),
+        repository=NullRepo(),
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(256),
+        rate_limiter=RateLimiter(backend),
+    )
+    app = create_app()
+    app.dependency_overrides[get_generate_use_case] = lambda: use_case
+
+    payload = {"prompt": "write hello", "max_tokens": 64}
+    statuses: dict[str, list[int]] = {}
+    for address in ("10.0.0.1", "10.0.0.2"):
+        transport = ASGITransport(app=app, client=(address, 4000))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses[address] = [
+                (await client.post("/generate", json=payload)).status_code for _ in range(2)
+            ]
+
+    assert statuses == {"10.0.0.1": [201, 429], "10.0.0.2": [201, 429]}
@@ -6,9 +6,14 @@ import pytest
 from httpx import AsyncClient
 
 from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.history import HistoryCursor, HistoryEntry, HistoryPage, HistoryQuery
 from src.domain.models.language import ProgrammingLanguage
+from src.application.use_cases.generate_batch import BatchItemOutcome
+from src.domain.services.plugin_pipeline import PluginTimeout
 from src.interfaces.api.dependencies import (
+    get_generate_batch_use_case,
     get_generate_use_case,
+    get_history_cache,
     get_history_use_case,
 )
 from src.main import create_app
@@ -26,24 +31,43 @@ class StubGenerateUseCase:
         )
 
 
+class StubStreamingUseCase(StubGenerateUseCase):
+    async def stream(self, request: CodeGenerationRequest):
+        async def events():
+            yield "print("
+            yield "'ok')"
+            yield await self.execute(request)
+
+        return events()
+
+
+class StubBatchUseCase:
+    async def execute(self, requests):
+        outcomes = []
+        for index, request in enumerate(requests):
+            if "hack" in request.prompt:
+                outcomes.append(BatchItemOutcome(index=index, error="blocked"))
+            else:
+                result = await StubGenerateUseCase().execute(request)
+                outcomes.append(BatchItemOutcome(index=index, result=result))
+        return outcomes
+
+
 class StubHistoryUseCase:
-    async def execute(self, limit: int = 20):
-        request = CodeGenerationRequest(
-            prompt="demo",
-            language=ProgrammingLanguage.GO,
-            max_tokens=64,
+    def __init__(self) -> None:
+        self.queries: list[HistoryQuery] = []
+
+    async def execute(self, query: HistoryQuery | None = None) -> HistoryPage:
+        self.queries.append(query)
+        entry = HistoryEntry(
+            record_id=7,
             user_id="morpheus",
+            language=ProgrammingLanguage.GO,
+            model="stub",
+            token_usage=64,
+            created_at=datetime(2024, 1, 2, tzinfo=timezone.utc),
         )
-        return [
-            CodeGenerationResult.new(
-                request=request,
-                code="fmt.Println('demo')",
-                model="stub",
-                token_usage=64,
-                created_at=datetime(2024, 1, 2, tzinfo=timezone.utc),
-                record_id=7,
-            )
-        ]
+        return HistoryPage(items=[entry], next_cursor=HistoryCursor(entry.created_at, 7))
 
 
 @pytest.mark.asyncio
@@ -58,6 +82,7 @@ async def test_generate_endpoint():
 
     app.dependency_overrides[get_generate_use_case] = override_generate
     app.dependency_overrides[get_history_use_case] = override_history
+    app.dependency_overrides[get_history_cache] = lambda: None
 
     payload = {
         "prompt": "write hello world",
@@ -75,3 +100,83 @@ async def test_generate_endpoint():
         assert history_resp.status_code == 200
         history_body = history_resp.json()
         assert history_body["items"][0]["id"] == 7
+
+
+@pytest.mark.asyncio
+async def test_generate_endpoint_maps_plugin_timeout_to_504():
+    class TimingOutUseCase:
+        async def execute(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+            raise PluginTimeout("Plugin black timed out after 2s")
+
+    app = create_app()
+    app.dependency_overrides[get_generate_use_case] = TimingOutUseCase
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/generate", json={"prompt": "write hello world"})
+
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Plugin black timed out after 2s"
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_endpoint_emits_sse():
+    app = create_app()
+
+    async def override_generate():
+        return StubStreamingUseCase()
+
+    app.dependency_overrides[get_generate_use_case] = override_generate
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.post("/generate/stream", json={"prompt": "write hello world"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in resp.text.split("\n\n") if frame]
+    assert frames[0] == 'event: delta\ndata: {"text": "print("}'
+    assert frames[-1].startswith("event: result\ndata: ")
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_endpoint_reports_per_item():
+    app = create_app()
+
+    async def override_batch():
+        return StubBatchUseCase()
+
+    app.dependency_overrides[get_generate_batch_use_case] = override_batch
+
+    payload = {"items": [{"prompt": "write hello"}, {"prompt": "hack it"}]}
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.post("/generate/batch", json=payload)
+
+    assert resp.status_code == 200
+    first, second = resp.json()["items"]
+    assert first["result"]["code"].startswith("print")
+    assert first["error"] is None
+    assert second == {"index": 1, "result": None, "error": "blocked"}
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint_passes_filters_and_cursor():
+    app = create_app()
+    stub = StubHistoryUseCase()
+
+    async def override_history():
+        return stub
+
+    app.dependency_overrides[get_history_use_case] = override_history
+    app.dependency_overrides[get_history_cache] = lambda: None
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = await client.get("/history", params={"limit": 1, "language": "go"})
+        cursor = first.json()["next_cursor"]
+        second = await client.get("/history", params={"cursor": cursor, "user_id": "morpheus"})
+        invalid = await client.get("/history", params={"cursor": "not-a-cursor"})
+
+    assert first.status_code == second.status_code == 200
+    assert stub.queries[0].limit == 1
+    assert stub.queries[0].language is ProgrammingLanguage.GO
+    assert stub.queries[1].cursor == HistoryCursor(datetime(2024, 1, 2, tzinfo=timezone.utc), 7)
+    assert stub.queries[1].user_id == "morpheus"
+    assert invalid.status_code == 400
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from src.application.use_cases.generate_batch import GenerateBatchUseCase
+from src.application.use_cases.generate_code import GenerateCodeUseCase
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.audit import AuditEvent
+from src.domain.services.safety import SafetyGate, SafetyOrchestrator, SafetyViolation
+from src.domain.services.token_policy import TokenLimitExceeded, TokenPolicy
+from src.infrastructure.audit.buffer import BufferedAuditSink
+from src.infrastructure.db.models import AuditLog
+from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from src.infrastructure.repositories.write_behind import WriteBehindGenerationRepository
+
+
+class EchoProvider:
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        return CodeGenerationResult.new(
+            request=request, code="print('ok')", model="dummy", token_usage=7
+        )
+
+
+class CountingRepo:
+    def __init__(self) -> None:
+        self.saved = 0
+
+    async def save(self, result: CodeGenerationResult) -> None:
+        self.saved += 1
+        result.record_id = self.saved
+
+    async def save_many(self, results: list[CodeGenerationResult]) -> None:
+        for result in results:
+            await self.save(result)
+
+
+def _request(prompt: str = "write hello", max_tokens: int = 64) -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt=prompt, language=ProgrammingLanguage.PYTHON, max_tokens=max_tokens, user_id="neo"
+    )
+
+
+async def _audit_rows(session_factory) -> list[AuditLog]:
+    async with session_factory() as session:
+        return list((await session.execute(select(AuditLog).order_by(AuditLog.id))).scalars())
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_counts_evicted_events(session_factory):
+    sink = BufferedAuditSink(session_factory, capacity=3, batch_size=10, flush_interval=60)
+
+    for index in range(5):
+        await sink.record(AuditEvent("generation", {"n": index}))
+    await sink.stop()
+
+    rows = await _audit_rows(session_factory)
+    assert [json.loads(row.payload)["n"] for row in rows] == [2, 3, 4]
+    assert sink.snapshot()["dropped"] == 2
+    assert sink.snapshot()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_flusher_writes_batches_in_the_background(session_factory):
+    sink = BufferedAuditSink(session_factory, capacity=100, batch_size=4, flush_interval=0.01)
+    sink.start()
+
+    for index in range(10):
+        await sink.record(AuditEvent("generation", {"n": index}))
+    for _ in range(100):
+        if sink.snapshot()["flushed"] == 10:
+            break
+        await asyncio.sleep(0.01)
+
+    assert sink.snapshot()["flushed"] == 10
+    assert sink.snapshot()["batches"] >= 3
+    assert len(await _audit_rows(session_factory)) == 10
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_block_policy_waits_for_the_flusher(session_factory):
+    sink = BufferedAuditSink(
+        session_factory, capacity=2, batch_size=2, flush_interval=60, overflow="block"
+    )
+    sink.start()
+
+    await asyncio.wait_for(
+        asyncio.gather(*(sink.record(AuditEvent("generation", {"n": i})) for i in range(6))),
+        timeout=2,
+    )
+    await sink.stop()
+
+    stats = sink.snapshot()
+    assert stats["dropped"] == 0
+    assert stats["blocked"] > 0
+    assert len(await _audit_rows(session_factory)) == 6
+
+
+@pytest.mark.asyncio
+async def test_producers_blocked_at_stop_are_counted_as_dropped(session_factory):
+    sink = BufferedAuditSink(
+        session_factory, capacity=1, batch_size=10, flush_interval=60, overflow="block"
+    )
+    sink.start()
+    await sink.record(AuditEvent("generation", {"n": 0}))
+    blocked = asyncio.create_task(sink.record(AuditEvent("generation", {"n": 1})))
+    await asyncio.sleep(0)
+
+    await sink.stop()
+    await asyncio.wait_for(blocked, timeout=1)
+    await sink.record(AuditEvent("generation", {"n": 2}))
+
+    rows = await _audit_rows(session_factory)
+    stats = sink.snapshot()
+    assert stats["recorded"] + stats["dropped"] == 3
+    assert stats["flushed"] == len(rows) == stats["recorded"]
+    assert stats["buffered"] == 0
+
+
+@pytest.mark.asyncio
+async def test_use_case_audits_generations_and_rejections(session_factory):
+    sink = BufferedAuditSink(session_factory, capacity=100, batch_size=100, flush_interval=60)
+    use_case = GenerateCodeUseCase(
+        provider=EchoProvider(),
+        repository=CountingRepo(),
+        safety=SafetyOrchestrator([SafetyGate("RB-DRIFT")]),
+        token_policy=TokenPolicy(128),
+        audit=sink,
+    )
+
+    await use_case.execute(_request())
+    with pytest.raises(SafetyViolation):
+        await use_case.execute(_request(prompt="hack the planet"))
+    with pytest.raises(TokenLimitExceeded):
+        await use_case.execute(_request(max_tokens=4096))
+    await sink.stop()
+
+    rows = await _audit_rows(session_factory)
+    assert [row.event for row in rows] == [
+        "generation",
+        "safety_rejected",
+        "token_limit_rejected",
+    ]
+    assert json.loads(rows[0].payload)["record_id"] == 1
+    assert json.loads(rows[2].payload)["max_tokens"] == 4096
+
+
+@pytest.mark.asyncio
+async def test_batch_generations_are_audited_after_they_are_saved(session_factory):
+    sink = BufferedAuditSink(session_factory, capacity=100, batch_size=100, flush_interval=60)
+    use_case = GenerateBatchUseCase(
+        GenerateCodeUseCase(
+            provider=EchoProvider(),
+            repository=CountingRepo(),
+            safety=SafetyOrchestrator([SafetyGate("RB-DRIFT")]),
+            token_policy=TokenPolicy(128),
+            audit=sink,
+        ),
+        concurrency=2,
+    )
+
+    await use_case.execute([_request(), _request(prompt="hack the planet"), _request("again")])
+    await sink.stop()
+
+    rows = await _audit_rows(session_factory)
+    assert sorted(row.event for row in rows) == ["generation", "generation", "safety_rejected"]
+    generations = [json.loads(row.payload) for row in rows if row.event == "generation"]
+    assert sorted(payload["record_id"] for payload in generations) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_generations_are_audited_with_their_record_ids(session_factory):
+    sink = BufferedAuditSink(session_factory, capacity=100, batch_size=100, flush_interval=60)
+    inner = SqlAlchemyGenerationRepository(session_factory)
+    repository = WriteBehindGenerationRepository(
+        inner, max_queue=10, batch_size=10, flush_interval=0.01, audit=sink
+    )
+    code_use_case = GenerateCodeUseCase(
+        provider=EchoProvider(),
+        repository=repository,
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(128),
+        audit=sink,
+    )
+    repository.start()
+
+    result = await code_use_case.execute(_request())
+    assert result.record_id is None  # only queued so far
+    await GenerateBatchUseCase(code_use_case, concurrency=2).execute([_request("again")])
+    await repository.stop()
+    await sink.stop()
+
+    rows = await _audit_rows(session_factory)
+    record_ids = sorted(json.loads(row.payload)["record_id"] for row in rows)
+    assert [row.event for row in rows] == ["generation", "generation"]
+    assert record_ids == sorted(item.record_id for item in await inner.list_recent(limit=5))
+    assert None not in record_ids
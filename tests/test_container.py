@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+from src.config.settings import Settings
+from src.infrastructure.cache.generation import CachingCodeGenerationProvider
+from src.infrastructure.db.session import Database
+from src.interfaces.api.container import ServiceContainer
+
+
+@pytest.mark.asyncio
+async def test_container_shares_pooled_client_and_closes_it():
+    settings = Settings(
+        OPENAI_API_KEY="test-key",
+        openai_http2=False,
+        openai_max_connections=7,
+        openai_timeout_seconds=3.0,
+    )
+    container = ServiceContainer.build(settings, Database())
+
+    assert isinstance(container.provider, CachingCodeGenerationProvider)
+    assert container.http_client.timeout.read == 3.0
+    assert container.http_client.timeout.connect == settings.openai_connect_timeout_seconds
+
+    await container.aclose()
+
+    assert container.http_client.is_closed
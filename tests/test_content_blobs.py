@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.db.blobs import RAW, ZLIB, BodyCodec, decode_body
+from src.infrastructure.db.migrations import backfill_content_blobs, upgrade_schema
+from src.infrastructure.db.models import ContentBlob
+from src.infrastructure.repositories import stored
+from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+
+
+def _result(prompt: str, code: str) -> CodeGenerationResult:
+    return CodeGenerationResult.new(
+        request=CodeGenerationRequest(
+            prompt=prompt, language=ProgrammingLanguage.PYTHON, max_tokens=64
+        ),
+        code=code,
+        model="dummy",
+        token_usage=12,
+    )
+
+
+def test_codec_compresses_only_above_threshold():
+    codec = BodyCodec(threshold=64)
+
+    small = codec.encode("print('hi')")
+    large = codec.encode("print('hi')\n" * 100)
+
+    assert small.codec == RAW
+    assert large.codec == ZLIB
+    assert len(large.data) < large.size
+    assert decode_body(large.codec, large.data) == "print('hi')\n" * 100
+    assert codec.encode("print('hi')").hash == small.hash
+
+
+@pytest.mark.asyncio
+async def test_repository_stores_each_distinct_body_once(session_factory):
+    repository = SqlAlchemyGenerationRepository(session_factory, BodyCodec(threshold=16))
+    body = "def handler():\n    return 42\n" * 20
+
+    await repository.save(_result("write a handler", body))
+    await repository.save_many([_result("write a handler", body), _result("other", body)])
+
+    async with session_factory() as session:
+        blobs = (await session.execute(select(func.count()).select_from(ContentBlob))).scalar()
+    assert blobs == 3
+
+    history = await repository.list_recent(limit=10)
+    assert {item.code for item in history} == {body}
+    assert {item.request.prompt for item in history} == {"write a handler", "other"}
+
+
+@pytest.mark.asyncio
+async def test_bodies_are_decoded_only_when_accessed(session_factory, monkeypatch):
+    decoded: list[str] = []
+
+    def counting_decode(codec: str, data: bytes) -> str:
+        decoded.append(codec)
+        return decode_body(codec, data)
+
+    monkeypatch.setattr(stored, "decode_body", counting_decode)
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    await repository.save(_result("write hello", "print('hello')"))
+
+    [item] = await repository.list_recent(limit=1)
+    assert decoded == []
+    assert item.model == "dummy"
+
+    assert item.code == "print('hello')"
+    assert item.code == "print('hello')"
+    assert len(decoded) == 1
+    item.request.prompt = "edited"
+    assert item.request.prompt == "edited"
+    assert len(decoded) == 1
+
+
+@pytest.mark.asyncio
+async def test_migration_backfills_legacy_rows():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "CREATE TABLE generation_records (id INTEGER PRIMARY KEY, user_id VARCHAR(128),"
+            " prompt TEXT NOT NULL, language VARCHAR(32) NOT NULL, model VARCHAR(64) NOT NULL,"
+            " code TEXT NOT NULL, token_usage INTEGER NOT NULL, created_at DATETIME NOT NULL)"
+        )
+        for index in range(5):
+            await conn.exec_driver_sql(
+                "INSERT INTO generation_records (prompt, language, model, code, token_usage,"
+                " created_at) VALUES (?, 'python', 'dummy', ?, 3, ?)",
+                (f"prompt {index}", "print(1)\n" * 50, datetime.now(timezone.utc).isoformat()),
+            )
+        await upgrade_schema(conn)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    repository = SqlAlchemyGenerationRepository(session_factory)
+
+    before = await repository.list_recent(limit=10)
+    migrated = await backfill_content_blobs(session_factory, BodyCodec(threshold=64), 2)
+    after = await repository.list_recent(limit=10)
+
+    assert migrated == 5
+    assert await backfill_content_blobs(session_factory) == 0
+    assert [(r.request.prompt, r.code) for r in after] == [
+        (r.request.prompt, r.code) for r in before
+    ]
+    async with session_factory() as session:
+        compressed = await session.execute(
+            select(func.count()).select_from(ContentBlob).where(ContentBlob.codec == ZLIB)
+        )
+    assert compressed.scalar() == 1
+    await engine.dispose()
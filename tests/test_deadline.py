@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import openai
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from src.application.use_cases.generate_code import GenerateCodeUseCase
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.deadline import Deadline, DeadlineExceeded
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.audit import NullAuditSink
+from src.domain.services.retry import RetryingCodeGenerationProvider, RetryPolicy
+from src.domain.services.safety import SafetyOrchestrator
+from src.domain.services.token_policy import TokenPolicy
+from src.infrastructure.openai.client import is_retryable_error
+from src.interfaces.api.dependencies import get_generate_use_case
+from src.interfaces.api.routes import _cancel_on_disconnect
+from src.main import create_app
+
+
+def make_request(deadline: Deadline | None = None) -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt="write hello",
+        language=ProgrammingLanguage.PYTHON,
+        max_tokens=32,
+        deadline=deadline,
+    )
+
+
+def server_error(status_code: int = 503) -> openai.APIStatusError:
+    response = httpx.Response(status_code, request=httpx.Request("POST", "http://upstream"))
+    return openai.APIStatusError("upstream failed", response=response, body=None)
+
+
+class FlakyProvider:
+    def __init__(self, failures: list[Exception]) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return CodeGenerationResult.new(
+            request=request, code="pass", model="dummy", token_usage=1
+        )
+
+
+class SlowProvider:
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        raise AssertionError("deadline should have cancelled the call")
+
+
+class InMemoryRepo:
+    async def save(self, result: CodeGenerationResult) -> None:
+        return None
+
+
+def make_retrying(provider, sleeps: list[float], **policy) -> RetryingCodeGenerationProvider:
+    async def sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    return RetryingCodeGenerationProvider(
+        provider, RetryPolicy(**policy), is_retryable=is_retryable_error, sleep=sleep
+    )
+
+
+def test_retryable_errors_are_transient_upstream_failures():
+    assert is_retryable_error(server_error(503))
+    assert is_retryable_error(server_error(429))
+    assert is_retryable_error(openai.APITimeoutError(request=httpx.Request("POST", "http://x")))
+    assert not is_retryable_error(server_error(400))
+    assert not is_retryable_error(DeadlineExceeded("late"))
+
+
+@pytest.mark.asyncio
+async def test_retries_with_jittered_backoff_until_success():
+    provider = FlakyProvider([server_error(), server_error(502)])
+    sleeps: list[float] = []
+    retrying = make_retrying(provider, sleeps, max_attempts=3, base_delay=0.1, max_delay=1.0)
+
+    result = await retrying.generate(make_request())
+
+    assert result.code == "pass"
+    assert provider.calls == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.1 and 0 <= sleeps[1] <= 0.2
+    assert retrying.snapshot() == {"retries": 2, "skipped": 0, "exhausted": 0}
+
+
+@pytest.mark.asyncio
+async def test_retry_is_skipped_when_it_cannot_finish_before_the_deadline():
+    provider = FlakyProvider([server_error()])
+    sleeps: list[float] = []
+    retrying = make_retrying(provider, sleeps, min_attempt=5.0)
+
+    with pytest.raises(openai.APIStatusError):
+        await retrying.generate(make_request(Deadline.after(1.0)))
+
+    assert provider.calls == 1
+    assert sleeps == []
+    assert retrying.stats.skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_are_raised_immediately():
+    provider = FlakyProvider([server_error(400)])
+    retrying = make_retrying(provider, [])
+
+    with pytest.raises(openai.APIStatusError):
+        await retrying.generate(make_request())
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_use_case_cancels_upstream_call_at_deadline():
+    provider = SlowProvider()
+    use_case = GenerateCodeUseCase(
+        provider=provider,
+        repository=InMemoryRepo(),
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(hard_limit=100),
+    )
+
+    with pytest.raises(DeadlineExceeded):
+        await use_case.execute(make_request(Deadline.after(0.05)))
+    assert provider.cancelled
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_fails_before_reaching_the_provider():
+    provider = FlakyProvider([])
+    use_case = GenerateCodeUseCase(
+        provider=provider,
+        repository=InMemoryRepo(),
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(hard_limit=100),
+    )
+
+    with pytest.raises(DeadlineExceeded):
+        await use_case.execute(make_request(Deadline.after(0)))
+    assert provider.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_endpoint_propagates_deadline_header_and_returns_504():
+    app = create_app()
+    seen: list[CodeGenerationRequest] = []
+
+    class LateUseCase:
+        audit = NullAuditSink()
+
+        async def execute(self, request):
+            seen.append(request)
+            raise DeadlineExceeded("Request deadline exceeded during generation")
+
+    async def override_generate():
+        return LateUseCase()
+
+    app.dependency_overrides[get_generate_use_case] = override_generate
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.post(
+            "/generate",
+            json={"prompt": "write hello", "timeout_ms": 5000},
+            headers={"X-Request-Timeout-Ms": "2000"},
+        )
+
+    assert resp.status_code == 504
+    assert 0 < seen[0].deadline.remaining() <= 2.0
+
+
+@pytest.mark.asyncio
+async def test_disconnected_client_cancels_pending_work():
+    class GoneRequest:
+        async def is_disconnected(self) -> bool:
+            return True
+
+    provider = SlowProvider()
+    work = provider.generate(make_request())
+
+    with pytest.raises(HTTPException) as excinfo:
+        await _cancel_on_disconnect(GoneRequest(), work)
+    await asyncio.sleep(0)
+
+    assert excinfo.value.status_code == 499
+    assert provider.cancelled
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 
 import pytest
 
+from src.application.use_cases.generate_batch import GenerateBatchUseCase
 from src.application.use_cases.generate_code import GenerateCodeUseCase
 from src.application.use_cases.get_history import GetHistoryUseCase
 from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.history import HistoryEntry, HistoryPage, HistoryQuery
 from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.coalescing import RequestCoalescer
 from src.domain.services.postprocessing import PostProcessor
 from src.domain.services.safety import SafetyGate, SafetyOrchestrator, SafetyViolation
 from src.domain.services.token_policy import TokenLimitExceeded, TokenPolicy
+from src.infrastructure.plugins.trim_plugin import TrimWhitespacePlugin
 from src.domain.services.ports import GenerationRepository, CodeGenerationProvider
 
 
@@ -21,9 +26,26 @@ class InMemoryRepo(GenerationRepository):
     async def save(self, result: CodeGenerationResult) -> None:
         self.stored.append(result)
 
+    async def save_many(self, results):
+        self.stored.extend(results)
+
     async def list_recent(self, limit: int = 20):
         return self.stored[-limit:]
 
+    async def list_history(self, query: HistoryQuery) -> HistoryPage:
+        entries = [
+            HistoryEntry(
+                record_id=index,
+                user_id=result.request.user_id,
+                language=result.request.language,
+                model=result.model,
+                token_usage=result.token_usage,
+                created_at=result.created_at,
+            )
+            for index, result in enumerate(self.stored, start=1)
+        ]
+        return HistoryPage(items=entries[-query.limit :])
+
 
 class DummyProvider(CodeGenerationProvider):
     async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
@@ -121,5 +143,205 @@ async def test_get_history_use_case_reads_from_repo():
             token_usage=16,
         )
     )
-    history = await GetHistoryUseCase(repo).execute(limit=5)
-    assert len(history) == 1
+    history = await GetHistoryUseCase(repo, default_limit=5).execute()
+    assert len(history.items) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_history_use_case_applies_default_and_max_limit():
+    class RecordingRepo(InMemoryRepo):
+        async def list_history(self, query: HistoryQuery) -> HistoryPage:
+            self.limits.append(query.limit)
+            return HistoryPage()
+
+    repo = RecordingRepo([])
+    repo.limits = []
+    use_case = GetHistoryUseCase(repo, default_limit=15, max_limit=50)
+
+    await use_case.execute()
+    await use_case.execute(HistoryQuery(limit=500))
+
+    assert repo.limits == [15, 50]
+
+
+class GatedProvider(CodeGenerationProvider):
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        self.calls += 1
+        await self.release.wait()
+        return CodeGenerationResult.new(
+            request=request,
+            code="print('shared')",
+            model="dummy",
+            token_usage=request.max_tokens,
+        )
+
+
+@pytest.mark.asyncio
+async def test_generate_use_case_coalesces_identical_requests():
+    provider = GatedProvider()
+    repo = InMemoryRepo([])
+    use_case = GenerateCodeUseCase(
+        provider=provider,
+        repository=repo,
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(256),
+        post_processors=[TaggingPlugin()],
+        coalescer=RequestCoalescer(),
+    )
+    requests = [
+        CodeGenerationRequest(
+            prompt="write hello",
+            language=ProgrammingLanguage.PYTHON,
+            max_tokens=64,
+            user_id=f"user-{index}",
+        )
+        for index in range(3)
+    ]
+
+    tasks = [asyncio.create_task(use_case.execute(request)) for request in requests]
+    await asyncio.sleep(0)
+    provider.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert provider.calls == 1
+    assert [result.request.user_id for result in results] == ["user-0", "user-1", "user-2"]
+    assert all(result.code.count("# tagged") == 1 for result in results)
+    assert len(repo.stored) == 3
+    assert use_case.coalescer.stats.coalesced == 2
+
+
+class StreamingProvider(CodeGenerationProvider):
+    deltas = ["\n  def ", "main():", "\n    pass", "  \n", "\n"]
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        raise AssertionError("stream() should be used")
+
+    async def stream(self, request: CodeGenerationRequest):
+        for delta in self.deltas:
+            yield delta
+        yield CodeGenerationResult.new(
+            request=request,
+            code="".join(self.deltas),
+            model="dummy",
+            token_usage=9,
+        )
+
+
+@pytest.mark.asyncio
+async def test_generate_use_case_streams_trimmed_deltas_and_saves_result():
+    request = CodeGenerationRequest(
+        prompt="write main",
+        language=ProgrammingLanguage.PYTHON,
+        max_tokens=64,
+    )
+    repo = InMemoryRepo([])
+    use_case = GenerateCodeUseCase(
+        provider=StreamingProvider(),
+        repository=repo,
+        safety=SafetyOrchestrator([]),
+        token_policy=TokenPolicy(256),
+        post_processors=[TrimWhitespacePlugin()],
+    )
+
+    events = [event async for event in await use_case.stream(request)]
+
+    *deltas, result = events
+    assert "".join(deltas) == result.code == "def main():\n    pass\n"
+    assert repo.stored == [result]
+
+
+class ConcurrencyProbeProvider(CodeGenerationProvider):
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return CodeGenerationResult.new(
+            request=request,
+            code=request.prompt,
+            model="dummy",
+            token_usage=request.max_tokens,
+        )
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_use_case_bounds_concurrency_and_reports_errors():
+    provider = ConcurrencyProbeProvider()
+    repo = InMemoryRepo([])
+    use_case = GenerateBatchUseCase(
+        GenerateCodeUseCase(
+            provider=provider,
+            repository=repo,
+            safety=SafetyOrchestrator([SafetyGate("RB-DRIFT")]),
+            token_policy=TokenPolicy(256),
+        ),
+        concurrency=2,
+    )
+    requests = [
+        CodeGenerationRequest(
+            prompt=f"task {index}",
+            language=ProgrammingLanguage.PYTHON,
+            max_tokens=64,
+        )
+        for index in range(5)
+    ]
+    requests.append(
+        CodeGenerationRequest(
+            prompt="hack it", language=ProgrammingLanguage.PYTHON, max_tokens=64
+        )
+    )
+    requests.append(
+        CodeGenerationRequest(
+            prompt="too big", language=ProgrammingLanguage.PYTHON, max_tokens=999
+        )
+    )
+
+    outcomes = await use_case.execute(requests)
+
+    assert provider.peak == 2
+    assert [outcome.index for outcome in outcomes] == list(range(7))
+    assert all(outcome.result is not None for outcome in outcomes[:5])
+    assert "RB-DRIFT" in outcomes[5].error
+    assert "hard limit" in outcomes[6].error
+    assert len(repo.stored) == 5
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_use_case_keeps_results_when_an_item_fails_unexpectedly():
+    class FlakyProvider(ConcurrencyProbeProvider):
+        async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+            if request.prompt == "task 1":
+                raise ConnectionError("upstream went away")
+            return await super().generate(request)
+
+    repo = InMemoryRepo([])
+    use_case = GenerateBatchUseCase(
+        GenerateCodeUseCase(
+            provider=FlakyProvider(),
+            repository=repo,
+            safety=SafetyOrchestrator([SafetyGate("RB-DRIFT")]),
+            token_policy=TokenPolicy(256),
+        ),
+        concurrency=2,
+    )
+
+    outcomes = await use_case.execute(
+        [
+            CodeGenerationRequest(
+                prompt=f"task {index}", language=ProgrammingLanguage.PYTHON, max_tokens=64
+            )
+            for index in range(3)
+        ]
+    )
+
+    assert outcomes[1].result is None
+    assert outcomes[1].error == "Generation failed: ConnectionError"
+    assert [result.code for result in repo.stored] == ["task 0", "task 2"]
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.domain.models.code_generation import (
+    CodeGenerationRequest,
+    CodeGenerationResult,
+    IncompleteGeneration,
+)
+from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.db.base import Base
+from src.infrastructure.db.models import GenerationCacheEntry
+from src.infrastructure.cache.generation import (
+    CachedGeneration,
+    CacheStats,
+    CachingCodeGenerationProvider,
+    DatabaseGenerationCache,
+    GenerationResultCache,
+    MemoryGenerationCache,
+)
+
+
+class CountingProvider:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        self.calls += 1
+        return CodeGenerationResult.new(
+            request=request,
+            code="print('hi')",
+            model="dummy",
+            token_usage=7,
+        )
+
+
+def make_request(prompt: str = "write hello", user_id: str | None = None) -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt=prompt,
+        language=ProgrammingLanguage.PYTHON,
+        max_tokens=64,
+        user_id=user_id,
+    )
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_is_served_from_memory():
+    inner = CountingProvider()
+    cache = GenerationResultCache(max_entries=8, ttl_seconds=60)
+    provider = CachingCodeGenerationProvider(inner, cache, "dummy")
+
+    first = await provider.generate(make_request(user_id="neo"))
+    second = await provider.generate(make_request("  write   hello ", user_id="trinity"))
+
+    assert inner.calls == 1
+    assert second.cached and not first.cached
+    assert second.code == first.code
+    assert second.request.user_id == "trinity"
+    assert cache.stats.memory_hits == 1
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_results_from_a_fallback_model_are_not_cached():
+    inner = CountingProvider()  # answers as "dummy"
+    cache = GenerationResultCache(max_entries=8, ttl_seconds=60)
+    provider = CachingCodeGenerationProvider(inner, cache, "primary-model")
+
+    await provider.generate(make_request())
+    second = await provider.generate(make_request())
+
+    assert inner.calls == 2 and not second.cached
+
+
+@pytest.mark.asyncio
+async def test_streams_without_a_completed_result_are_not_cached():
+    class BrokenStream(CountingProvider):
+        def __init__(self, error: Exception | None) -> None:
+            super().__init__()
+            self.error = error
+
+        async def stream(self, request: CodeGenerationRequest):
+            yield "print("
+            if self.error is not None:
+                raise self.error
+
+    cache = GenerationResultCache(max_entries=8, ttl_seconds=60)
+    for inner in (BrokenStream(IncompleteGeneration("cut off")), BrokenStream(None)):
+        provider = CachingCodeGenerationProvider(inner, cache, "dummy")
+        with pytest.raises(IncompleteGeneration):
+            [event async for event in provider.stream(make_request())]
+
+    assert await cache.get(make_request().fingerprint("dummy")) is None
+
+
+@pytest.mark.asyncio
+async def test_database_tier_survives_memory_loss(session_factory):
+    inner = CountingProvider()
+    warm = GenerationResultCache(max_entries=8, ttl_seconds=60, session_factory=session_factory)
+    await CachingCodeGenerationProvider(inner, warm, "dummy").generate(make_request())
+
+    cold = GenerationResultCache(max_entries=8, ttl_seconds=60, session_factory=session_factory)
+    result = await CachingCodeGenerationProvider(inner, cold, "dummy").generate(make_request())
+
+    assert inner.calls == 1
+    assert result.cached
+    assert cold.stats.db_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_workers_filling_the_same_key_do_not_conflict(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    workers = [DatabaseGenerationCache(session_factory, 60, max_entries=8) for _ in range(4)]
+
+    await asyncio.gather(
+        *(
+            worker.put("hot", CachedGeneration(code=f"v{index}", model="m", token_usage=1))
+            for index, worker in enumerate(workers)
+        )
+    )
+
+    assert (await workers[0].get("hot")).code in {"v0", "v1", "v2", "v3"}
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_tier_drops_expired_rows_and_stays_within_max_entries(session_factory):
+    entry = CachedGeneration(code="x", model="m", token_usage=1)
+    await DatabaseGenerationCache(session_factory, ttl_seconds=-1, max_entries=2).put(
+        "expired", entry
+    )
+    database = DatabaseGenerationCache(session_factory, ttl_seconds=60, max_entries=2)
+
+    for key in ("a", "b", "c"):
+        await database.put(key, entry)
+
+    async with session_factory() as session:
+        keys = (await session.execute(select(GenerationCacheEntry.key))).scalars().all()
+    assert sorted(keys) == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_cache_write_failures_do_not_fail_the_generation(session_factory, monkeypatch):
+    cache = GenerationResultCache(max_entries=8, ttl_seconds=60, session_factory=session_factory)
+
+    async def locked(key: str, entry: CachedGeneration) -> None:
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(cache._database, "put", locked)
+    provider = CachingCodeGenerationProvider(CountingProvider(), cache, "dummy")
+
+    assert (await provider.generate(make_request())).code == "print('hi')"
+    assert (await provider.generate(make_request())).cached
+    assert cache.snapshot()["write_errors"] == 1
+
+
+def test_memory_tier_evicts_and_expires():
+    now = [0.0]
+    stats = CacheStats()
+    memory = MemoryGenerationCache(max_entries=2, ttl_seconds=10, stats=stats, clock=lambda: now[0])
+    entry = CachedGeneration(code="x", model="m", token_usage=1)
+
+    memory.put("a", entry)
+    memory.put("b", entry)
+    memory.get("a")
+    memory.put("c", entry)
+
+    assert memory.get("b") is None
+    assert stats.evictions == 1
+
+    now[0] = 11.0
+    assert memory.get("a") is None
+    assert stats.expirations == 1
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import pytest
+from httpx import AsyncClient
+
+from src.application.use_cases.get_history import GetHistoryUseCase
+from src.config.settings import Settings
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.history import HistoryPage, HistoryQuery
+from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.cache.history import HistoryResponseCache
+from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from src.interfaces.api.dependencies import get_history_cache, get_history_use_case
+from src.main import create_app
+
+
+class CountingRepository(SqlAlchemyGenerationRepository):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.reads = 0
+
+    async def list_history(self, query: HistoryQuery) -> HistoryPage:
+        self.reads += 1
+        return await super().list_history(query)
+
+
+def _result(prompt: str = "write hello") -> CodeGenerationResult:
+    return CodeGenerationResult.new(
+        request=CodeGenerationRequest(
+            prompt=prompt, language=ProgrammingLanguage.PYTHON, max_tokens=32, user_id="neo"
+        ),
+        code="print('hi')",
+        model="dummy",
+        token_usage=10,
+    )
+
+
+@pytest.mark.asyncio
+async def test_unchanged_pages_are_served_from_the_cache_or_as_304(session_factory):
+    cache = HistoryResponseCache(session_factory)
+    repository = CountingRepository(session_factory, history_cache=cache)
+    await repository.save(_result())
+    app = create_app()
+    app.dependency_overrides[get_history_use_case] = lambda: GetHistoryUseCase(repository)
+    app.dependency_overrides[get_history_cache] = lambda: cache
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = await client.get("/history", params={"limit": 5})
+        etag = first.headers["ETag"]
+        again = await client.get("/history", params={"limit": 5})
+        unchanged = await client.get(
+            "/history", params={"limit": 5}, headers={"If-None-Match": f'W/{etag}, "x"'}
+        )
+        other_shape = await client.get("/history", params={"limit": 1})
+
+        await repository.save(_result("write more"))
+        changed = await client.get(
+            "/history", params={"limit": 5}, headers={"If-None-Match": etag}
+        )
+
+    assert first.status_code == 200
+    assert [item["user_id"] for item in first.json()["items"]] == ["neo"]
+    assert again.content == first.content and again.headers["ETag"] == etag
+    assert unchanged.status_code == 304 and unchanged.content == b""
+    assert other_shape.headers["ETag"] != etag
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert len(changed.json()["items"]) == 2
+    assert repository.reads == 3
+    assert cache.snapshot()["not_modified"] == 1
+    assert cache.snapshot()["invalidations"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pages_rendered_before_a_save_are_not_cached(session_factory):
+    cache = HistoryResponseCache(session_factory)
+    repository = SqlAlchemyGenerationRepository(session_factory, history_cache=cache)
+    etag = await cache.etag("page")
+
+    await repository.save_many([_result(), _result("write more")])
+    cache.put("page", etag, b"stale")
+
+    assert cache.get("page", etag) is None
+    assert await cache.etag("page") != etag
+    assert cache.snapshot()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_revalidation_picks_up_saves_from_other_processes(session_factory):
+    now = [0.0]
+    cache = HistoryResponseCache(session_factory, revalidate_after=5, clock=lambda: now[0])
+    local = SqlAlchemyGenerationRepository(session_factory, history_cache=cache)
+    await local.save(_result())
+    etag = await cache.etag("page")
+    cache.put("page", etag, b"page")
+
+    await SqlAlchemyGenerationRepository(session_factory).save(_result("elsewhere"))
+    assert await cache.etag("page") == etag
+
+    now[0] = 5.0
+    assert await cache.etag("page") != etag
+    assert cache.snapshot()["entries"] == 0
+
+    # The marker read back from the database matches the one a local save would set.
+    reloaded = HistoryResponseCache(session_factory)
+    assert await reloaded.etag("page") == await cache.etag("page")
+
+
+@pytest.mark.asyncio
+async def test_default_settings_pick_up_other_workers_saves(session_factory):
+    now = [0.0]
+    revalidate_after = Settings().history_cache_revalidate_seconds
+    cache = HistoryResponseCache(
+        session_factory, revalidate_after=revalidate_after, clock=lambda: now[0]
+    )
+    etag = await cache.etag("page")
+
+    await SqlAlchemyGenerationRepository(session_factory).save(_result("elsewhere"))
+
+    now[0] = revalidate_after
+    assert await cache.etag("page") != etag
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.application.use_cases.export_history import ExportHistoryUseCase
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.history import HistoryCursor, HistoryQuery
+from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.db.base import Base
+from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from src.interfaces.api.dependencies import get_export_history_use_case
+from src.interfaces.cli import export_history as cli
+from src.main import create_app
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _results(count: int) -> list[CodeGenerationResult]:
+    return [
+        CodeGenerationResult.new(
+            request=CodeGenerationRequest(
+                prompt=f"prompt {index}",
+                language=ProgrammingLanguage.GO if index % 2 else ProgrammingLanguage.PYTHON,
+                max_tokens=32,
+                user_id="neo",
+            ),
+            code=f"print({index})",
+            model="dummy",
+            token_usage=index,
+            created_at=BASE + timedelta(minutes=index // 2),
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_history_streams_in_order_with_filters(session_factory):
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    results = _results(7)
+    await repository.save_many(results)
+
+    streamed = [item async for item in repository.iter_history(HistoryQuery(), batch_size=2)]
+    go_only = [
+        item.token_usage
+        async for item in repository.iter_history(
+            HistoryQuery(language=ProgrammingLanguage.GO, limit=2), batch_size=2
+        )
+    ]
+
+    assert [item.record_id for item in streamed] == sorted(
+        (result.record_id for result in results), reverse=True
+    )
+    assert streamed[0].code == "print(6)"
+    assert go_only == [5, 3]
+
+
+@pytest.mark.asyncio
+async def test_export_resumes_from_line_cursor(session_factory):
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    await repository.save_many(_results(5))
+    use_case = ExportHistoryUseCase(repository, batch_size=2)
+
+    full = b"".join([chunk async for chunk in use_case.execute(HistoryQuery())])
+    lines = [json.loads(line) for line in full.splitlines()]
+    resumed = b"".join(
+        [
+            chunk
+            async for chunk in use_case.execute(
+                HistoryQuery(cursor=HistoryCursor.decode(lines[1]["cursor"])), compress=True
+            )
+        ]
+    )
+
+    assert [line["prompt"] for line in lines] == [f"prompt {i}" for i in (4, 3, 2, 1, 0)]
+    assert [json.loads(line) for line in gzip.decompress(resumed).splitlines()] == lines[2:]
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_ndjson(session_factory):
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    await repository.save_many(_results(3))
+    app = create_app()
+    app.dependency_overrides[get_export_history_use_case] = lambda: ExportHistoryUseCase(
+        repository, batch_size=1
+    )
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        plain = await client.get("/history/export", params={"language": "python"})
+        packed = await client.get("/history/export", params={"gzip": "true"})
+        invalid = await client.get("/history/export", params={"cursor": "nope"})
+
+    assert plain.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["code"] for line in plain.text.splitlines()] == [
+        "print(2)",
+        "print(0)",
+    ]
+    assert packed.headers["content-encoding"] == "gzip"
+    assert len(packed.text.splitlines()) == 3
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_cli_writes_gzip_file(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+    database = cli.Database(url)
+    await SqlAlchemyGenerationRepository(database.session_factory).save_many(_results(4))
+    await database.engine.dispose()
+
+    output = tmp_path / "history.ndjson.gz"
+    args = cli.build_parser().parse_args(
+        ["--database-url", url, "--output", str(output), "--user-id", "neo", "--limit", "3"]
+    )
+    with open(output, "wb") as sink:
+        await cli.export(args, sink)
+
+    lines = gzip.decompress(output.read_bytes()).splitlines()
+    assert [json.loads(line)["token_usage"] for line in lines] == [3, 2, 1]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.application.use_cases.generate_code import GenerateCodeUseCase
+from src.application.use_cases.generation_jobs import GenerationJobRunner
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.job import GenerationJob
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.admission import RateLimitExceeded
+from src.domain.services.safety import SafetyGate, SafetyOrchestrator, SafetyViolation
+from src.domain.services.token_policy import TokenPolicy
+from src.infrastructure.db.base import Base
+from src.infrastructure.db.models import GenerationJobRecord
+from src.infrastructure.repositories.jobs import SqlAlchemyJobRepository
+from src.interfaces.api.dependencies import get_job_runner
+from src.main import create_app
+
+
+@pytest.fixture()
+async def jobs_factory(tmp_path) -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    # Workers and the resume task use sessions concurrently; an in-memory database would
+    # share one connection between them, and with it one transaction.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+class EchoProvider:
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.release.set()
+        self.calls = 0
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        self.calls += 1
+        await self.release.wait()
+        return CodeGenerationResult.new(
+            request=request, code=f"# {request.prompt}", model="dummy", token_usage=7
+        )
+
+
+class CountingRepo:
+    def __init__(self) -> None:
+        self.saved = 0
+
+    async def save(self, result: CodeGenerationResult) -> None:
+        self.saved += 1
+        result.record_id = self.saved
+
+
+class FlakyLimiter:
+    """Rejects the first admission, then lets everything through."""
+
+    def __init__(self) -> None:
+        self.rejected = False
+
+    async def admit(self, request: CodeGenerationRequest) -> None:
+        if not self.rejected:
+            self.rejected = True
+            raise RateLimitExceeded("slow down", retry_after=0.01)
+
+    async def settle(self, request, result) -> None:
+        return None
+
+
+def _use_case(provider: EchoProvider, rate_limiter=None) -> GenerateCodeUseCase:
+    return GenerateCodeUseCase(
+        provider=provider,
+        repository=CountingRepo(),
+        safety=SafetyOrchestrator([SafetyGate("RB-DRIFT")]),
+        token_policy=TokenPolicy(1024),
+        rate_limiter=rate_limiter,
+    )
+
+
+def _request(prompt: str = "write hello") -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt=prompt, language=ProgrammingLanguage.PYTHON, max_tokens=64, user_id="neo"
+    )
+
+
+@pytest.mark.asyncio
+async def test_submitted_jobs_run_in_the_background(jobs_factory):
+    limiter = FlakyLimiter()
+    runner = GenerationJobRunner(
+        _use_case(EchoProvider(), rate_limiter=limiter),
+        SqlAlchemyJobRepository(jobs_factory),
+        workers=2,
+    )
+    runner.start()
+
+    job = await runner.submit(_request(), timeout_ms=5000)
+    assert job.status == "queued"
+    done = await runner.wait(job.job_id, timeout=2)
+    await runner.stop()
+
+    assert done.status == "succeeded"
+    assert (done.code, done.record_id, done.token_usage) == ("# write hello", 1, 7)
+    assert done.attempts == 1 and done.finished_at is not None
+    assert limiter.rejected
+    assert runner.snapshot()["succeeded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unsafe_requests_are_rejected_before_queueing(jobs_factory):
+    runner = GenerationJobRunner(
+        _use_case(EchoProvider()), SqlAlchemyJobRepository(jobs_factory)
+    )
+
+    with pytest.raises(SafetyViolation):
+        await runner.submit(_request("hack the planet"))
+    assert runner.snapshot()["submitted"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stopping_releases_running_jobs_and_a_restart_resumes_them(jobs_factory):
+    repository = SqlAlchemyJobRepository(jobs_factory)
+    provider = EchoProvider()
+    provider.release.clear()
+    runner = GenerationJobRunner(_use_case(provider), repository, workers=1)
+    runner.start()
+    job = await runner.submit(_request())
+    while provider.calls == 0:
+        await asyncio.sleep(0.01)
+
+    await runner.stop()
+    assert (await repository.get(job.job_id)).status == "queued"
+
+    provider.release.set()
+    restarted = GenerationJobRunner(_use_case(provider), repository, workers=1)
+    restarted.start()
+    done = await restarted.wait(job.job_id, timeout=2)
+    await restarted.stop()
+
+    assert done.status == "succeeded"
+    assert done.attempts == 2
+    assert restarted.snapshot()["resumed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_only_stale_running_jobs_are_resumed(jobs_factory):
+    repository = SqlAlchemyJobRepository(jobs_factory)
+    jobs = [GenerationJob.new(_request(f"job {n}")) for n in range(3)]
+    for job in jobs:
+        await repository.add(job)
+    await repository.claim(jobs[1].job_id)
+    await repository.claim(jobs[2].job_id)
+    async with jobs_factory() as session:
+        await session.execute(
+            update(GenerationJobRecord)
+            .where(GenerationJobRecord.id == jobs[1].job_id)
+            .values(started_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        )
+        await session.commit()
+
+    resumable = await repository.resumable(datetime.now(timezone.utc) - timedelta(minutes=15))
+
+    assert resumable == [jobs[0].job_id, jobs[1].job_id]
+    assert await repository.claim(jobs[2].job_id) is None
+    assert (await repository.get(jobs[2].job_id)).status == "running"
+
+
+@pytest.mark.asyncio
+async def test_jobs_endpoints(jobs_factory):
+    runner = GenerationJobRunner(
+        _use_case(EchoProvider()), SqlAlchemyJobRepository(jobs_factory)
+    )
+    runner.start()
+    app = create_app()
+    app.dependency_overrides[get_job_runner] = lambda: runner
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        accepted = await client.post(
+            "/jobs", json={"prompt": "write hello", "max_tokens": 64, "timeout_ms": 5000}
+        )
+        polled = await client.get(accepted.headers["Location"], params={"wait": 2})
+        missing = await client.get("/jobs/unknown")
+        unsafe = await client.post("/jobs", json={"prompt": "hack the planet"})
+    await runner.stop()
+
+    assert accepted.status_code == 202
+    assert accepted.json()["status"] == "queued"
+    assert accepted.json()["request"]["timeout_ms"] == 5000
+    assert polled.status_code == 200
+    assert polled.json()["status"] == "succeeded"
+    assert polled.json()["result"]["code"] == "# write hello"
+    assert missing.status_code == 404
+    assert unsafe.status_code == 400
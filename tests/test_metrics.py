@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from src.application.use_cases.generate_code import GenerateCodeUseCase
+from src.config.settings import Settings
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.coalescing import RequestCoalescer
+from src.domain.services.safety import SafetyGate, SafetyOrchestrator, SafetyViolation
+from src.domain.services.token_policy import TokenPolicy
+from src.infrastructure.db.session import Database
+from src.infrastructure.metrics.prometheus import PrometheusMetrics
+from src.infrastructure.plugins.trim_plugin import TrimWhitespacePlugin
+from src.interfaces.api.container import ServiceContainer
+from src.main import create_app
+
+
+class DummyProvider:
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        return CodeGenerationResult.new(
+            request=request, code="print('hi')  ", model="dummy", token_usage=7, prompt_tokens=3
+        )
+
+
+class NullRepo:
+    async def save(self, result: CodeGenerationResult) -> None:
+        return None
+
+
+def make_use_case(metrics: PrometheusMetrics) -> GenerateCodeUseCase:
+    return GenerateCodeUseCase(
+        provider=DummyProvider(),
+        repository=NullRepo(),
+        safety=SafetyOrchestrator([SafetyGate("RB-SECRET")]),
+        token_policy=TokenPolicy(256),
+        post_processors=(TrimWhitespacePlugin(),),
+        metrics=metrics,
+    )
+
+
+def sample(metrics: PrometheusMetrics, name: str, **labels: str) -> float | None:
+    return metrics.registry.get_sample_value(name, labels)
+
+
+@pytest.mark.asyncio
+async def test_use_case_records_stage_latency_tokens_and_errors():
+    metrics = PrometheusMetrics()
+    use_case = make_use_case(metrics)
+
+    await use_case.execute(
+        CodeGenerationRequest(
+            prompt="write hello",
+            language=ProgrammingLanguage.PYTHON,
+            max_tokens=32,
+            user_id="neo",
+        )
+    )
+    with pytest.raises(SafetyViolation):
+        await use_case.execute(
+            CodeGenerationRequest(
+                prompt="leak sk-123", language=ProgrammingLanguage.PYTHON, max_tokens=32
+            )
+        )
+
+    for stage, count in (("token_policy", 2), ("safety", 2), ("provider", 1), ("save", 1)):
+        assert sample(metrics, "codegen_stage_seconds_count", stage=stage) == count
+    assert sample(metrics, "codegen_plugin_seconds_count", plugin="trim-whitespace") == 1
+    labels = {"model": "dummy", "language": "python", "user": "neo"}
+    assert sample(metrics, "codegen_tokens_total", kind="output", **labels) == 7
+    assert sample(metrics, "codegen_tokens_total", kind="prompt", **labels) == 3
+    assert sample(metrics, "codegen_errors_total", stage="safety", type="SafetyViolation") == 1
+
+
+@pytest.mark.asyncio
+async def test_coalesced_callers_count_upstream_tokens_once():
+    class SlowProvider(DummyProvider):
+        async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+            await asyncio.sleep(0.01)
+            return await super().generate(request)
+
+    metrics = PrometheusMetrics()
+    use_case = make_use_case(metrics)
+    use_case.provider = SlowProvider()
+    use_case.coalescer = RequestCoalescer()
+
+    await asyncio.gather(
+        *(
+            use_case.execute(
+                CodeGenerationRequest(
+                    prompt="write hello",
+                    language=ProgrammingLanguage.PYTHON,
+                    max_tokens=32,
+                    user_id="neo",
+                )
+            )
+            for _ in range(3)
+        )
+    )
+
+    assert use_case.coalescer.stats.coalesced == 2
+    labels = {"model": "dummy", "language": "python", "user": "neo"}
+    assert sample(metrics, "codegen_tokens_total", kind="output", **labels) == 7
+    assert sample(metrics, "codegen_tokens_total", kind="prompt", **labels) == 3
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_registry_and_runtime_gauges():
+    settings = Settings(OPENAI_API_KEY="test-key", database_url="sqlite+aiosqlite:///:memory:")
+    container = ServiceContainer.build(settings, Database(settings.database_url))
+    app = create_app()
+    app.state.container = container
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/metrics")
+    await container.aclose()
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "codegen_stage_seconds_bucket" not in resp.text  # no requests yet
+    assert "codegen_db_pool_checkouts" in resp.text
+    assert "codegen_upstream_queue_depth" in resp.text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_is_404_when_disabled():
+    settings = Settings(OPENAI_API_KEY="test-key", metrics_enabled=False)
+    container = ServiceContainer.build(settings, Database("sqlite+aiosqlite:///:memory:"))
+    app = create_app()
+    app.state.container = container
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/metrics")
+    await container.aclose()
+
+    assert resp.status_code == 404
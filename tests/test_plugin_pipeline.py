@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.plugin_pipeline import PluginPipeline, PluginTimeout
+from src.infrastructure.plugins.trim_plugin import TrimWhitespacePlugin
+
+
+class PidStampPlugin:
+    name = "pid-stamp"
+    execution = "cpu"
+
+    def transform(self, code: str, language: str) -> str:
+        return f"{code}# {language} formatted in {os.getpid()}\n"
+
+
+class SlowCheckPlugin:
+    execution = "io"
+    mutates = False
+
+    def __init__(self, name: str, seen: list[str], depends_on: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.seen = seen
+        self.depends_on = depends_on
+
+    def transform(self, code: str, language: str) -> str:
+        time.sleep(0.2)
+        self.seen.append(code)
+        return code
+
+
+class SleepyPlugin:
+    name = "sleepy"
+    timeout = 0.05
+
+    def __init__(self, on_timeout: str) -> None:
+        self.on_timeout = on_timeout
+
+    async def run(self, result: CodeGenerationResult) -> CodeGenerationResult:
+        await asyncio.sleep(1)
+        result.code = "never"
+        return result
+
+
+class RenamePlugin:
+    def __init__(self, name: str, depends_on: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.depends_on = depends_on
+
+    async def run(self, result: CodeGenerationResult) -> CodeGenerationResult:
+        return result
+
+
+def make_result(code: str = "  x = 1  ") -> CodeGenerationResult:
+    request = CodeGenerationRequest(
+        prompt="write x", language=ProgrammingLanguage.PYTHON, max_tokens=16
+    )
+    return CodeGenerationResult.new(request=request, code=code, model="dummy", token_usage=1)
+
+
+@pytest.mark.asyncio
+async def test_cpu_plugin_runs_in_worker_process_after_its_dependency():
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        pipeline = PluginPipeline([TrimWhitespacePlugin(), PidStampPlugin()], process_pool=pool)
+        result = await pipeline.run(make_result())
+
+    code, stamp = result.code.splitlines()
+    assert code == "x = 1"
+    assert stamp.startswith("# python formatted in ")
+    assert int(stamp.rsplit(" ", 1)[1]) != os.getpid()
+    assert [run.name for run in result.plugin_runs] == ["trim-whitespace", "pid-stamp"]
+
+
+@pytest.mark.asyncio
+async def test_independent_checks_run_concurrently_on_the_code_they_depend_on():
+    seen: list[str] = []
+    pipeline = PluginPipeline(
+        [
+            SlowCheckPlugin("lint", seen, depends_on=("trim-whitespace",)),
+            SlowCheckPlugin("tests", seen, depends_on=("trim-whitespace",)),
+            TrimWhitespacePlugin(),
+        ]
+    )
+
+    started = time.perf_counter()
+    result = await pipeline.run(make_result())
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.35
+    assert seen == ["x = 1\n", "x = 1\n"]
+    assert result.code == "x = 1\n"
+    assert [run.status for run in result.plugin_runs] == ["ok", "ok", "ok"]
+
+
+@pytest.mark.asyncio
+async def test_timed_out_plugin_is_skipped_or_fails_by_policy():
+    skipping = PluginPipeline([TrimWhitespacePlugin(), SleepyPlugin("skip")])
+    result = await skipping.run(make_result())
+
+    assert result.code == "x = 1\n"
+    assert result.plugin_runs[-1].name == "sleepy"
+    assert result.plugin_runs[-1].status == "timeout"
+
+    failing = PluginPipeline([SleepyPlugin("fail")])
+    with pytest.raises(PluginTimeout):
+        await failing.run(make_result())
+
+
+def test_pipeline_rejects_unordered_writers_and_cycles():
+    with pytest.raises(ValueError, match="both modify code"):
+        PluginPipeline(
+            [RenamePlugin("base"), RenamePlugin("a", ("base",)), RenamePlugin("b", ("base",))]
+        )
+    with pytest.raises(ValueError, match="cycle"):
+        PluginPipeline([RenamePlugin("a", ("b",)), RenamePlugin("b", ("a",))])
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
 from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.history import HistoryQuery
 from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.db.metrics import PoolMetrics
 from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
 
 
 @pytest.mark.asyncio
-async def test_repository_persists_and_lists(session):
-    repository = SqlAlchemyGenerationRepository(session)
+async def test_repository_persists_and_lists(session_factory):
+    repository = SqlAlchemyGenerationRepository(session_factory)
     request = CodeGenerationRequest(
         prompt="write hello",
         language=ProgrammingLanguage.PYTHON,
@@ -27,7 +29,6 @@ async def test_repository_persists_and_lists(session):
     )
 
     await repository.save(result)
-    await session.commit()
 
     history = await repository.list_recent(limit=5)
 
@@ -35,3 +36,84 @@ async def test_repository_persists_and_lists(session):
     stored = history[0]
     assert stored.request.prompt == request.prompt
     assert stored.record_id is not None
+
+
+@pytest.mark.asyncio
+async def test_repository_save_many_assigns_ids(session_factory):
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    results = [
+        CodeGenerationResult.new(
+            request=CodeGenerationRequest(
+                prompt=f"prompt {index}",
+                language=ProgrammingLanguage.GO,
+                max_tokens=32,
+            ),
+            code="package main",
+            model="dummy",
+            token_usage=10,
+        )
+        for index in range(3)
+    ]
+
+    await repository.save_many(results)
+
+    assert len({result.record_id for result in results}) == 3
+    assert len(await repository.list_recent(limit=10)) == 3
+
+
+@pytest.mark.asyncio
+async def test_repository_releases_connection_after_each_operation(session_factory):
+    metrics = PoolMetrics()
+    metrics.attach(session_factory.kw["bind"])
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    request = CodeGenerationRequest(
+        prompt="write hello",
+        language=ProgrammingLanguage.PYTHON,
+        max_tokens=16,
+    )
+
+    await repository.save(
+        CodeGenerationResult.new(request=request, code="x", model="dummy", token_usage=1)
+    )
+    await repository.list_recent(limit=1)
+
+    assert metrics.checkouts == 2
+    assert metrics.checked_out == 0
+
+
+@pytest.mark.asyncio
+async def test_repository_history_keyset_pagination_with_filters(session_factory):
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    results = [
+        CodeGenerationResult.new(
+            request=CodeGenerationRequest(
+                prompt=f"prompt {index}",
+                language=ProgrammingLanguage.GO if index % 2 else ProgrammingLanguage.PYTHON,
+                max_tokens=32,
+                user_id="neo",
+            ),
+            code="code",
+            model="dummy",
+            token_usage=index,
+            created_at=base + timedelta(minutes=index // 2),
+        )
+        for index in range(7)
+    ]
+    await repository.save_many(results)
+
+    seen: list[int] = []
+    query = HistoryQuery(limit=2, user_id="neo")
+    while True:
+        page = await repository.list_history(query)
+        seen.extend(entry.record_id for entry in page.items)
+        if page.next_cursor is None:
+            break
+        query.cursor = page.next_cursor
+
+    assert seen == sorted((result.record_id for result in results), reverse=True)
+
+    go_only = await repository.list_history(
+        HistoryQuery(limit=10, language=ProgrammingLanguage.GO, since=base + timedelta(minutes=1))
+    )
+    assert [entry.token_usage for entry in go_only.items] == [5, 3]
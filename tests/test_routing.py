@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.config.settings import Settings
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.routing import (
+    CircuitBreaker,
+    NoBackendAvailable,
+    RoutedBackend,
+    RoutingCodeGenerationProvider,
+)
+from src.domain.services.scheduling import (
+    FairScheduler,
+    QueueWaitExceeded,
+    ScheduledCodeGenerationProvider,
+)
+from src.infrastructure.db.session import Database
+from src.interfaces.api.container import ServiceContainer
+
+
+class FakeBackend:
+    def __init__(self, model: str, delay: float = 0.0, fail: bool = False) -> None:
+        self.model = model
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, request: CodeGenerationRequest) -> CodeGenerationResult:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.model} is down")
+        return CodeGenerationResult.new(
+            request=request, code=f"# {self.model}", model=self.model, token_usage=1
+        )
+
+
+def make_request() -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt="write hello", language=ProgrammingLanguage.PYTHON, max_tokens=64
+    )
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_and_trips_breaker():
+    broken = FakeBackend("primary", fail=True)
+    healthy = FakeBackend("secondary")
+    router = RoutingCodeGenerationProvider(
+        [
+            RoutedBackend("primary", broken, breaker=CircuitBreaker(failure_threshold=2)),
+            RoutedBackend("secondary", healthy),
+        ],
+        hedge_percentile=None,
+    )
+
+    for _ in range(3):
+        result = await router.generate(make_request())
+        assert result.model == "secondary"
+
+    assert broken.calls == 2
+    snapshot = router.snapshot()
+    assert snapshot["backends"]["primary"]["state"] == "open"
+    assert snapshot["failovers"] == 2
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_opens_after_reset_timeout():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial call while half-open
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_router_raises_when_every_breaker_is_open():
+    backend = RoutedBackend(
+        "only", FakeBackend("only", fail=True), breaker=CircuitBreaker(failure_threshold=1)
+    )
+    router = RoutingCodeGenerationProvider([backend], hedge_percentile=None)
+
+    with pytest.raises(RuntimeError):
+        await router.generate(make_request())
+    with pytest.raises(NoBackendAvailable) as excinfo:
+        await router.generate(make_request())
+    assert excinfo.value.retry_after >= 1.0
+
+
+@pytest.mark.asyncio
+async def test_router_hedges_slow_primary_and_cancels_loser():
+    primary = FakeBackend("primary")
+    backup = FakeBackend("backup", delay=0.01)
+    router = RoutingCodeGenerationProvider(
+        [RoutedBackend("primary", primary), RoutedBackend("backup", backup)],
+        hedge_percentile=0.95,
+        min_samples=3,
+    )
+    for _ in range(6):  # unsampled backends are tried first until both have min_samples
+        await router.generate(make_request())
+    assert (primary.calls, backup.calls) == (3, 3)
+
+    primary.delay, backup.delay = 1.0, 0.0
+    result = await router.generate(make_request())
+
+    assert result.model == "backup"
+    assert router.stats.hedges == 1
+    assert router.stats.hedge_wins == 1
+    await asyncio.sleep(0)  # the losing call is cancelled without delaying the winner
+    assert primary.cancelled == 1
+    assert router.snapshot()["backends"]["primary"]["error_rate"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_attempts_each_wait_for_a_scheduler_slot():
+    scheduler = FairScheduler(slots=1)
+    peak = 0
+
+    class CountingBackend(FakeBackend):
+        async def generate(self, request):
+            nonlocal peak
+            peak = max(peak, scheduler.active)
+            return await super().generate(request)
+
+    primary, backup = CountingBackend("primary"), CountingBackend("backup", delay=0.01)
+    router = RoutingCodeGenerationProvider(
+        [
+            RoutedBackend("primary", ScheduledCodeGenerationProvider(primary, scheduler)),
+            RoutedBackend("backup", ScheduledCodeGenerationProvider(backup, scheduler)),
+        ],
+        hedge_percentile=0.95,
+        min_samples=3,
+    )
+    for _ in range(6):
+        await router.generate(make_request())
+
+    primary.delay, backup.delay = 0.05, 0.0
+    await router.generate(make_request())
+
+    assert router.stats.hedges == 1
+    assert (primary.calls, backup.calls) == (4, 4)
+    assert peak == 1 and scheduler.active == 0  # the hedge queued for the primary's slot
+
+
+@pytest.mark.asyncio
+async def test_shed_calls_do_not_trip_the_breaker_or_fail_over():
+    class SheddingBackend(FakeBackend):
+        async def generate(self, request):
+            self.calls += 1
+            raise QueueWaitExceeded("queue is full", retry_after=1.0)
+
+    shed, healthy = SheddingBackend("primary"), FakeBackend("secondary")
+    router = RoutingCodeGenerationProvider(
+        [
+            RoutedBackend("primary", shed, breaker=CircuitBreaker(failure_threshold=1)),
+            RoutedBackend("secondary", healthy),
+        ],
+        hedge_percentile=None,
+    )
+
+    with pytest.raises(QueueWaitExceeded):
+        await router.generate(make_request())
+
+    assert healthy.calls == 0 and router.stats.failovers == 0
+    assert router.backends[0].breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_router_prefers_cheaper_backend_under_load():
+    release = asyncio.Event()
+
+    class BlockingBackend(FakeBackend):
+        async def generate(self, request):
+            await release.wait()
+            return await super().generate(request)
+
+    expensive = BlockingBackend("large")
+    cheap = FakeBackend("mini")
+    router = RoutingCodeGenerationProvider(
+        [RoutedBackend("large", expensive, cost=5), RoutedBackend("mini", cheap, cost=1)],
+        hedge_percentile=None,
+        load_threshold=1,
+    )
+
+    busy = asyncio.create_task(router.generate(make_request()))
+    await asyncio.sleep(0)
+    result = await router.generate(make_request())
+    release.set()
+    await busy
+
+    assert result.model == "mini"
+    assert router.stats.load_fallbacks == 1
+
+
+@pytest.mark.asyncio
+async def test_container_routes_configured_backends():
+    settings = Settings(
+        OPENAI_API_KEY="test-key",
+        routing_backends=[{"model": "gpt-4.1-nano", "cost": 0.25}],
+    )
+    container = ServiceContainer.build(settings, Database())
+
+    assert container.router is not None
+    assert [backend.name for backend in container.router.backends] == [
+        settings.openai_model,
+        "gpt-4.1-nano",
+    ]
+    await container.aclose()
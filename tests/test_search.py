@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.application.use_cases.search_history import SearchHistoryUseCase
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.models.search import SearchCursor, SearchQuery, SearchUnavailable
+from src.infrastructure.db.migrations import backfill_search_index, upgrade_schema
+from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from src.infrastructure.search.index import (
+    PostgresTsvectorIndex,
+    SqliteFtsIndex,
+    search_index_for,
+)
+from src.interfaces.api.dependencies import get_search_history_use_case
+from src.main import create_app
+
+PROMPTS = [
+    ("parse a csv file into dicts", "import csv\nrows = list(csv.DictReader(open(path)))"),
+    ("http server in go", "package main\nimport \"net/http\""),
+    ("read a csv file and sum a column", "import csv\ntotal = sum(float(r[1]) for r in rows)"),
+    ("csv csv csv export helper", "def export_csv(rows): ..."),
+    ("binary search over a sorted list", "def bisect(items, target): ..."),
+]
+
+
+@pytest.fixture()
+async def search_factory() -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await upgrade_schema(conn)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _results() -> list[CodeGenerationResult]:
+    return [
+        CodeGenerationResult.new(
+            request=CodeGenerationRequest(
+                prompt=prompt,
+                language=ProgrammingLanguage.GO if "go" in prompt else ProgrammingLanguage.PYTHON,
+                max_tokens=64,
+                user_id="neo",
+            ),
+            code=code,
+            model="dummy",
+            token_usage=10,
+        )
+        for prompt, code in PROMPTS
+    ]
+
+
+def test_backend_is_chosen_from_the_database_url():
+    assert isinstance(search_index_for("sqlite+aiosqlite:///./codegen.db"), SqliteFtsIndex)
+    assert isinstance(
+        search_index_for("postgresql+asyncpg://app:secret@db/codegen"), PostgresTsvectorIndex
+    )
+    assert search_index_for("mysql+aiomysql://db/codegen") is None
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_and_paginates_by_keyset(search_factory):
+    repository = SqlAlchemyGenerationRepository(search_factory, search_index=SqliteFtsIndex())
+    await repository.save(_results()[0])
+    await repository.save_many(_results()[1:])
+
+    seen = []
+    query = SearchQuery(text="csv", limit=2)
+    while True:
+        page = await repository.search(query)
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            break
+        query.cursor = SearchCursor.decode(page.next_cursor.encode())
+
+    assert len(seen) == 3
+    assert seen[0].prompt == "csv csv csv export helper"
+    assert [hit.score for hit in seen] == sorted((hit.score for hit in seen), reverse=True)
+    both = await repository.search(SearchQuery(text="csv sum!", limit=10))
+    assert [hit.code for hit in both.items] == [PROMPTS[2][1]]
+    go = await repository.search(SearchQuery(text="http", language=ProgrammingLanguage.GO))
+    assert [hit.record_id for hit in go.items] == [2]
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_empty_queries_and_missing_index(search_factory):
+    indexed = SqlAlchemyGenerationRepository(search_factory, search_index=SqliteFtsIndex())
+
+    with pytest.raises(ValueError):
+        await indexed.search(SearchQuery(text="!!!"))
+    with pytest.raises(SearchUnavailable):
+        await SqlAlchemyGenerationRepository(search_factory).search(SearchQuery(text="csv"))
+
+
+@pytest.mark.asyncio
+async def test_backfill_indexes_records_saved_without_the_index(search_factory):
+    await SqlAlchemyGenerationRepository(search_factory).save_many(_results())
+    index = SqliteFtsIndex()
+    repository = SqlAlchemyGenerationRepository(search_factory, search_index=index)
+    # Saved after the upgrade, so indexed right away and with the highest id.
+    await repository.save(_results()[0])
+
+    assert (await repository.search(SearchQuery(text="bisect"))).items == []
+    assert await backfill_search_index(search_factory, index, batch_size=2) == 5
+    assert await backfill_search_index(search_factory, index) == 0
+    page = await repository.search(SearchQuery(text="bisect"))
+    assert [hit.record_id for hit in page.items] == [5]
+    page = await repository.search(SearchQuery(text="dicts"))
+    assert sorted(hit.record_id for hit in page.items) == [1, 6]
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint(search_factory):
+    repository = SqlAlchemyGenerationRepository(search_factory, search_index=SqliteFtsIndex())
+    await repository.save_many(_results())
+    app = create_app()
+    app.dependency_overrides[get_search_history_use_case] = lambda: SearchHistoryUseCase(
+        repository
+    )
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = await client.get("/history/search", params={"q": "csv", "limit": 2})
+        second = await client.get(
+            "/history/search", params={"q": "csv", "cursor": first.json()["next_cursor"]}
+        )
+        empty = await client.get("/history/search", params={"q": "???"})
+
+    assert first.status_code == 200
+    assert [item["prompt"] for item in first.json()["items"]][0] == "csv csv csv export helper"
+    assert len(second.json()["items"]) == 1
+    assert second.json()["next_cursor"] is None
+    assert empty.status_code == 400
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.stub_openai import StubProfile, create_stub_app
+from src.domain.models.code_generation import CodeGenerationRequest
+from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.db import migrations
+from src.infrastructure.db.models import SchemaVersion
+from src.infrastructure.db.session import Database
+from src.infrastructure.openai.client import OpenAICodeGenerationProvider
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.asyncio
+async def test_schema_is_only_upgraded_when_the_version_changes(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}", future=True)
+    statements: list[str] = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda _conn, _cursor, statement, *_: statements.append(statement),
+    )
+
+    assert await migrations.ensure_schema(engine) is True
+    statements.clear()
+    assert await migrations.ensure_schema(engine) is False
+    assert len(statements) == 1
+
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", migrations.SCHEMA_VERSION + 1)
+    assert await migrations.ensure_schema(engine) is True
+    async with engine.connect() as conn:
+        versions = (await conn.execute(select(SchemaVersion.version))).scalars().all()
+        tables = await conn.run_sync(lambda sync: inspect(sync).get_table_names())
+    await engine.dispose()
+
+    assert versions == [migrations.SCHEMA_VERSION]
+    assert {"generation_records", "content_blobs", "generation_search"} <= set(tables)
+
+
+@pytest.mark.asyncio
+async def test_upgrade_adds_indexes_to_existing_tables(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE generation_records (id INTEGER PRIMARY KEY, user_id VARCHAR(128),"
+                " prompt TEXT NOT NULL, language VARCHAR(32) NOT NULL, model VARCHAR(64) NOT NULL,"
+                " code TEXT NOT NULL, token_usage INTEGER NOT NULL, created_at DATETIME NOT NULL)"
+            )
+        )
+
+    assert await migrations.ensure_schema(engine) is True
+    async with engine.connect() as conn:
+        indexes = await conn.run_sync(
+            lambda sync: inspect(sync).get_indexes("generation_records")
+        )
+    await engine.dispose()
+
+    assert {
+        "ix_generation_records_created_id",
+        "ix_generation_records_user_created_id",
+        "ix_generation_records_language_created_id",
+        "ix_generation_records_model_created_id",
+    } <= {index["name"] for index in indexes}
+
+
+@pytest.mark.asyncio
+async def test_database_creates_its_engine_on_first_use():
+    database = Database("sqlite+aiosqlite:///:memory:")
+    assert database._engine is None
+    await database.dispose()
+    assert database._engine is None
+
+    async with database.session_factory() as session:
+        await session.execute(select(1))
+
+    assert database.pool_metrics.checkouts == 1
+    await database.dispose()
+
+
+@pytest.mark.asyncio
+async def test_provider_builds_its_client_on_first_call():
+    http_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_stub_app(StubProfile(latency_ms=0, seed=1)))
+    )
+    built: list[AsyncOpenAI] = []
+
+    def factory() -> AsyncOpenAI:
+        built.append(
+            AsyncOpenAI(api_key="stub", base_url="http://stub/v1", http_client=http_client)
+        )
+        return built[-1]
+
+    provider = OpenAICodeGenerationProvider(model="stub-model", client_factory=factory)
+    assert built == []
+    async with http_client:
+        request = CodeGenerationRequest(
+            prompt="write hello", language=ProgrammingLanguage.PYTHON, max_tokens=64
+        )
+        await provider.generate(request)
+        await provider.generate(request)
+
+    assert len(built) == 1
+
+
+def test_importing_the_app_does_not_import_the_openai_sdk():
+    probe = "import sys, src.main; print('openai' in sys.modules)"
+    env = {**os.environ, "OPENAI_API_KEY": "test-key"}
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from openai import AsyncOpenAI
+
+from benchmarks.stub_openai import StubProfile, create_stub_app
+from src.domain.models.code_generation import (
+    CodeGenerationRequest,
+    CodeGenerationResult,
+    IncompleteGeneration,
+)
+from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.openai.client import OpenAICodeGenerationProvider
+
+
+def make_provider(profile: StubProfile) -> tuple[OpenAICodeGenerationProvider, httpx.AsyncClient]:
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_stub_app(profile)))
+    client = AsyncOpenAI(
+        api_key="stub", base_url="http://stub/v1", http_client=http_client, max_retries=0
+    )
+    return OpenAICodeGenerationProvider(client=client, model="stub-model"), http_client
+
+
+def make_request() -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt="write hello", language=ProgrammingLanguage.PYTHON, max_tokens=64
+    )
+
+
+@pytest.mark.asyncio
+async def test_provider_parses_stub_responses():
+    provider, http_client = make_provider(StubProfile(latency_ms=0, tokens=(40, 40), seed=1))
+    async with http_client:
+        result = await provider.generate(make_request())
+        events = [event async for event in provider.stream(make_request())]
+
+    assert result.code.startswith("def generated():")
+    assert result.token_usage == 40
+    assert result.prompt_tokens == 2
+    streamed = events[-1]
+    assert isinstance(streamed, CodeGenerationResult)
+    assert "".join(events[:-1]) == streamed.code
+    assert streamed.token_usage == 40
+
+
+class FakeEvents:
+    def __init__(self, events: list[SimpleNamespace]) -> None:
+        self._events = events
+        self.closed = False
+
+    async def __aenter__(self) -> FakeEvents:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.closed = True
+
+    async def __aiter__(self):
+        for event in self._events:
+            yield event
+
+
+def fake_client(events: FakeEvents) -> SimpleNamespace:
+    async def create(**kwargs):
+        return events
+
+    return SimpleNamespace(responses=SimpleNamespace(create=create))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "last_event",
+    [
+        SimpleNamespace(
+            type="response.failed", response=SimpleNamespace(error=SimpleNamespace(message="boom"))
+        ),
+        SimpleNamespace(
+            type="response.incomplete",
+            response=SimpleNamespace(
+                incomplete_details=SimpleNamespace(reason="max_output_tokens")
+            ),
+        ),
+        None,
+    ],
+)
+async def test_stream_without_completion_raises(last_event):
+    delta = SimpleNamespace(type="response.output_text.delta", delta="def ")
+    events = FakeEvents([delta] + ([last_event] if last_event else []))
+    provider = OpenAICodeGenerationProvider(client=fake_client(events), model="stub-model")
+
+    seen = []
+    with pytest.raises(IncompleteGeneration):
+        async for event in provider.stream(make_request()):
+            seen.append(event)
+
+    assert seen == ["def "]
+    assert events.closed
+
+
+@pytest.mark.asyncio
+async def test_stub_injects_errors():
+    provider, http_client = make_provider(
+        StubProfile(latency_ms=0, error_rate=1.0, error_status=503)
+    )
+    async with http_client:
+        with pytest.raises(openai.InternalServerError):
+            await provider.generate(make_request())
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pytest
+
+from src.domain.models.code_generation import CodeGenerationRequest
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.services.token_policy import TokenLimitExceeded, TokenPolicy
+from src.infrastructure.tokenizer.estimator import HeuristicTokenEstimator, context_window_for
+
+
+def make_request(prompt: str, max_tokens: int) -> CodeGenerationRequest:
+    return CodeGenerationRequest(
+        prompt=prompt, language=ProgrammingLanguage.PYTHON, max_tokens=max_tokens
+    )
+
+
+def test_policy_rejects_prompt_that_overflows_context_window():
+    policy = TokenPolicy(
+        hard_limit=512,
+        model="tiny",
+        context_window=100,
+        estimator=HeuristicTokenEstimator(),
+    )
+    request = make_request("word " * 60, max_tokens=64)
+
+    with pytest.raises(TokenLimitExceeded, match="context window"):
+        policy.admit(request)
+
+
+def test_policy_trims_output_budget_when_configured():
+    policy = TokenPolicy(
+        hard_limit=512,
+        model="tiny",
+        context_window=100,
+        estimator=HeuristicTokenEstimator(),
+        overflow="trim",
+    )
+    request = make_request("word " * 60, max_tokens=64)
+
+    estimate = policy.admit(request)
+
+    assert estimate == 75
+    assert request.max_tokens == 25
+
+
+def test_policy_without_estimator_only_checks_hard_limit():
+    policy = TokenPolicy(hard_limit=32)
+
+    assert policy.admit(make_request("hello", max_tokens=32)) is None
+    with pytest.raises(TokenLimitExceeded):
+        policy.admit(make_request("hello", max_tokens=33))
+
+
+def test_context_window_lookup_uses_longest_prefix():
+    assert context_window_for("gpt-4.1-mini") == 1_047_576
+    assert context_window_for("gpt-4o-mini") == 128_000
+    assert context_window_for("gpt-4") == 8_192
+    assert context_window_for("on-prem-model") is None
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from src.application.use_cases.get_usage import GetUsageUseCase, UsageRangeTooLarge
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.domain.models.usage import UsageQuery
+from src.infrastructure.db.models import UsageRollup
+from src.infrastructure.db.rollups import rebuild_usage_rollups
+from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from src.infrastructure.repositories.usage import SqlAlchemyUsageRepository
+from src.interfaces.api.dependencies import get_usage_use_case
+from src.main import create_app
+
+BASE = datetime(2024, 3, 1, 10, 15, tzinfo=timezone.utc)
+
+
+def _result(
+    user_id: str | None, language: ProgrammingLanguage, tokens: int, at: datetime
+) -> CodeGenerationResult:
+    result = CodeGenerationResult.new(
+        request=CodeGenerationRequest(
+            prompt="write it", language=language, max_tokens=64, user_id=user_id
+        ),
+        code="code",
+        model="dummy",
+        token_usage=tokens,
+        created_at=at,
+    )
+    result.prompt_tokens = 5
+    return result
+
+
+async def _seed(session_factory) -> None:
+    repository = SqlAlchemyGenerationRepository(session_factory)
+    await repository.save(_result("neo", ProgrammingLanguage.PYTHON, 10, BASE))
+    await repository.save_many(
+        [
+            _result("neo", ProgrammingLanguage.GO, 20, BASE + timedelta(minutes=30)),
+            _result("trinity", ProgrammingLanguage.PYTHON, 40, BASE + timedelta(hours=1)),
+            _result(None, ProgrammingLanguage.PYTHON, 80, BASE + timedelta(days=1)),
+        ]
+    )
+
+
+def _summary(buckets):
+    return [
+        (bucket.bucket_start, bucket.user_id, bucket.requests, bucket.token_usage)
+        for bucket in buckets
+    ]
+
+
+@pytest.mark.asyncio
+async def test_saves_update_hour_and_day_rollups(session_factory):
+    await _seed(session_factory)
+    usage = SqlAlchemyUsageRepository(session_factory)
+    day = BASE.replace(hour=0, minute=0)
+    hour = BASE.replace(minute=0)
+
+    daily = await usage.usage(UsageQuery(granularity="day", group_by=("user",)))
+    hourly = await usage.usage(
+        UsageQuery(
+            granularity="hour",
+            language=ProgrammingLanguage.PYTHON,
+            until=day + timedelta(days=1),
+        )
+    )
+
+    assert _summary(daily) == [
+        (day, "neo", 2, 30),
+        (day, "trinity", 1, 40),
+        (day + timedelta(days=1), None, 1, 80),
+    ]
+    assert daily[0].prompt_tokens == 10
+    assert _summary(hourly) == [(hour, None, 1, 10), (hour + timedelta(hours=1), None, 1, 40)]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_recomputes_rollups_from_records(session_factory):
+    await _seed(session_factory)
+    usage = SqlAlchemyUsageRepository(session_factory)
+    expected = await usage.usage(UsageQuery(granularity="hour", group_by=("user", "language")))
+    async with session_factory() as session:
+        await session.execute(delete(UsageRollup))
+        await session.commit()
+
+    counted = await rebuild_usage_rollups(session_factory, chunk_size=2)
+
+    assert counted == 4
+    assert await usage.usage(UsageQuery(granularity="hour", group_by=("user", "language"))) == (
+        expected
+    )
+
+
+@pytest.mark.asyncio
+async def test_use_case_bounds_the_bucket_range(session_factory):
+    await _seed(session_factory)
+    use_case = GetUsageUseCase(SqlAlchemyUsageRepository(session_factory), max_buckets=48)
+
+    with pytest.raises(UsageRangeTooLarge):
+        await use_case.execute(
+            UsageQuery(granularity="hour", since=BASE, until=BASE + timedelta(days=3))
+        )
+    assert await use_case.execute(UsageQuery()) == []
+
+
+@pytest.mark.asyncio
+async def test_usage_endpoint(session_factory):
+    await _seed(session_factory)
+    app = create_app()
+    app.dependency_overrides[get_usage_use_case] = lambda: GetUsageUseCase(
+        SqlAlchemyUsageRepository(session_factory), max_buckets=48
+    )
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get(
+            "/usage",
+            params={
+                "since": "2024-03-01T00:00:00Z",
+                "until": "2024-03-03T00:00:00Z",
+                "group_by": ["language", "model"],
+            },
+        )
+        too_wide = await client.get(
+            "/usage", params={"granularity": "hour", "since": "2024-01-01T00:00:00Z"}
+        )
+
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert [(item["language"], item["token_usage"]) for item in items] == [
+        ("go", 20),
+        ("python", 50),
+        ("python", 80),
+    ]
+    assert items[0]["model"] == "dummy" and items[0]["user_id"] is None
+    assert too_wide.status_code == 400
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.domain.models.code_generation import CodeGenerationRequest, CodeGenerationResult
+from src.domain.models.language import ProgrammingLanguage
+from src.infrastructure.repositories.generation import SqlAlchemyGenerationRepository
+from src.infrastructure.repositories.write_behind import WriteBehindGenerationRepository
+
+
+def make_result(index: int) -> CodeGenerationResult:
+    return CodeGenerationResult.new(
+        request=CodeGenerationRequest(
+            prompt=f"prompt {index}",
+            language=ProgrammingLanguage.PYTHON,
+            max_tokens=16,
+        ),
+        code="pass",
+        model="dummy",
+        token_usage=3,
+    )
+
+
+@pytest.mark.asyncio
+async def test_write_behind_batches_and_drains_on_stop(session_factory):
+    inner = SqlAlchemyGenerationRepository(session_factory)
+    repository = WriteBehindGenerationRepository(
+        inner, max_queue=100, batch_size=4, flush_interval=0.05
+    )
+    repository.start()
+
+    handles = [await repository.enqueue(make_result(index)) for index in range(10)]
+    await repository.stop()
+
+    record_ids = [await handle.record_id() for handle in handles]
+    assert len(set(record_ids)) == 10
+    assert [handle.result.record_id for handle in handles] == record_ids
+    assert repository.stats.batches == 3
+    assert len(await inner.list_recent(limit=20)) == 10
+
+
+@pytest.mark.asyncio
+async def test_write_behind_applies_backpressure_when_full(session_factory):
+    repository = WriteBehindGenerationRepository(
+        SqlAlchemyGenerationRepository(session_factory),
+        max_queue=1,
+        batch_size=10,
+        flush_interval=0.01,
+    )
+    await repository.save(make_result(0))
+
+    blocked = asyncio.create_task(repository.save(make_result(1)))
+    await asyncio.sleep(0.02)
+    assert not blocked.done()
+
+    repository.start()
+    await asyncio.wait_for(blocked, timeout=1)
+    await repository.stop()
+    assert repository.stats.flushed == 2
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_producers_that_queue_behind_the_sentinel(session_factory):
+    inner = SqlAlchemyGenerationRepository(session_factory)
+    repository = WriteBehindGenerationRepository(
+        inner, max_queue=1, batch_size=10, flush_interval=0.01
+    )
+    await repository.enqueue(make_result(0))
+    blocked = asyncio.create_task(repository.enqueue(make_result(1)))
+    await asyncio.sleep(0)
+
+    # The flusher frees the slot and stop() fills it with the sentinel before the
+    # blocked producer gets to run, so its write lands behind the sentinel.
+    repository.start()
+    await asyncio.wait_for(repository.stop(), timeout=1)
+
+    handle = await asyncio.wait_for(blocked, timeout=1)
+    assert await asyncio.wait_for(handle.record_id(), timeout=1) > 0
+    assert repository.stats.flushed == 2
+    assert len(await inner.list_recent(limit=5)) == 2